@@ -61,6 +61,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.humanize',
 
     # Third-party
     'rest_framework',
@@ -140,6 +141,26 @@ DATABASES = {
     }
 }
 
+# --------------------------------------------------
+# Cache
+# --------------------------------------------------
+# Shared Redis cache in production (REDIS_URL), per-process memory otherwise.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv("REDIS_URL"),
+            'KEY_PREFIX': 'accountease',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'accountease',
+        }
+    }
+
 # --------------------------------------------------
 # Email
 # --------------------------------------------------
@@ -215,13 +236,93 @@ if os.getenv("USE_MEDIA", "False") == "True":
 # --------------------------------------------------
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'shipments.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'shipments.ratelimit.APIRateThrottle',
+    ],
+}
+
+# Default page size of the cursor-paginated shipments API (?page_size= overrides, max 500)
+SHIPMENT_API_PAGE_SIZE = int(os.getenv("SHIPMENT_API_PAGE_SIZE", "50"))
+
+# Delta sync (/api/v1/shipments/sync/): every sync re-sends the changes of this
+# many seconds before the returned token. It must exceed the longest shipment
+# write transaction plus the clock skew between app servers.
+SHIPMENT_SYNC_OVERLAP_SECONDS = int(os.getenv("SHIPMENT_SYNC_OVERLAP_SECONDS", "300"))
+
+# Deletion tombstones are kept this long; older sync tokens get a full resync.
+SHIPMENT_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SHIPMENT_TOMBSTONE_RETENTION_DAYS", "30"))
+
+# At most this many changed shipments per sync response; a client that is
+# further behind gets has_more and keeps syncing until it has caught up.
+SHIPMENT_SYNC_PAGE_SIZE = int(os.getenv("SHIPMENT_SYNC_PAGE_SIZE", "500"))
+
+# API tokens (shipments.authentication.CachedTokenAuthentication):
+# - a token unused for AUTH_TOKEN_TTL_SECONDS expires (0 = never); each use
+#   extends it, writing to the database at most once per AUTH_TOKEN_REFRESH_SECONDS.
+# - token lookups are cached for AUTH_TOKEN_CACHE_SECONDS in CACHES and
+#   AUTH_TOKEN_LOCAL_CACHE_SECONDS per process; a revoked token may still be
+#   accepted by another process for up to the latter.
+AUTH_TOKEN_TTL_SECONDS = int(os.getenv("AUTH_TOKEN_TTL_SECONDS", str(30 * 24 * 3600)))
+AUTH_TOKEN_REFRESH_SECONDS = int(os.getenv("AUTH_TOKEN_REFRESH_SECONDS", "3600"))
+AUTH_TOKEN_CACHE_SECONDS = int(os.getenv("AUTH_TOKEN_CACHE_SECONDS", "300"))
+AUTH_TOKEN_LOCAL_CACHE_SECONDS = int(os.getenv("AUTH_TOKEN_LOCAL_CACHE_SECONDS", "10"))
+
+# Rate limits (shipments.ratelimit), counted in CACHES: "<count>/<s|min|hour|day>",
+# None disables a scope. Login and OTP limits protect the password hasher and
+# the mail server; the API limits apply per token (or per IP when anonymous).
+RATE_LIMITS = {
+    'login_ip': os.getenv("RATE_LIMIT_LOGIN_IP", "30/min"),
+    'login_user': os.getenv("RATE_LIMIT_LOGIN_USER", "10/min"),
+    'otp_send_ip': os.getenv("RATE_LIMIT_OTP_SEND_IP", "10/hour"),
+    'otp_send_email': os.getenv("RATE_LIMIT_OTP_SEND_EMAIL", "3/hour"),
+    'otp_verify': os.getenv("RATE_LIMIT_OTP_VERIFY", "5/min"),
+    'api_token': os.getenv("RATE_LIMIT_API_TOKEN", "600/min"),
+    'api_anon': os.getenv("RATE_LIMIT_API_ANON", "60/min"),
 }
 
+# Reverse proxies in front of the app (nginx = 1): the client IP used for rate
+# limiting is then read from X-Forwarded-For instead of REMOTE_ADDR.
+RATELIMIT_NUM_PROXIES = int(os.getenv("RATELIMIT_NUM_PROXIES", "0"))
+
+# Chitti downloads (shipments.downloads): the view checks access, then
+# SENDFILE_BACKEND decides who sends the bytes:
+# - "nginx": X-Accel-Redirect to SENDFILE_URL_PREFIX, which must be an
+#   `internal` location aliasing MEDIA_ROOT, e.g.
+#       location /protected-media/ { internal; alias /srv/accountease/media/; }
+#   MEDIA_URL itself must then not be served publicly.
+# - "xsendfile": X-Sendfile with the file path (Apache mod_xsendfile, lighttpd).
+# - "django": streamed by the app with Range support (development).
+# Chitti URLs change with the stored file name, so browsers may cache them
+# for CHITTI_CACHE_SECONDS.
+SENDFILE_BACKEND = os.getenv("SENDFILE_BACKEND", "django")
+SENDFILE_URL_PREFIX = os.getenv("SENDFILE_URL_PREFIX", "/protected-media/")
+CHITTI_CACHE_SECONDS = int(os.getenv("CHITTI_CACHE_SECONDS", str(7 * 24 * 3600)))
+
+# Resumable chitti uploads (shipments.uploads): chunks of at most
+# CHITTI_UPLOAD_CHUNK_SIZE bytes are written to CHITTI_UPLOAD_DIR, which must
+# be shared by all app processes and should sit on the same filesystem as
+# MEDIA_ROOT (finished files are then moved, not copied). Uploads untouched
+# for CHITTI_UPLOAD_EXPIRY_HOURS are deleted by `manage.py purge_chitti_uploads`.
+CHITTI_UPLOAD_DIR = os.getenv("CHITTI_UPLOAD_DIR", str(BASE_DIR / "media" / "chitti_uploads"))
+CHITTI_UPLOAD_CHUNK_SIZE = int(os.getenv("CHITTI_UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+CHITTI_UPLOAD_EXPIRY_HOURS = int(os.getenv("CHITTI_UPLOAD_EXPIRY_HOURS", "24"))
+
+# Chitti previews (shipments.previews): every new chitti file is queued, and
+# `manage.py render_chitti_previews --loop` (run it as a service) renders its
+# first page CHITTI_PREVIEW_WIDTH pixels wide and counts its pages with
+# poppler-utils. A render is killed after CHITTI_PREVIEW_TIMEOUT seconds and
+# a file is given up after CHITTI_PREVIEW_MAX_ATTEMPTS tries.
+PDFTOPPM_BINARY = os.getenv("PDFTOPPM_BINARY", "pdftoppm")
+PDFINFO_BINARY = os.getenv("PDFINFO_BINARY", "pdfinfo")
+CHITTI_PREVIEW_WIDTH = int(os.getenv("CHITTI_PREVIEW_WIDTH", "320"))
+CHITTI_PREVIEW_TIMEOUT = int(os.getenv("CHITTI_PREVIEW_TIMEOUT", "30"))
+CHITTI_PREVIEW_MAX_ATTEMPTS = int(os.getenv("CHITTI_PREVIEW_MAX_ATTEMPTS", "3"))
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
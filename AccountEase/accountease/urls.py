@@ -5,6 +5,13 @@ from django.conf import settings
 from django.conf.urls.static import static
 
 from shipments.views import home
+from shipments.ratelimit import client_ip, posted, ratelimit
+
+# Failed and successful attempts both count: each one runs the password hasher.
+login_view = ratelimit(
+    ('login_ip', client_ip),
+    ('login_user', posted('username')),
+)(auth_views.LoginView.as_view(template_name='forgotapp/login_form.html'))
 
 urlpatterns = [
 
@@ -19,7 +26,7 @@ urlpatterns = [
     # ------------------------------
     # Authentication
     # ------------------------------
-    path('login/', auth_views.LoginView.as_view(template_name='forgotapp/login_form.html'), name='login'),
+    path('login/', login_view, name='login'),
     path('logout/', auth_views.LogoutView.as_view(next_page='login'), name='logout'),
 
     # ------------------------------
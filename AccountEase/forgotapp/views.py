@@ -9,6 +9,8 @@ from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 
+from shipments.ratelimit import client_ip, posted, ratelimit
+
 from .models import PasswordResetOTP
 from .forms import ForgotPasswordForm, VerifyOTPForm, ResetPasswordForm
 
@@ -22,12 +24,14 @@ logger = logging.getLogger(__name__)
 # -------------------------------------------------
 # FORGOT PASSWORD (SEND OTP)
 # -------------------------------------------------
+@ratelimit(('otp_send_ip', client_ip), ('otp_send_email', posted('email')))
 def forgot_password(request):
     """
     Handles the initial step of password recovery.
     - Validates the email address.
     - Generates a 6-digit OTP.
     - Sends the OTP via email.
+    - Rate limited per IP and per email address.
     """
     form = ForgotPasswordForm(request.POST or None)
 
@@ -81,12 +85,14 @@ def forgot_password(request):
 # -------------------------------------------------
 # VERIFY OTP
 # -------------------------------------------------
+@ratelimit(('otp_verify', lambda request: request.session.get("reset_user_id")))
 def verify_otp(request):
     """
     Verifies the OTP entered by the user.
     - Checks if OTP matches the one stored for the session user.
     - Checks for expiration.
     - Marks OTP as used upon success.
+    - Rate limited per reset session user, so the 6 digits can't be guessed.
     """
     user_id = request.session.get("reset_user_id")
     if not user_id:
@@ -135,7 +141,8 @@ def reset_password(request):
     """
     Final step: Set the new password.
     - Requires 'reset_user_id' and 'otp_verified' in session.
-    - Updates user password safely.
+    - Updates user password safely (this also revokes the user's API
+      tokens; see shipments.signals).
     - Clears sensitive session data and unused OTPs.
     """
     user_id = request.session.get("reset_user_id")
@@ -1,7 +1,9 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.utils.html import format_html
 
-from .models import Shipment, ShipmentYatayat, Ticket
+from .models import (
+    ChittiBlob, ChittiPreview, ChittiUpload, Client, ClientAlias, ClientBalance, ExchangeRate, Shipment, ShipmentYatayat, Ticket
+)
 from .forms import ShipmentYatayatForm
 
 
@@ -26,7 +28,7 @@ class ShipmentYatayatInline(admin.TabularInline):
         if obj.pk and obj.chitti_file:
             return format_html(
                 '<a href="{}" target="_blank">📄 View PDF</a>',
-                obj.chitti_file.url
+                obj.get_file_url()
             )
         return "—"
 
@@ -71,13 +73,14 @@ class ShipmentAdmin(admin.ModelAdmin):
     )
 
     ordering = ('-created_at',)
-    readonly_fields = ('created_by', 'created_at', 'updated_at')
+    readonly_fields = ('client', 'created_by', 'created_at', 'updated_at')
 
     fieldsets = (
         ('Shipment Details', {
             'fields': (
                 'invoice_no',
                 'applicant',
+                'client',
                 'vanshar',
                 'price_terms',
                 'payment_terms',
@@ -125,6 +128,135 @@ class ShipmentAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
 
+# =====================================================
+# CLIENT ADMIN
+# =====================================================
+class ClientAliasInline(admin.TabularInline):
+    """
+    Applicant spellings that belong to the client. New aliases are normalized
+    on save and only affect shipments saved afterwards; use the merge action
+    to combine existing clients.
+    """
+    model = ClientAlias
+    extra = 1
+
+
+class ClientBalanceInline(admin.TabularInline):
+    """Read-only running totals per currency (maintained automatically)."""
+    model = ClientBalance
+    fields = ('currency', 'shipment_count', 'open_count', 'outstanding_amount')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Client)
+class ClientAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for Clients.
+    Clients are created automatically from shipment applicants.
+    """
+    list_display = ('name', 'created_at')
+    search_fields = ('name', 'aliases__normalized_name')
+    ordering = ('name',)
+    readonly_fields = ('created_at',)
+    inlines = [ClientAliasInline, ClientBalanceInline]
+    actions = ['merge_clients']
+
+    @admin.action(description="Merge selected clients into the first one")
+    def merge_clients(self, request, queryset):
+        clients = list(queryset.order_by('pk'))
+        if len(clients) < 2:
+            self.message_user(request, "Select at least two clients to merge.", messages.WARNING)
+            return
+        merged = Client.objects.merge(clients[0], clients[1:])
+        self.message_user(request, f"Merged {merged} client(s) into {clients[0]}.", messages.SUCCESS)
+
+
+# =====================================================
+# EXCHANGE RATE ADMIN
+# =====================================================
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for NPR exchange rates.
+    Bulk loads go through the import_exchange_rates command.
+    """
+    list_display = ('date', 'currency', 'rate')
+    list_filter = ('currency',)
+    date_hierarchy = 'date'
+    ordering = ('-date', 'currency')
+
+
+# =====================================================
+# CHITTI BLOB ADMIN
+# =====================================================
+@admin.register(ChittiBlob)
+class ChittiBlobAdmin(admin.ModelAdmin):
+    """
+    Read-only view of the deduplicated chitti files and their reference
+    counts. Blobs are created by the storage and deleted when unreferenced.
+    """
+    list_display = ('digest', 'name', 'size', 'ref_count', 'created_at')
+    search_fields = ('digest',)
+    ordering = ('-created_at',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+# =====================================================
+# CHITTI PREVIEW ADMIN
+# =====================================================
+@admin.register(ChittiPreview)
+class ChittiPreviewAdmin(admin.ModelAdmin):
+    """
+    Read-only view of the preview queue, for support. Failed previews are
+    queued again by `render_chitti_previews --retry-failed`.
+    """
+    list_display = ('blob', 'status', 'page_count', 'attempts', 'error', 'queued_at', 'rendered_at')
+    list_filter = ('status',)
+    list_select_related = ('blob',)
+    search_fields = ('blob__digest',)
+    ordering = ('-queued_at',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# =====================================================
+# CHITTI UPLOAD ADMIN
+# =====================================================
+@admin.register(ChittiUpload)
+class ChittiUploadAdmin(admin.ModelAdmin):
+    """
+    Read-only view of chunked chitti uploads, for support.
+    Expired ones are removed by the purge_chitti_uploads command.
+    """
+    list_display = ('filename', 'created_by', 'shipment', 'offset', 'size', 'status', 'updated_at')
+    list_filter = ('status',)
+    list_select_related = ('created_by', 'shipment')
+    ordering = ('-updated_at',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # =====================================================
 # SUPPORT TICKET ADMIN
 # =====================================================
@@ -1,6 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .api_views import ShipmentViewSet, LoginAPIView
+from .api_views import (
+    ShipmentViewSet, LoginAPIView, LogoutAPIView, ChittiUploadCreateAPIView, ChittiUploadAPIView
+)
 
 # Create a router and register our viewsets with it.
 router = DefaultRouter()
@@ -10,4 +12,7 @@ router.register(r'shipments', ShipmentViewSet, basename='api-shipment')
 urlpatterns = [
     path('', include(router.urls)),
     path('login/', LoginAPIView.as_view(), name='api-login'),
+    path('logout/', LogoutAPIView.as_view(), name='api-logout'),
+    path('chitti-uploads/', ChittiUploadCreateAPIView.as_view(), name='api-chitti-upload-list'),
+    path('chitti-uploads/<uuid:pk>/', ChittiUploadAPIView.as_view(), name='api-chitti-upload-detail'),
 ]
@@ -1,14 +1,36 @@
+import logging
+
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.shortcuts import get_object_or_404
+
+from .models import ChittiUpload, ClientAlias, Shipment, ShipmentTombstone, normalize_client_name, sees_all_shipments
+from .serializers import (
+    ChittiUploadSerializer,
+    ShipmentSerializer,
+    resolve_shipment_fields,
+    serialize_shipment_rows,
+    shipment_value_fields,
+)
+from .pagination import ShipmentCursorPagination
+from .conditional import shipment_validators, not_modified, set_validators
+from .sync import changes_since, decode_token
+from .bulk import BULK_MAX_ITEMS, validate_bulk_items, write_bulk_items
+from .roles import get_roles
+from .authentication import CachedTokenAuthentication, issue_token
+from .ratelimit import LoginRateThrottle
+from .analytics import DEFAULT_GROUPING, GROUPINGS, turnaround_report
+from .uploads import UploadConflict, chunk_size, discard_upload, parse_content_range, start_upload, write_chunk
 
-from .models import Shipment
-from .serializers import ShipmentSerializer
+logger = logging.getLogger(__name__)
 
 
 class LoginAPIView(APIView):
@@ -16,7 +38,10 @@ class LoginAPIView(APIView):
     API View for user login.
     Returns an Auth Token for valid credentials.
     """
+    # A stale or expired token sent along must not block getting a new one.
+    authentication_classes = []
     permission_classes = [AllowAny]
+    throttle_classes = [LoginRateThrottle]
 
     def post(self, request, *args, **kwargs):
         username = request.data.get('username')
@@ -36,7 +61,7 @@ class LoginAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        token, _ = Token.objects.get_or_create(user=user)
+        token = issue_token(user)
 
         return Response({
             "token": token.key,
@@ -46,24 +71,319 @@ class LoginAPIView(APIView):
         })
 
 
+class LogoutAPIView(APIView):
+    """
+    API View for user logout.
+    Deletes the Auth Token sent with the request, so it can't be used again.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        # The Token post_delete signal drops its cached lookup.
+        Token.objects.filter(key=request.auth).delete()
+        logger.info(f"API logout | User={request.user.username}")
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class ShipmentViewSet(viewsets.ReadOnlyModelViewSet):
     """
     A viewset for viewing Shipments.
     Provides `list` and `retrieve` actions.
     Authentication is required.
+    The list is cursor-paginated on (-dispatch_date, -id);
+    pass `?paginate=false` for the legacy unpaginated array.
+    Both actions send an ETag and answer `If-None-Match` with 304 Not Modified.
+    `sync/?since=<token>` returns only what changed since a previous sync.
+    Every read action accepts `?fields=`, `?exclude=` and `?view=summary`.
+    `POST bulk/` creates and updates shipments in batches.
     """
-    queryset = Shipment.objects.all().order_by('-dispatch_date', '-id')
+    queryset = Shipment.objects.prefetch_related('yatayats').order_by('-dispatch_date', '-id')
     serializer_class = ShipmentSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = ShipmentCursorPagination
 
     def get_queryset(self):
         """
-        Optionally restrict the returned shipments by filtering.
+        The shipments the user may see (Shipment.objects.visible_to, as on the
+        web list and for chitti downloads), optionally filtered.
         """
-        queryset = super().get_queryset()
-        # Example: Filter by applicant if needed
-        applicant = self.request.query_params.get('applicant')
+        queryset = super().get_queryset().visible_to(self.request.user)
+
+        fields = self.get_requested_fields()
+        if fields is not None and 'yatayats' not in fields:
+            queryset = queryset.prefetch_related(None)
+
+        # ?applicant=: shipments of the clients any of whose aliases starts
+        # with it (an index range on ClientAlias instead of a LIKE '%x%' scan).
+        applicant = normalize_client_name(self.request.query_params.get('applicant'))
         if applicant:
-            queryset = queryset.filter(applicant__icontains=applicant)
-        return queryset
\ No newline at end of file
+            queryset = queryset.filter(
+                client__in=ClientAlias.objects.filter(normalized_name__startswith=applicant).values('client_id')
+            )
+        client = self.request.query_params.get('client', '')
+        if client.isdigit():
+            queryset = queryset.filter(client_id=int(client))
+        return queryset
+
+    def get_requested_fields(self):
+        """
+        Output fields selected by ?fields= / ?exclude= / ?view=, or None for all.
+        """
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = resolve_shipment_fields(self.request.query_params)
+        return self._requested_fields
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def validator_scope(self):
+        """ETag scope: shared by everyone who sees all shipments, else per user."""
+        user = self.request.user
+        return 'all' if sees_all_shipments(user) else f"user:{user.pk}"
+
+    def list(self, request, *args, **kwargs):
+        """
+        Fast path: serializes the page from values() rows with
+        serialize_shipment_rows(), which returns the same JSON as
+        ShipmentSerializer without building model or field objects per row.
+        Nothing is serialized when the client's ETag is still current.
+        """
+        fields = self.get_requested_fields()
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = shipment_validators(request, queryset, self.validator_scope())
+
+        response = not_modified(request, etag)
+        if response is None:
+            rows = queryset.prefetch_related(None).values(*shipment_value_fields(fields))
+            page = self.paginate_queryset(rows)
+            if page is not None:
+                response = self.get_paginated_response(serialize_shipment_rows(page, request, fields))
+            else:
+                response = Response(serialize_shipment_rows(rows, request, fields))
+
+        return set_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Returns a single shipment, or 304 when the client's ETag is still current.
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        etag, last_modified = shipment_validators(request, queryset, self.validator_scope())
+
+        response = not_modified(request, etag)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+
+        return set_validators(response, etag, last_modified)
+
+    @action(detail=False, methods=['get'])
+    def sync(self, request, *args, **kwargs):
+        """
+        Delta sync for clients that keep a local copy of the shipments.
+
+        GET sync/?since=<token> returns:
+        - shipments:   shipments created or changed since the token (same JSON as the list)
+        - deleted:     ids of shipments deleted since the token
+        - since:       the token to send next time
+        - full_resync: true when there is no token or it is too old; the client
+                       must reload the full list and then keep the new token.
+        - has_more:    true when 'shipments' was cut at SHIPMENT_SYNC_PAGE_SIZE;
+                       the client syncs again with 'since' until it is false.
+
+        Clients apply 'shipments' (upsert by id) before 'deleted'.
+        The same shipment may be sent again by the next sync (see shipments.sync).
+        """
+        since, after_id = request.query_params.get('since'), None
+        if since:
+            try:
+                since, after_id = decode_token(since)
+            except (TypeError, ValueError, OverflowError):
+                raise ValidationError({'since': "Invalid sync token."})
+
+        fields = self.get_requested_fields()
+        rows, deleted, full_resync, has_more, token = changes_since(
+            self.filter_queryset(self.get_queryset()).prefetch_related(None),
+            ShipmentTombstone.objects.visible_to(request.user),
+            since or None,
+            shipment_value_fields(fields),
+            after_id,
+        )
+
+        return Response({
+            'since': token,
+            'full_resync': full_resync,
+            'has_more': has_more,
+            'shipments': serialize_shipment_rows(rows, request, fields),
+            'deleted': deleted,
+        })
+
+    @action(detail=False, methods=['get'])
+    def turnaround(self, request, *args, **kwargs):
+        """
+        Turnaround statistics (days) of each lifecycle step over all shipments:
+        count, mean, max and percentiles, overall and per group.
+
+        GET turnaround/?group_by=bank|vanshar (default: bank)
+        """
+        grouping = request.query_params.get('group_by', DEFAULT_GROUPING)
+        if grouping not in GROUPINGS:
+            raise ValidationError({'group_by': f"Choose one of: {', '.join(GROUPINGS)}."})
+
+        try:
+            report = turnaround_report(grouping)
+        except ImportError as exc:
+            logger.error(f"Turnaround analytics unavailable: {exc}")
+            return Response({'detail': str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        return Response(report)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request, *args, **kwargs):
+        """
+        Creates and updates many shipments in one request.
+
+        Body: a JSON array of shipments (at most BULK_MAX_ITEMS). Items with an
+        'id' update that shipment with the given fields; items without one are
+        created. Nested 'yatayats' ([{"yatayat": "Bagmati"}, ...]) are added.
+
+        Every item is validated first; if any is invalid nothing is written and
+        the response is 400 with the errors of each item (by index).
+        Otherwise items are saved with bulk_create / bulk_update, one transaction
+        per chunk, and each item's outcome is reported.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({'non_field_errors': ["Expected a list of shipments."]})
+        if len(items) > BULK_MAX_ITEMS:
+            raise ValidationError({'non_field_errors': [f"At most {BULK_MAX_ITEMS} shipments per request."]})
+
+        roles = get_roles(request.user)
+        has_updates = any(isinstance(item, dict) and 'id' in item for item in items)
+        has_creates = any(not isinstance(item, dict) or 'id' not in item for item in items)
+        if (has_creates and not roles.has_perm('shipments.add_shipment')) or \
+                (has_updates and not roles.has_perm('shipments.change_shipment')):
+            raise PermissionDenied("You do not have permission to perform this action.")
+
+        valid, errors = validate_bulk_items(items)
+        if errors:
+            return Response(
+                {'created': 0, 'updated': 0, 'failed': 0, 'errors': errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = write_bulk_items(valid, request.user)
+        counts = {state: sum(1 for result in results if result['status'] == state)
+                  for state in ('created', 'updated', 'failed')}
+
+        logger.info(
+            f"Bulk shipment write | Created={counts['created']} | Updated={counts['updated']} | "
+            f"Failed={counts['failed']} | User={request.user}"
+        )
+
+        return Response(
+            {**counts, 'results': results},
+            status=status.HTTP_207_MULTI_STATUS if counts['failed'] else status.HTTP_200_OK
+        )
+
+
+class ChittiUploadMixin:
+    """
+    Resumable chitti uploads (shipments.uploads), for the app (API token)
+    and the shipment form's script (session; CSRF applies).
+    """
+    authentication_classes = [CachedTokenAuthentication, SessionAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def upload_response(self, upload, status_code=status.HTTP_200_OK):
+        response = Response(
+            ChittiUploadSerializer(upload, context={'request': self.request}).data, status=status_code
+        )
+        response['Upload-Offset'] = upload.offset
+        response['Cache-Control'] = 'no-store'
+        return response
+
+
+class ChittiUploadCreateAPIView(ChittiUploadMixin, APIView):
+    """
+    POST {"filename": "...", "size": <bytes>, "shipment": <id>, "yatayat": "..."}
+    starts an upload and returns its id (201).
+    With a shipment, the finished file becomes a new yatayat of it; without
+    one it is kept for the shipment form to claim.
+    """
+
+    def post(self, request, *args, **kwargs):
+        serializer = ChittiUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        shipment = data.get('shipment')
+
+        roles = get_roles(request.user)
+        if shipment is not None:
+            if not Shipment.objects.visible_to(request.user).filter(pk=shipment.pk).exists():
+                raise ValidationError({'shipment': ["Shipment not found."]})
+            allowed = roles.has_perm('shipments.change_shipment')
+        else:
+            allowed = roles.has_perm('shipments.add_shipment') or roles.has_perm('shipments.change_shipment')
+        if not allowed:
+            raise PermissionDenied("You do not have permission to perform this action.")
+
+        try:
+            upload = start_upload(request.user, data['filename'], data['size'], shipment, data.get('yatayat'))
+        except DjangoValidationError as exc:
+            raise ValidationError({'filename': exc.messages})
+
+        response = self.upload_response(upload, status.HTTP_201_CREATED)
+        response['Location'] = request.build_absolute_uri(f"{request.path.rstrip('/')}/{upload.pk}/")
+        response['Upload-Chunk-Size'] = chunk_size()
+        return response
+
+
+class ChittiUploadAPIView(ChittiUploadMixin, APIView):
+    """
+    GET / HEAD: the upload's state; 'offset' (and the Upload-Offset header)
+    is where the next chunk starts, e.g. after a dropped connection.
+    PUT:    one chunk as the raw body, placed with
+            'Content-Range: bytes <first>-<last>/<size>' (at most
+            Upload-Chunk-Size bytes). A chunk not starting at the offset
+            gets 409 with the offset. The last one attaches the file.
+    DELETE: cancels the upload.
+    """
+    # The body is read from the stream by shipments.uploads, never parsed.
+    parser_classes = []
+
+    def get_upload(self, pk):
+        return get_object_or_404(ChittiUpload, pk=pk, created_by=self.request.user)
+
+    def get(self, request, pk, *args, **kwargs):
+        return self.upload_response(self.get_upload(pk))
+
+    def put(self, request, pk, *args, **kwargs):
+        upload = self.get_upload(pk)
+        try:
+            first, last, total = parse_content_range(request.META.get('HTTP_CONTENT_RANGE'))
+            if total != upload.size:
+                raise DjangoValidationError("The Content-Range size differs from the upload's size.")
+            upload = write_chunk(upload, first, last, request.stream)
+        except UploadConflict as exc:
+            response = self.upload_response(upload, status.HTTP_409_CONFLICT)
+            response['Upload-Offset'] = exc.args[0]
+            return response
+        except DjangoValidationError as exc:
+            raise ValidationError({'detail': exc.messages})
+        except Exception:
+            logger.error(f"Chitti upload chunk failed | ID={pk} | User={request.user}", exc_info=True)
+            raise
+
+        return self.upload_response(upload)
+
+    def delete(self, request, pk, *args, **kwargs):
+        upload = self.get_upload(pk)
+        if upload.status != ChittiUpload.Status.ATTACHED:
+            discard_upload(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
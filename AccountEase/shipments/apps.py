@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ShipmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shipments'
+
+    def ready(self):
+        # Register signal handlers (denormalized yatayat counts, RBAC cache).
+        from . import signals  # noqa: F401
@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+# --------------------------
+# Settings
+# --------------------------
+def token_ttl():
+    """Idle lifetime of a token, or None if tokens never expire."""
+    seconds = getattr(settings, 'AUTH_TOKEN_TTL_SECONDS', 0)
+    return timedelta(seconds=seconds) if seconds else None
+
+
+def token_refresh_interval():
+    """How often a used token's expiry is pushed back (one UPDATE per interval)."""
+    return timedelta(seconds=getattr(settings, 'AUTH_TOKEN_REFRESH_SECONDS', 3600))
+
+
+# --------------------------
+# Token Cache
+# --------------------------
+# Two levels, both keyed by a hash of the token (the key itself is never stored):
+# - a per-process dict with a short TTL, so most requests skip even the cache server;
+# - the shared cache, so each process hits the database once per token and TTL.
+# Revocation deletes the shared entry and this process's entry; other processes
+# stop accepting a revoked token when their local entry expires
+# (AUTH_TOKEN_LOCAL_CACHE_SECONDS).
+
+_local_cache = {}
+_local_lock = threading.Lock()
+
+# The user columns kept in the cache: what authentication and the permission
+# checks read. Anything else (never the password hash) is loaded on access.
+CACHED_USER_FIELDS = (User._meta.pk.attname, User.USERNAME_FIELD, 'is_active', 'is_staff', 'is_superuser')
+
+
+def _cache_key(key):
+    return 'auth:token:' + hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _local_get(cache_key):
+    with _local_lock:
+        item = _local_cache.get(cache_key)
+        if item and item[0] > time.monotonic():
+            return item[1]
+        _local_cache.pop(cache_key, None)
+    return None
+
+
+def _local_set(cache_key, entry):
+    ttl = getattr(settings, 'AUTH_TOKEN_LOCAL_CACHE_SECONDS', 10)
+    if not ttl:
+        return
+    with _local_lock:
+        if len(_local_cache) >= 10000:
+            # Bounded: drop everything rather than track usage order.
+            _local_cache.clear()
+        _local_cache[cache_key] = (time.monotonic() + ttl, entry)
+
+
+def _store(key, token_created, user):
+    """Caches what authenticate_credentials needs: CACHED_USER_FIELDS and the token's age."""
+    entry = {
+        'token_created': token_created,
+        # In model field order, which User.from_db() expects for a partial row.
+        'user': {
+            field.attname: getattr(user, field.attname)
+            for field in User._meta.concrete_fields if field.attname in CACHED_USER_FIELDS
+        },
+    }
+    cache_key = _cache_key(key)
+    cache.set(cache_key, entry, getattr(settings, 'AUTH_TOKEN_CACHE_SECONDS', 300))
+    _local_set(cache_key, entry)
+    return entry
+
+
+def invalidate_token_cache(*keys):
+    """Drops cached lookups of these token keys (this process and the shared cache)."""
+    cache_keys = [_cache_key(key) for key in keys]
+    with _local_lock:
+        for cache_key in cache_keys:
+            _local_cache.pop(cache_key, None)
+    cache.delete_many(cache_keys)
+
+
+def invalidate_user_tokens(user_id):
+    """Drops the cached lookups of a user's tokens (the user row changed)."""
+    keys = list(Token.objects.filter(user_id=user_id).values_list('key', flat=True))
+    if keys:
+        invalidate_token_cache(*keys)
+
+
+def revoke_user_tokens(user):
+    """
+    Deletes the user's API tokens (logout everywhere): used on password reset
+    and deactivation. The Token post_delete handler clears the cache.
+    """
+    deleted, _ = Token.objects.filter(user=user).delete()
+    if deleted:
+        logger.info(f"API tokens revoked | UserID={user.pk}")
+
+
+# --------------------------
+# Issuing
+# --------------------------
+def is_expired(token_created, now=None):
+    ttl = token_ttl()
+    return bool(ttl) and token_created < (now or timezone.now()) - ttl
+
+
+def issue_token(user):
+    """
+    Returns the user's token for a login: the existing one with its expiry
+    pushed back, or a new one if it had expired.
+    """
+    now = timezone.now()
+    token, created = Token.objects.get_or_create(user=user)
+    if not created:
+        if is_expired(token.created, now):
+            token.delete()
+            token = Token.objects.create(user=user)
+        else:
+            Token.objects.filter(pk=token.pk).update(created=now)
+            invalidate_token_cache(token.key)
+    return token
+
+
+# --------------------------
+# Authentication
+# --------------------------
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication ('Authorization: Token <key>') without a database
+    query per request, plus token expiry.
+
+    - The token -> user lookup is cached (see "Token Cache" above).
+    - With AUTH_TOKEN_TTL_SECONDS set, a token unused for that long expires.
+      Expiry slides: Token.created is moved to "now" at most once every
+      AUTH_TOKEN_REFRESH_SECONDS while the token is in use.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = _cache_key(key)
+        entry = _local_get(cache_key)
+        if entry is None:
+            entry = cache.get(cache_key)
+            if entry is not None:
+                _local_set(cache_key, entry)
+
+        now = timezone.now()
+        # A stale cached age (another process refreshed the token) is re-read.
+        if entry is None or is_expired(entry['token_created'], now):
+            entry = self._load(key, now)
+
+        if entry['token_created'] < now - token_refresh_interval():
+            if not Token.objects.filter(key=key).update(created=now):
+                # Deleted (logout, password reset, deactivation) while this
+                # process still had it cached: don't put it back.
+                invalidate_token_cache(key)
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            entry = self._store_user(key, now, entry)
+
+        user = User.from_db('default', list(entry['user']), list(entry['user'].values()))
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (user, key)
+
+    def _load(self, key, now):
+        try:
+            token = Token.objects.select_related('user').get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if is_expired(token.created, now):
+            token.delete()
+            logger.info(f"Expired API token removed | UserID={token.user_id}")
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+
+        return _store(key, token.created, token.user)
+
+    @staticmethod
+    def _store_user(key, token_created, entry):
+        user = User.from_db('default', list(entry['user']), list(entry['user'].values()))
+        return _store(key, token_created, user)
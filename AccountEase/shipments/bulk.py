@@ -0,0 +1,157 @@
+import logging
+from collections import Counter, defaultdict
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from .models import Shipment, ShipmentYatayat
+from .serializers import ShipmentBulkSerializer
+
+logger = logging.getLogger(__name__)
+
+BULK_MAX_ITEMS = 1000
+BULK_CHUNK_SIZE = 200
+
+
+# --------------------------
+# Validation
+# --------------------------
+def validate_bulk_items(items):
+    """
+    Validates every item before anything is written.
+    Returns (valid, errors):
+    - valid:  [(index, existing_shipment_or_None, validated_data), ...]
+    - errors: [{'index': i, 'errors': {...}}, ...]
+    Costs two queries however many items there are: one to load the shipments
+    being updated, one to check invoice number uniqueness.
+    """
+    errors = {}
+    checked = []
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[index] = {'non_field_errors': ["Expected an object."]}
+            continue
+
+        serializer = ShipmentBulkSerializer(data=item, partial='id' in item)
+        if serializer.is_valid():
+            checked.append((index, serializer.validated_data))
+        else:
+            errors[index] = serializer.errors
+
+    # --- Updates: the shipments must exist ---
+    existing = Shipment.objects.in_bulk([data['id'] for _, data in checked if 'id' in data])
+    valid = []
+    for index, data in checked:
+        instance = None
+        if 'id' in data:
+            instance = existing.get(data['id'])
+            if instance is None:
+                errors[index] = {'id': ["Shipment not found."]}
+                continue
+        valid.append((index, instance, data))
+
+    # --- Invoice numbers: unique in the payload and in the database ---
+    invoices = Counter(data['invoice_no'] for _, _, data in valid if 'invoice_no' in data)
+    taken = dict(
+        Shipment.objects.filter(invoice_no__in=list(invoices)).values_list('invoice_no', 'id')
+    )
+    for index, instance, data in valid:
+        invoice_no = data.get('invoice_no')
+        if invoice_no is None:
+            continue
+        if invoices[invoice_no] > 1:
+            errors.setdefault(index, {})['invoice_no'] = ["Duplicate invoice number in this request."]
+        elif invoice_no in taken and (instance is None or taken[invoice_no] != instance.pk):
+            errors.setdefault(index, {})['invoice_no'] = ["Shipment with this invoice no already exists."]
+
+    valid = [entry for entry in valid if entry[0] not in errors]
+    return valid, [{'index': index, 'errors': errors[index]} for index in sorted(errors)]
+
+
+# --------------------------
+# Writing
+# --------------------------
+def write_bulk_items(valid, user, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Persists validated items in chunks, one transaction per chunk.
+    Returns one result per item: {'index', 'id', 'invoice_no', 'status'},
+    status being 'created', 'updated' or 'failed' (the chunk was rolled back).
+    """
+    results = []
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        try:
+            with transaction.atomic():
+                results.extend(_write_chunk(chunk, user))
+        except DatabaseError:
+            logger.error(
+                f"Bulk shipment chunk failed | Items={chunk[0][0]}-{chunk[-1][0]} | User={user}",
+                exc_info=True
+            )
+            results.extend(
+                {
+                    'index': index,
+                    'id': instance.pk if instance else None,
+                    'invoice_no': data.get('invoice_no', instance.invoice_no if instance else None),
+                    'status': 'failed',
+                }
+                for index, instance, data in chunk
+            )
+    return results
+
+
+def _write_chunk(chunk, user):
+    now = timezone.now()
+    created = []
+    updated_by_fields = defaultdict(list)
+    yatayats = []
+
+    for index, instance, data in chunk:
+        fields = {key: value for key, value in data.items() if key not in ('id', 'yatayats')}
+        if instance is None:
+            created.append((index, Shipment(created_by=user, **fields), data))
+        else:
+            for key, value in fields.items():
+                setattr(instance, key, value)
+            instance.updated_at = now
+            # Only write the fields each item gave, so concurrent edits of
+            # other fields are not overwritten with the values loaded earlier.
+            updated_by_fields[tuple(sorted(fields)) + ('updated_at',)].append((index, instance, data))
+
+    # --- Creates ---
+    new_shipments = [shipment for _, shipment, _ in created]
+    Shipment.objects.bulk_create(new_shipments)
+    if any(shipment.pk is None for shipment in new_shipments):
+        # MySQL does not return the primary keys of bulk-inserted rows.
+        ids = dict(
+            Shipment.objects
+            .filter(invoice_no__in=[shipment.invoice_no for shipment in new_shipments])
+            .values_list('invoice_no', 'id')
+        )
+        for shipment in new_shipments:
+            shipment.pk = ids[shipment.invoice_no]
+
+    # --- Updates (one UPDATE statement per batch of rows sharing a field set) ---
+    for fields, entries in updated_by_fields.items():
+        Shipment.objects.bulk_update([instance for _, instance, _ in entries], list(fields))
+
+    # --- Yatayats (ShipmentYatayatQuerySet.bulk_create maintains the counts) ---
+    entries = created + [entry for group in updated_by_fields.values() for entry in group]
+    for _, shipment, data in entries:
+        for yatayat in data.get('yatayats', []):
+            yatayats.append(ShipmentYatayat(shipment_id=shipment.pk, yatayat=yatayat.get('yatayat')))
+    if yatayats:
+        ShipmentYatayat.objects.bulk_create(yatayats)
+
+    created_indexes = {index for index, _, _ in created}
+    results = [
+        {
+            'index': index,
+            'id': shipment.pk,
+            'invoice_no': shipment.invoice_no,
+            'status': 'created' if index in created_indexes else 'updated',
+        }
+        for index, shipment, _ in entries
+    ]
+    return sorted(results, key=lambda result: result['index'])
@@ -0,0 +1,89 @@
+import hashlib
+import logging
+
+from django.contrib import messages
+from django.middleware.csrf import get_token
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+logger = logging.getLogger(__name__)
+
+# Bump when the list templates or the API output change, so clients
+# holding a validator from before a deploy re-download the new format.
+VALIDATOR_VERSION = 1
+
+
+# --------------------------
+# Validators
+# --------------------------
+def shipment_validators(request, queryset, scope, *variant):
+    """
+    Returns (etag, last_modified) for a response listing `queryset`.
+
+    Built from a single aggregate query: MAX(updated_at) and COUNT(*).
+    'updated_at' moves on every shipment write and on every yatayat write
+    (see ShipmentQuerySet.record_yatayat_changes); the count catches deletes.
+    The scope (whose rows the user may see), the variant (e.g. the template
+    layout) and the full request path (filters, cursor, page size) are part
+    of the ETag, so two different responses never share a validator.
+    """
+    stats = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+    last_modified = stats['last_modified']
+
+    raw = "|".join(str(part) for part in (
+        VALIDATOR_VERSION,
+        request.get_host(),
+        request.get_full_path(),
+        scope,
+        *variant,
+        stats['count'],
+        last_modified.timestamp() if last_modified else '',
+    ))
+    etag = quote_etag(hashlib.md5(raw.encode('utf-8')).hexdigest())
+    return etag, last_modified
+
+
+def csrf_variant(request):
+    """
+    ETag variant for HTML pages that embed a CSRF token (the logout form in
+    base.html): the unmasked CSRF secret, which login rotates. Without it a
+    page cached before a re-login would post a stale token and get a 403.
+    get_token() returns a freshly masked token each call, so the secret it
+    stores in request.META is used instead (it is only hashed into the ETag).
+    """
+    get_token(request)
+    return request.META.get('CSRF_COOKIE', '')
+
+
+def not_modified(request, etag):
+    """
+    Returns a 304 response if the request's If-None-Match matches `etag`,
+    otherwise None.
+    Last-Modified is sent for information only: a delete can leave
+    MAX(updated_at) unchanged, so If-Modified-Since alone can't prove the
+    list is unchanged and is not used to answer 304.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+
+    # A pending flash message must be rendered, not replaced by a cached page.
+    if len(messages.get_messages(request)):
+        return None
+
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        logger.debug(f"Conditional GET matched | Path={request.path}")
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    """
+    Adds ETag / Last-Modified to the response. 'no-cache' makes clients
+    revalidate every time; 'private' keeps shared caches out of per-user data.
+    """
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,128 @@
+import bisect
+import logging
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Case, Count, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import IsNull
+
+from .models import BASE_CURRENCY, ExchangeRate
+
+logger = logging.getLogger(__name__)
+
+NPR_FIELD = DecimalField(max_digits=20, decimal_places=2)
+RATE_FIELD = DecimalField(max_digits=14, decimal_places=6)
+
+
+# --------------------------
+# In-Database Conversion
+# --------------------------
+def rate_for(currency='currency', on_date='dispatch_date'):
+    """
+    Expression for the NPR rate of the row's `currency` field on its
+    `on_date` field: the latest rate on or before that date or, for dates
+    before the first imported rate, the earliest one. BASE_CURRENCY is 1;
+    a currency without any rate gives NULL.
+
+    Each lookup is a correlated subquery that reads one row of the
+    (currency, date) unique index, so it costs an index seek per row (or per
+    group, on the rollup table) rather than a scan of the rate table.
+    """
+    same_currency = ExchangeRate.objects.filter(currency=OuterRef(currency))
+    on_or_before = same_currency.filter(date__lte=OuterRef(on_date)).order_by('-date').values('rate')[:1]
+    after = same_currency.filter(date__gt=OuterRef(on_date)).order_by('date').values('rate')[:1]
+
+    return Case(
+        When(**{currency: BASE_CURRENCY}, then=Value(Decimal(1), output_field=RATE_FIELD)),
+        default=Coalesce(Subquery(on_or_before, output_field=RATE_FIELD), Subquery(after, output_field=RATE_FIELD)),
+        output_field=RATE_FIELD,
+    )
+
+
+def npr_amount(amount='amount', currency='currency', on_date='dispatch_date'):
+    """
+    Expression converting a Shipment amount to NPR at its dispatch date's rate.
+    Use in annotate() / aggregate(): Sum(npr_amount()).
+    """
+    return ExpressionWrapper(F(amount) * rate_for(currency, on_date), output_field=NPR_FIELD)
+
+
+def unconverted_count(currency='currency', on_date='dispatch_date'):
+    """
+    Aggregate counting the rows npr_amount() can't convert (no rate for their
+    currency), which Sum(npr_amount()) silently leaves out.
+    """
+    return Count('pk', filter=Q(IsNull(rate_for(currency, on_date), True)))
+
+
+# --------------------------
+# Cached Lookups
+# --------------------------
+# The whole rate table (a few thousand rows at most) is kept in each process,
+# as {currency: (sorted dates, rates)}. Writes replace a version token in the
+# shared cache; processes compare it at most every LOCAL_CHECK_SECONDS.
+
+RATES_VERSION_KEY = 'fx:version'
+LOCAL_CHECK_SECONDS = 30
+
+_local = {'version': None, 'checked': 0.0, 'table': {}}
+_local_lock = threading.Lock()
+
+
+def invalidate_rates():
+    """Call after changing ExchangeRate rows (done by the signals and the import command)."""
+    cache.set(RATES_VERSION_KEY, uuid.uuid4().hex, None)
+    with _local_lock:
+        _local['checked'] = 0.0
+
+
+def rates_version():
+    """Changes whenever the rates do; part of the validators of pages showing NPR totals."""
+    return cache.get(RATES_VERSION_KEY)
+
+
+def _rate_table():
+    now = time.monotonic()
+    if now - _local['checked'] < LOCAL_CHECK_SECONDS:
+        return _local['table']
+
+    version = cache.get(RATES_VERSION_KEY)
+    if version is None:
+        cache.add(RATES_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(RATES_VERSION_KEY)
+
+    with _local_lock:
+        if version != _local['version']:
+            table = {}
+            for currency, day, rate in ExchangeRate.objects.order_by('currency', 'date').values_list('currency', 'date', 'rate'):
+                dates, rates = table.setdefault(currency, ([], []))
+                dates.append(day)
+                rates.append(rate)
+            _local['table'] = table
+            _local['version'] = version
+            logger.debug(f"Exchange rates loaded | Currencies={len(table)}")
+        _local['checked'] = now
+        return _local['table']
+
+
+def get_rate(currency, on_date):
+    """NPR rate of `currency` on `on_date` (same rule as rate_for()), or None."""
+    if currency == BASE_CURRENCY:
+        return Decimal(1)
+    dates, rates = _rate_table().get(currency, ((), ()))
+    if not dates:
+        return None
+    index = bisect.bisect_right(dates, on_date)
+    return rates[index - 1] if index else rates[0]
+
+
+def to_npr(amount, currency, on_date):
+    """`amount` in NPR, rounded to paisa, or None without a rate."""
+    rate = get_rate(currency, on_date)
+    if amount is None or rate is None:
+        return None
+    return (amount * rate).quantize(Decimal('0.01'))
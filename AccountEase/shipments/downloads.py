@@ -0,0 +1,176 @@
+import hashlib
+import logging
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import quote_etag
+
+from .authentication import CachedTokenAuthentication
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+# --------------------------
+# Authentication
+# --------------------------
+def download_user(request):
+    """
+    The user of a download request: the session user (browser) or the
+    owner of an 'Authorization: Token ...' header (mobile app).
+    Returns None when neither is present; raises AuthenticationFailed for a
+    bad token.
+    """
+    if request.user.is_authenticated:
+        return request.user
+    credentials = CachedTokenAuthentication().authenticate(request)
+    return credentials[0] if credentials else None
+
+
+def login_required_response(request):
+    if request.META.get('HTTP_AUTHORIZATION'):
+        return HttpResponse("Invalid or expired token.", status=401, content_type='text/plain')
+    return redirect_to_login(request.get_full_path())
+
+
+# --------------------------
+# Responses
+# --------------------------
+def serve_file(request, field_file, filename):
+    """
+    Response that sends a stored file, by SENDFILE_BACKEND:
+    - 'nginx':     X-Accel-Redirect to SENDFILE_URL_PREFIX + the stored name
+                   (an `internal` location aliasing MEDIA_ROOT)
+    - 'xsendfile': X-Sendfile with the file's path (Apache mod_xsendfile, lighttpd)
+    - 'django':    streamed by this process, with Range support
+    With a proxy backend no file byte passes through Python, and the proxy
+    answers Range and conditional requests itself.
+    The caller adds the cache headers.
+    """
+    backend = getattr(settings, 'SENDFILE_BACKEND', 'django')
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    if backend == 'nginx':
+        prefix = getattr(settings, 'SENDFILE_URL_PREFIX', '/protected-media/')
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(field_file.name)
+    elif backend == 'xsendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = field_file.path
+    else:
+        response = _stream_file(request, field_file, content_type)
+    logger.debug(f"Serving file | Backend={backend} | Name={field_file.name} | Status={response.status_code}")
+
+    response['Content-Disposition'] = f"inline; filename*=UTF-8''{quote(filename)}"
+    return response
+
+
+def _stream_file(request, field_file, content_type):
+    """
+    The 'django' backend: a FileResponse for the whole file, 206 Partial
+    Content for a single 'Range: bytes=' range (416 if it starts past the
+    end), 304 when If-None-Match matches. Multi-range and malformed Range
+    headers get the whole file, which RFC 9110 allows.
+    """
+    storage = field_file.storage
+    size = storage.size(field_file.name)
+    etag = quote_etag(hashlib.md5(f"{field_file.name}:{size}".encode('utf-8')).hexdigest())
+
+    if etag in _etags(request.META.get('HTTP_IF_NONE_MATCH')):
+        response = HttpResponse(status=304)
+        response['ETag'] = etag
+        return response
+
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if request.method == 'GET' and (not if_range or if_range == etag):
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f"bytes */{size}"
+            return response
+
+    if byte_range is None:
+        response = FileResponse(storage.open(field_file.name, 'rb'), content_type=content_type)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(storage.open(field_file.name, 'rb'), start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Range'] = f"bytes {start}-{end}/{size}"
+        response['Content-Length'] = end - start + 1
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    return response
+
+
+def parse_range(header, size):
+    """
+    (first, last) byte offsets of a single-range 'bytes=' header, or None to
+    send the whole file (no header, several ranges, another unit, or a
+    malformed range such as a last byte before the first: RFC 9110 §14.2
+    says to ignore it).
+    Raises ValueError for a range that starts at or past the end of the file.
+    """
+    match = RANGE_RE.match((header or '').strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # 'bytes=-500': the last 500 bytes.
+        length = int(last)
+        if not length or not size:
+            raise ValueError("Empty suffix range.")
+        return max(size - length, 0), size - 1
+    first = int(first)
+    if last and int(last) < first:
+        return None
+    if first >= size:
+        raise ValueError("Range not satisfiable.")
+    last = min(int(last), size - 1) if last else size - 1
+    return first, last
+
+
+def _read_range(file, start, length):
+    with file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _etags(header):
+    return {tag.strip() for tag in (header or '').split(',') if tag.strip()}
+
+
+def set_download_cache_headers(response, immutable):
+    """
+    Chitti URLs carry the stored file name, which changes whenever the file
+    is replaced, so the browser may keep a copy for CHITTI_CACHE_SECONDS.
+    'private': the response depends on who asked, shared caches must not store it.
+    """
+    if immutable:
+        patch_cache_control(
+            response, private=True, max_age=getattr(settings, 'CHITTI_CACHE_SECONDS', 0), immutable=True
+        )
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
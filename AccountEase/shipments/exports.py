@@ -0,0 +1,129 @@
+import csv
+import logging
+import tempfile
+
+from .models import Shipment
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 2000
+
+# (column heading, queryset field) in export order.
+EXPORT_COLUMNS = [
+    ('Invoice No', 'invoice_no'),
+    ('Applicant', 'applicant'),
+    ('Vanshar', 'vanshar'),
+    ('Bank', 'bank_name'),
+    ('Bank Ref No', 'bank_ref_no'),
+    ('Amount', 'amount'),
+    ('Currency', 'currency'),
+    ('Price Terms', 'price_terms'),
+    ('Payment Terms', 'payment_terms'),
+    ('Insurance Company', 'insurance_company'),
+    ('PP No', 'pp_no'),
+    ('Dispatch Date', 'dispatch_date'),
+    ('Doc Received Date', 'doc_received_date'),
+    ('ETA', 'eta_date'),
+    ('Settlement Date', 'settlement_date'),
+    ('Margin Amount', 'margin_amount'),
+    ('Margin Date', 'margin_date'),
+    ('Customs Entry Date', 'customs_entry_date'),
+    ('Doc To Bank', 'doc_to_bank'),
+    ('Yatayats', 'yatayat_count'),
+    ('Chittis', 'chitti_count'),
+    ('Created By', 'created_by__username'),
+]
+EXPORT_FIELDS = [field for _, field in EXPORT_COLUMNS]
+
+# Choice codes are exported as their labels ('Nabil' -> 'Nabil Bank', '$' -> 'USD'),
+# which import_shipments accepts back.
+CHOICE_LABELS = {
+    field.name: dict(field.choices)
+    for field in Shipment._meta.get_fields()
+    if getattr(field, 'choices', None) and field.name in EXPORT_FIELDS
+}
+
+
+# --------------------------
+# Rows
+# --------------------------
+def iter_export_rows(queryset, native=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields one tuple of display values per shipment, newest first.
+    Dates are ISO strings, unless `native` (XLSX) keeps them as date cells.
+
+    Reads the queryset in keyset chunks on '-id' (WHERE id < last ORDER BY id
+    DESC LIMIT n) rather than relying on a server-side cursor: MySQL drivers
+    buffer a whole result set client-side, so one big SELECT would hold the
+    entire export in memory. Each chunk is a single indexed range scan.
+    """
+    queryset = queryset.order_by('-id').values_list('id', *EXPORT_FIELDS)
+    last_id = None
+
+    while True:
+        chunk = queryset if last_id is None else queryset.filter(id__lt=last_id)
+        rows = list(chunk[:chunk_size])
+        if not rows:
+            return
+
+        for row in rows:
+            yield tuple(_display(field, value, native) for field, value in zip(EXPORT_FIELDS, row[1:]))
+
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+
+def _display(field, value, native=False):
+    if value is None:
+        return None if native else ''
+    if field in CHOICE_LABELS:
+        value = CHOICE_LABELS[field].get(value, value)
+    if hasattr(value, 'isoformat') and not native:
+        return value.isoformat()
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        # Stop spreadsheets from evaluating text as a formula.
+        return "'" + value
+    return value
+
+
+# --------------------------
+# CSV
+# --------------------------
+class Echo:
+    """A file-like object whose write() returns the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset):
+    """Yields the export as CSV lines, one row at a time."""
+    writer = csv.writer(Echo())
+    # UTF-8 BOM so Excel reads non-ASCII text (e.g. the NPR symbol) correctly.
+    yield '\ufeff' + writer.writerow([heading for heading, _ in EXPORT_COLUMNS])
+    for row in iter_export_rows(queryset):
+        yield writer.writerow(row)
+
+
+# --------------------------
+# XLSX
+# --------------------------
+def build_xlsx(queryset):
+    """
+    Writes the export to a temporary .xlsx file and returns it, rewound.
+    openpyxl's write-only mode streams rows to disk, so memory does not grow
+    with the number of shipments. Raises ImportError if openpyxl is missing.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Shipments')
+    worksheet.append([heading for heading, _ in EXPORT_COLUMNS])
+    for row in iter_export_rows(queryset, native=True):
+        worksheet.append(row)
+
+    output = tempfile.TemporaryFile(suffix='.xlsx')
+    workbook.save(output)
+    output.seek(0)
+    return output
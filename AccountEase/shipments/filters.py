@@ -0,0 +1,87 @@
+import logging
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+# Query parameters understood by filter_shipments().
+FILTER_PARAMS = ('q', 'status', 'eta_from', 'eta_to', 'client')
+
+
+def parse_filter_date(value):
+    """
+    Parses a date filter value using the project's DATE_INPUT_FORMATS
+    (DD/MM/YYYY first, then ISO). Returns None for empty or invalid input.
+    """
+    value = (value or '').strip()
+    if not value:
+        return None
+
+    for fmt in settings.DATE_INPUT_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+
+    logger.debug(f"Ignoring invalid date filter value: {value}")
+    return None
+
+
+def get_active_filters(params):
+    """
+    Returns the cleaned filter values from a QueryDict (or any mapping).
+    Empty or invalid values are dropped so they never reach the query.
+    """
+    filters = {}
+
+    q = (params.get('q') or '').strip()
+    if q:
+        filters['q'] = q
+
+    status = (params.get('status') or '').strip().lower()
+    if status in ('settled', 'unsettled'):
+        filters['status'] = status
+
+    for key in ('eta_from', 'eta_to'):
+        date = parse_filter_date(params.get(key))
+        if date:
+            filters[key] = date
+
+    client = (params.get('client') or '').strip()
+    if client.isdigit():
+        filters['client'] = int(client)
+
+    return filters
+
+
+def filter_shipments(queryset, params):
+    """
+    Applies the shipment list filters to a queryset.
+    - q:        prefix match on invoice number or applicant (index-backed LIKE 'x%').
+    - status:   'settled' / 'unsettled' based on settlement_date.
+    - eta_from: ETA on or after this date.
+    - eta_to:   ETA on or before this date.
+    - client:   shipments of this Client id (the link from the Clients page).
+    """
+    filters = get_active_filters(params)
+
+    if 'q' in filters:
+        queryset = queryset.filter(
+            Q(invoice_no__istartswith=filters['q']) | Q(applicant__istartswith=filters['q'])
+        )
+
+    if filters.get('status') == 'settled':
+        queryset = queryset.filter(settlement_date__isnull=False)
+    elif filters.get('status') == 'unsettled':
+        queryset = queryset.filter(settlement_date__isnull=True)
+
+    if 'eta_from' in filters:
+        queryset = queryset.filter(eta_date__gte=filters['eta_from'])
+    if 'eta_to' in filters:
+        queryset = queryset.filter(eta_date__lte=filters['eta_to'])
+    if 'client' in filters:
+        queryset = queryset.filter(client_id=filters['client'])
+
+    return queryset
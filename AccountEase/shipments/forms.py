@@ -5,6 +5,8 @@ from django.core.files.uploadedfile import UploadedFile
 from django.utils import timezone
 
 from .models import Shipment, Ticket, ShipmentYatayat
+from .validators import validate_chitti_file, validate_shipment_field
+from .uploads import completed_upload
 
 # =========================================================
 # CONSTANTS
@@ -114,52 +116,31 @@ class ShipmentForm(forms.ModelForm):
     
     def clean_margin_date(self):
         """Ensure margin date is not in the future."""
-        margin_date = self.cleaned_data.get('margin_date')
-        if margin_date and margin_date > timezone.now().date():
-            raise ValidationError("Margin date cannot be in the future.")
-        return margin_date
-    
+        return validate_shipment_field('margin_date', self.cleaned_data.get('margin_date'))
+
     def clean_dispatch_date(self):
         """Ensure dispatch date is not in the future."""
-        date = self.cleaned_data.get('dispatch_date')
-        if date and date > timezone.now().date():
-            raise ValidationError("Dispatch date cannot be in the future.")
-        return date
+        return validate_shipment_field('dispatch_date', self.cleaned_data.get('dispatch_date'))
 
     def clean_doc_received_date(self):
         """Ensure document received date is not in the future."""
-        date = self.cleaned_data.get('doc_received_date')
-        if date and date > timezone.now().date():
-            raise ValidationError("Document received date cannot be in the future.")
-        return date
+        return validate_shipment_field('doc_received_date', self.cleaned_data.get('doc_received_date'))
 
     def clean_customs_entry_date(self):
         """Ensure customs entry date is not in the future."""
-        date = self.cleaned_data.get('customs_entry_date')
-        if date and date > timezone.now().date():
-            raise ValidationError("Customs entry date cannot be in the future.")
-        return date
+        return validate_shipment_field('customs_entry_date', self.cleaned_data.get('customs_entry_date'))
 
     def clean_doc_to_bank(self):
         """Ensure document-to-bank date is not in the future."""
-        date = self.cleaned_data.get('doc_to_bank')
-        if date and date > timezone.now().date():
-            raise ValidationError("Document to bank date cannot be in the future.")
-        return date
-    
+        return validate_shipment_field('doc_to_bank', self.cleaned_data.get('doc_to_bank'))
+
     def clean_amount(self):
         """Ensure transaction amount is non-negative."""
-        amount = self.cleaned_data.get('amount')
-        if amount is not None and amount < 0:
-            raise ValidationError("Amount cannot be negative.")
-        return amount
+        return validate_shipment_field('amount', self.cleaned_data.get('amount'))
 
     def clean_margin_amount(self):
         """Ensure margin amount is non-negative."""
-        margin_amount = self.cleaned_data.get('margin_amount')
-        if margin_amount is not None and margin_amount < 0:
-            raise ValidationError("Margin amount cannot be negative.")
-        return margin_amount
+        return validate_shipment_field('margin_amount', self.cleaned_data.get('margin_amount'))
 
 
 # =========================================================
@@ -169,7 +150,12 @@ class ShipmentYatayatForm(forms.ModelForm):
     """
     Form for adding/editing a Yatayat (Transport) details within a shipment.
     Handled primarily via FormSet.
+    The page uploads chitti files in chunks beforehand (shipments.uploads) and
+    posts only the upload's id in `chitti_upload`; a file posted in
+    `chitti_file` is still accepted when that upload could not run.
     """
+    chitti_upload = forms.UUIDField(required=False, widget=forms.HiddenInput)
+
     class Meta:
         model = ShipmentYatayat
         fields = ['yatayat', 'chitti_file']
@@ -178,19 +164,34 @@ class ShipmentYatayatForm(forms.ModelForm):
             'chitti_file': forms.ClearableFileInput(attrs={'class': 'form-control'}),
         }
 
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+        self.upload = None
+
     def clean_chitti_file(self):
         """
         Validate file upload:
         - Max size: 5MB
         - File type: PDF only
         """
-        file = self.cleaned_data.get('chitti_file')
-        if file:
-            if file.size > 5 * 1024 * 1024:  # 5MB
-                raise ValidationError("File size must not exceed 5 MB.")
-            if not file.name.lower().endswith('.pdf'):
-                raise ValidationError("Only PDF files are allowed.")
-        return file
+        return validate_chitti_file(self.cleaned_data.get('chitti_file'))
+
+    def clean(self):
+        """
+        Swaps in the file of a finished chunked upload. It is moved, not
+        copied, into the chitti storage when the yatayat is saved; the view
+        then calls shipments.uploads.mark_attached().
+        """
+        cleaned_data = super().clean()
+        upload_id = cleaned_data.get('chitti_upload')
+        if upload_id and self.user is not None:
+            self.upload = completed_upload(upload_id, self.user)
+            if self.upload is None:
+                self.add_error('chitti_file', "The uploaded file has expired; please choose it again.")
+            else:
+                cleaned_data['chitti_file'] = self.upload
+        return cleaned_data
 
 
 # =========================================================
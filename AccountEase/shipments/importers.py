@@ -0,0 +1,213 @@
+import csv
+import logging
+import os
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from .models import Shipment
+from .validators import validate_shipment_field
+
+logger = logging.getLogger(__name__)
+
+# Shipment fields an import file may provide.
+IMPORT_FIELDS = [
+    'invoice_no', 'applicant', 'vanshar', 'bank_name', 'bank_ref_no', 'amount',
+    'currency', 'price_terms', 'payment_terms', 'insurance_company', 'pp_no',
+    'dispatch_date', 'doc_received_date', 'eta_date', 'settlement_date',
+    'margin_amount', 'margin_date', 'customs_entry_date', 'doc_to_bank',
+]
+
+# Common spreadsheet headings that differ from the field names / verbose names.
+HEADER_ALIASES = {
+    'invoice': 'invoice_no',
+    'invoice_number': 'invoice_no',
+    'bank': 'bank_name',
+    'bank_ref': 'bank_ref_no',
+    'insurance': 'insurance_company',
+    'eta': 'eta_date',
+    'dispatched': 'dispatch_date',
+    'settled': 'settlement_date',
+    'settled_date': 'settlement_date',
+    'customs_entry': 'customs_entry_date',
+    'doc_received': 'doc_received_date',
+    'margin': 'margin_amount',
+}
+
+
+def normalize_header(value):
+    """'Invoice No.' -> 'invoice_no'"""
+    return re.sub(r'[^a-z0-9]+', '_', str(value or '').strip().lower()).strip('_')
+
+
+# --------------------------
+# Readers
+# --------------------------
+def iter_rows(path, sheet=None):
+    """
+    Yields the rows of a CSV or XLSX file as lists, header first.
+    Both are streamed: memory use does not depend on the file size.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        yield from _iter_xlsx_rows(path, sheet)
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as handle:
+            yield from csv.reader(handle)
+
+
+def _iter_xlsx_rows(path, sheet=None):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Reading .xlsx files requires openpyxl (pip install openpyxl).")
+
+    # read_only streams the sheet XML instead of loading every cell.
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        for row in worksheet.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+# --------------------------
+# Row Parsing
+# --------------------------
+class RowError(Exception):
+    """A row that can't be imported; args[0] maps fields to messages."""
+
+
+class ShipmentRowParser:
+    """
+    Converts spreadsheet rows into Shipment instances.
+    - Columns are matched by field name, verbose name or HEADER_ALIASES.
+    - Choice columns accept the stored code or the label ('Nabil Bank', 'USD').
+    - Values are checked with the same rules as ShipmentForm
+      (shipments.validators) plus the model's required fields and lengths.
+    """
+
+    def __init__(self, header, created_by=None):
+        self.created_by = created_by
+        self.fields = {field.name: field for field in Shipment._meta.get_fields() if field.name in IMPORT_FIELDS}
+        self.columns = self._map_columns(header)
+
+        missing = [
+            name for name, field in self.fields.items()
+            if not field.blank and not field.has_default() and name not in self.columns.values()
+        ]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+        self.choices = {
+            name: self._choice_lookup(field.choices)
+            for name, field in self.fields.items() if field.choices
+        }
+
+    def _map_columns(self, header):
+        """Returns {column index: field name} for the recognised columns."""
+        known = {}
+        for name, field in self.fields.items():
+            known[name] = name
+            known[normalize_header(field.verbose_name)] = name
+        known.update(HEADER_ALIASES)
+
+        columns = {}
+        for index, heading in enumerate(header):
+            name = known.get(normalize_header(heading))
+            if name and name not in columns.values():
+                columns[index] = name
+            elif heading:
+                logger.debug(f"Import: ignoring column '{heading}'")
+        return columns
+
+    @staticmethod
+    def _choice_lookup(choices):
+        """{'nabil': 'Nabil', 'nabil bank': 'Nabil', 'usd': '$', ...}"""
+        lookup = {}
+        for code, label in choices:
+            lookup[str(label).strip().lower()] = code
+            lookup[str(code).strip().lower()] = code
+        return lookup
+
+    def parse(self, row):
+        """
+        Returns an unsaved Shipment for a row.
+        Raises RowError({field: message}) listing every invalid field.
+        """
+        values = {}
+        errors = {}
+
+        for index, name in self.columns.items():
+            raw = row[index] if index < len(row) else None
+            try:
+                values[name] = self._convert(name, raw)
+            except ValidationError as exc:
+                errors[name] = exc.messages[0]
+
+        for name, field in self.fields.items():
+            if name in errors:
+                continue
+            value = values.get(name)
+            if value in (None, '') and not field.blank and not field.has_default():
+                errors[name] = "This field is required."
+
+        if errors:
+            raise RowError(errors)
+
+        values = {name: value for name, value in values.items() if value is not None}
+        return Shipment(created_by=self.created_by, **values)
+
+    def _convert(self, name, raw):
+        field = self.fields[name]
+        if isinstance(raw, str):
+            raw = raw.strip()
+        if raw in (None, ''):
+            return None if field.null else ('' if field.blank else None)
+
+        internal_type = field.get_internal_type()
+        if internal_type == 'DateField':
+            value = self._to_date(raw)
+        elif internal_type == 'DecimalField':
+            value = self._to_decimal(raw, field)
+        elif field.choices:
+            value = self.choices[name].get(str(raw).strip().lower())
+            if value is None:
+                raise ValidationError(f"'{raw}' is not a valid choice.")
+        else:
+            if isinstance(raw, float) and raw.is_integer():
+                raw = int(raw)  # Spreadsheets store numeric invoice/PP numbers as floats.
+            value = str(raw)
+            if field.max_length and len(value) > field.max_length:
+                raise ValidationError(f"Ensure this value has at most {field.max_length} characters.")
+
+        return validate_shipment_field(name, value)
+
+    @staticmethod
+    def _to_date(raw):
+        if isinstance(raw, datetime):
+            return raw.date()
+        if isinstance(raw, date):
+            return raw
+        for fmt in settings.DATE_INPUT_FORMATS:
+            try:
+                return datetime.strptime(str(raw), fmt).date()
+            except ValueError:
+                continue
+        raise ValidationError(f"'{raw}' is not a valid date.")
+
+    @staticmethod
+    def _to_decimal(raw, field):
+        try:
+            value = Decimal(str(raw).replace(',', '')).quantize(Decimal(1).scaleb(-field.decimal_places))
+        except InvalidOperation:
+            raise ValidationError(f"'{raw}' is not a valid amount.")
+        if not value.is_finite():
+            raise ValidationError(f"'{raw}' is not a valid amount.")
+        if len(value.as_tuple().digits) > field.max_digits:
+            raise ValidationError(f"Ensure there are no more than {field.max_digits} digits in total.")
+        return value
@@ -0,0 +1,112 @@
+import logging
+import math
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shipments.analytics import (
+    GROUPINGS,
+    PERCENTILES,
+    TURNAROUND_STEPS,
+    load_snapshot,
+    turnaround_stats,
+)
+from shipments.models import Shipment
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Compares the turnaround analytics with the straightforward alternative on
+    the current database:
+    - loop:   iterate Shipment instances, collect durations per step and
+              group in Python lists, sort each list for its percentiles
+    - numpy:  load_snapshot() (one values_list pass) + turnaround_stats()
+
+    Fails if the two disagree.
+    """
+    help = "Check parity and measure the speed of the turnaround analytics."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--group-by',
+            choices=list(GROUPINGS),
+            default='bank',
+            help="Grouping to compute (default: bank).",
+        )
+
+    def handle(self, *args, **options):
+        grouping = options['group_by']
+        if not Shipment.objects.exists():
+            raise CommandError("No shipments to analyse.")
+
+        try:
+            started = time.perf_counter()
+            snapshot = load_snapshot()
+            loaded = time.perf_counter()
+            fast = turnaround_stats(snapshot, grouping)
+            finished = time.perf_counter()
+        except ImportError as exc:
+            raise CommandError(str(exc))
+
+        loop_started = time.perf_counter()
+        slow = self._loop(grouping)
+        loop_seconds = time.perf_counter() - loop_started
+
+        # --- Parity ---
+        for step in fast['steps']:
+            expected = slow[step['key']]
+            actual = {group['group']: group for group in step['groups']}
+            if set(expected) != set(actual):
+                raise CommandError(f"{step['key']}: groups differ.")
+            for name, stats in expected.items():
+                for stat, value in stats.items():
+                    if not math.isclose(actual[name][stat], value, abs_tol=0.05):
+                        raise CommandError(
+                            f"{step['key']} / {name} / {stat}: numpy {actual[name][stat]} != loop {value}"
+                        )
+
+        numpy_seconds = finished - started
+        self.stdout.write(f"Shipments: {fast['shipments']} | Grouping: {grouping}")
+        self.stdout.write(f"  loop   {loop_seconds * 1000:9.1f} ms")
+        self.stdout.write(
+            f"  numpy  {numpy_seconds * 1000:9.1f} ms "
+            f"(load {(loaded - started) * 1000:.1f} ms, stats {(finished - loaded) * 1000:.1f} ms)"
+        )
+        speedup = loop_seconds / numpy_seconds if numpy_seconds else 0
+        logger.info(f"Analytics benchmark | Shipments={fast['shipments']} | Speedup={speedup:.1f}x")
+        self.stdout.write(self.style.SUCCESS(f"Results match; numpy is {speedup:.1f}x faster."))
+
+    def _loop(self, grouping):
+        """{step key: {group: {'count', 'mean', 'max', 'p50', ...}}} the slow way."""
+        field = GROUPINGS[grouping][0]
+        durations = {key: defaultdict(list) for key, *_ in TURNAROUND_STEPS}
+
+        for shipment in Shipment.objects.all():
+            for key, _, start, end in TURNAROUND_STEPS:
+                first, last = getattr(shipment, start), getattr(shipment, end)
+                if first and last:
+                    durations[key][getattr(shipment, field) or ''].append((last - first).days)
+
+        return {
+            key: {name: self._summarize(sorted(values)) for name, values in groups.items()}
+            for key, groups in durations.items()
+        }
+
+    @staticmethod
+    def _summarize(values):
+        def percentile(p):
+            # Linear interpolation between closest ranks (numpy's default).
+            position = (len(values) - 1) * p / 100
+            low = math.floor(position)
+            high = min(low + 1, len(values) - 1)
+            return values[low] + (values[high] - values[low]) * (position - low)
+
+        return {
+            'count': len(values),
+            'mean': round(sum(values) / len(values), 1),
+            'max': values[-1],
+            **{f'p{p}': round(percentile(p), 1) for p in PERCENTILES},
+        }
@@ -0,0 +1,106 @@
+import json
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from shipments.models import Shipment
+from shipments.serializers import (
+    ShipmentSerializer,
+    SUMMARY_FIELDS,
+    serialize_shipment_rows,
+    shipment_value_fields,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Compares the shipment list serialization paths on the current database:
+    - serializer:  ShipmentSerializer(many=True) without prefetching (N+1)
+    - prefetched:  ShipmentSerializer(many=True) with prefetch_related('yatayats')
+    - fast:        serialize_shipment_rows() over values() rows
+
+    Fails if the fast path output differs from ShipmentSerializer's.
+    """
+    help = "Check parity and measure the speed of the shipment serialization paths."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=10000,
+            help="Number of shipments to serialize (default: 10000).",
+        )
+        parser.add_argument(
+            '--view',
+            choices=['full', 'summary'],
+            default='full',
+            help="Representation to compare: all fields or '?view=summary' (default: full).",
+        )
+        parser.add_argument(
+            '--skip-unprefetched',
+            action='store_true',
+            help="Skip the N+1 baseline (slow on large tables).",
+        )
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        request = RequestFactory(SERVER_NAME='localhost').get('/api/v1/shipments/')
+        queryset = Shipment.objects.order_by('-dispatch_date', '-id')[:limit]
+        if not queryset.exists():
+            raise CommandError("No shipments to serialize.")
+
+        context = {'request': request}
+        fields = SUMMARY_FIELDS if options['view'] == 'summary' else None
+
+        results = {}
+        if not options['skip_unprefetched']:
+            results['serializer'] = self._measure(
+                lambda: ShipmentSerializer(list(queryset.all()), many=True, context=context, fields=fields).data
+            )
+        results['prefetched'] = self._measure(
+            lambda: ShipmentSerializer(
+                list(queryset.all() if fields else queryset.prefetch_related('yatayats')),
+                many=True, context=context, fields=fields,
+            ).data
+        )
+        results['fast'] = self._measure(
+            lambda: serialize_shipment_rows(queryset.values(*shipment_value_fields(fields)), request, fields)
+        )
+
+        # --- Parity ---
+        expected = json.loads(json.dumps(results['prefetched']['data']))
+        actual = json.loads(json.dumps(results['fast']['data']))
+        if expected != actual:
+            mismatch = next(
+                (e['id'] for e, a in zip(expected, actual) if e != a),
+                None,
+            )
+            raise CommandError(f"Fast path output differs from ShipmentSerializer (first mismatch: ID {mismatch}).")
+
+        self.stdout.write(f"Serialized {len(expected)} shipments; fast path output matches ShipmentSerializer.")
+
+        baseline = results.get('serializer', results['prefetched'])['seconds']
+        for name, result in results.items():
+            self.stdout.write(
+                f"  {name:<11} {result['seconds']:8.3f}s  {result['queries']:6d} queries  "
+                f"x{baseline / result['seconds']:.1f}"
+            )
+
+        logger.info(
+            f"Serializer benchmark | Rows={len(expected)} | "
+            + " | ".join(f"{name}={result['seconds']:.3f}s" for name, result in results.items())
+        )
+
+    @staticmethod
+    def _measure(func):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            data = func()
+            seconds = time.perf_counter() - start
+        return {'data': data, 'seconds': max(seconds, 1e-9), 'queries': len(queries)}
@@ -0,0 +1,149 @@
+import logging
+import os
+import shutil
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from shipments.models import HAS_CHITTI, ChittiBlob, ChittiPreview, ShipmentYatayat
+from shipments.storage import blob_name, hash_file
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Moves the chitti files stored before deduplication (one copy per upload,
+    under shipment_chittis/%Y/%m/) into the content-addressed layout of
+    shipments.storage.ContentAddressedStorage.
+
+    The files are hashed in parallel (--workers threads; hashlib releases
+    the GIL, so this scales with the disks). Then, one transaction per
+    --batch-size distinct contents, each content gets a ChittiBlob, the
+    yatayats are repointed to it (their old file name kept as
+    original_name) and the reference counts are recomputed. The old copies
+    are deleted once their batch has committed, so an interrupted run can
+    simply be started again.
+    """
+    help = "Deduplicate existing chitti files into content-addressed blobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 4,
+            help="Number of files hashed in parallel (default: CPU count).",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help="Number of distinct files moved per transaction (default: 200).",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Only report how much space deduplication would save.",
+        )
+
+    def handle(self, *args, **options):
+        field = ShipmentYatayat._meta.get_field('chitti_file')
+        storage = field.storage
+        directory = str(field.upload_to).rstrip('/')
+        started = time.perf_counter()
+
+        names = list(
+            ShipmentYatayat.objects.filter(HAS_CHITTI)
+            .exclude(chitti_file__in=ChittiBlob.objects.values('name'))
+            .values_list('chitti_file', flat=True)
+            .distinct()
+        )
+        self.stdout.write(f"Hashing {len(names)} files with {options['workers']} workers...")
+
+        def hash_stored(name):
+            try:
+                return name, *hash_file(storage.path(name))
+            except FileNotFoundError:
+                return name, None, 0
+
+        groups = defaultdict(list)
+        sizes = {}
+        missing = []
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for name, digest, size in executor.map(hash_stored, names, chunksize=16):
+                if digest is None:
+                    missing.append(name)
+                    continue
+                groups[digest].append(name)
+                sizes[digest] = size
+
+        for name in missing:
+            self.stderr.write(f"Missing from storage, left as is: {name}")
+
+        duplicate_bytes = sum(sizes[digest] * (len(group) - 1) for digest, group in groups.items())
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"{len(names) - len(missing)} files, {len(groups)} distinct; "
+                f"deduplication would free {duplicate_bytes / 1024 / 1024:.1f} MB."
+            ))
+            return
+
+        digests = list(groups)
+        moved = 0
+        for start in range(0, len(digests), options['batch_size']):
+            batch = digests[start:start + options['batch_size']]
+            with transaction.atomic():
+                for digest in batch:
+                    self._move_group(storage, directory, digest, sizes[digest], groups[digest])
+            # Committed: the old copies are no longer referenced.
+            for digest in batch:
+                for name in groups[digest]:
+                    storage.delete(name)
+            moved += len(batch)
+
+            if options['verbosity'] >= 2:
+                self.stdout.write(f"Moved {moved} of {len(digests)} distinct files")
+
+        collected = ChittiBlob.objects.collect()
+        elapsed = time.perf_counter() - started
+        summary = (
+            f"Deduplicated {len(names) - len(missing)} files into {len(digests)} blobs, "
+            f"freeing {duplicate_bytes / 1024 / 1024:.1f} MB "
+            f"({len(missing)} missing, {collected} unreferenced blobs removed) in {elapsed:.1f}s."
+        )
+        logger.info(f"Chitti deduplication finished | {summary}")
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    def _move_group(self, storage, directory, digest, size, names):
+        """
+        Points the yatayats using any of `names` (files with this digest) to
+        the blob, creating it from the first file when it doesn't exist yet.
+        """
+        extension = os.path.splitext(names[0])[1].lower()
+        blob, created = ChittiBlob.objects.select_for_update().get_or_create(
+            digest=digest, defaults={'name': blob_name(directory, digest, extension), 'size': size}
+        )
+        if created:
+            ChittiPreview.objects.queue([blob])
+        target = storage.path(blob.name)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            source = storage.path(names[0])
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copyfile(source, target)
+
+        yatayats = ShipmentYatayat.objects.filter(chitti_file__in=names)
+        yatayats.filter(original_name='').update(
+            original_name=Case(
+                *[When(chitti_file=name, then=Value(os.path.basename(name)[:255])) for name in names],
+                default=F('original_name'),
+            )
+        )
+        # The queryset update recounts the blob's references.
+        yatayats.update(chitti_file=blob.name)
@@ -0,0 +1,126 @@
+import json
+import logging
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from shipments.models import Shipment
+
+logger = logging.getLogger(__name__)
+
+# Matches SQLite plan lines such as "SCAN shipments_shipment" (no index used).
+SQLITE_FULL_SCAN = re.compile(r'\bSCAN (\S+)\s*$')
+
+
+class Command(BaseCommand):
+    """
+    Runs EXPLAIN on the queries behind the shipment list, filters, API and admin,
+    and reports which of them fall back to a full table scan.
+
+    Note: on a nearly empty table the optimizer may prefer a full scan even when
+    a suitable index exists, so run this against realistic data.
+    """
+    help = "EXPLAIN the Shipment hot queries and report full table scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fail-on-scan',
+            action='store_true',
+            help="Exit with an error if any hot query does a full table scan.",
+        )
+
+    def get_hot_queries(self):
+        """
+        Returns (name, queryset) pairs mirroring the application's access patterns.
+        """
+        today = timezone.now().date()
+        owner_id = (
+            Shipment.objects.filter(created_by__isnull=False)
+            .values_list('created_by_id', flat=True)
+            .first()
+        ) or 0
+
+        return [
+            ("List page (all shipments, -id)",
+             Shipment.objects.order_by('-id')[:51]),
+            ("List page (own shipments, -id)",
+             Shipment.objects.filter(created_by_id=owner_id).order_by('-id')[:51]),
+            ("API list (-dispatch_date, -id)",
+             Shipment.objects.order_by('-dispatch_date', '-id')[:51]),
+            ("Search (invoice/applicant prefix)",
+             Shipment.objects.filter(
+                 Q(invoice_no__istartswith='INV') | Q(applicant__istartswith='INV')
+             ).order_by('-id')[:51]),
+            ("Unsettled shipments",
+             Shipment.objects.filter(settlement_date__isnull=True)),
+            ("Settled in the last 30 days",
+             Shipment.objects.filter(settlement_date__gte=today - timedelta(days=30))),
+            ("ETA range",
+             Shipment.objects.filter(eta_date__range=(today - timedelta(days=30), today))),
+            ("Admin filter (bank + currency)",
+             Shipment.objects.filter(bank_name='Nabil', currency='$')),
+        ]
+
+    def explain(self, queryset):
+        """Returns the raw EXPLAIN output for the current database vendor."""
+        if connection.vendor == 'mysql':
+            return queryset.explain(format='json')
+        return queryset.explain()
+
+    def is_full_scan(self, plan):
+        """
+        Returns True if the plan reads the whole table without an index.
+        SQLite also reports a walk in primary key order as "SCAN <table>",
+        so '-id' queries show up as full scans there but not on MySQL.
+        """
+        vendor = connection.vendor
+
+        if vendor == 'mysql':
+            return self._mysql_has_full_scan(json.loads(plan))
+        if vendor == 'postgresql':
+            return 'Seq Scan' in plan
+        if vendor == 'sqlite':
+            return any(SQLITE_FULL_SCAN.search(line) for line in plan.splitlines())
+
+        raise CommandError(f"Unsupported database vendor: {vendor}")
+
+    def _mysql_has_full_scan(self, node):
+        """Walks MySQL's JSON plan looking for access_type 'ALL'."""
+        if isinstance(node, dict):
+            if node.get('access_type') == 'ALL':
+                return True
+            return any(self._mysql_has_full_scan(value) for value in node.values())
+        if isinstance(node, list):
+            return any(self._mysql_has_full_scan(item) for item in node)
+        return False
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+        full_scans = []
+
+        self.stdout.write(f"Database vendor: {connection.vendor}\n")
+
+        for name, queryset in self.get_hot_queries():
+            plan = self.explain(queryset)
+
+            if self.is_full_scan(plan):
+                full_scans.append(name)
+                self.stdout.write(self.style.ERROR(f"FULL SCAN  {name}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"INDEXED    {name}"))
+
+            if verbosity >= 2:
+                self.stdout.write(f"{plan}\n")
+
+        if full_scans:
+            logger.warning(f"Hot queries doing full table scans: {', '.join(full_scans)}")
+            message = f"{len(full_scans)} hot quer{'y' if len(full_scans) == 1 else 'ies'} did a full table scan."
+            if options['fail_on_scan']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("All hot queries use an index."))
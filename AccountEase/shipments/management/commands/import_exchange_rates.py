@@ -0,0 +1,97 @@
+import logging
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+
+from shipments.currency import invalidate_rates
+from shipments.importers import ShipmentRowParser, iter_rows, normalize_header
+from shipments.models import BASE_CURRENCY, ExchangeRate, invalidate_reports
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('date', 'currency', 'rate')
+
+
+class Command(BaseCommand):
+    """
+    Imports NPR exchange rates from a CSV or XLSX file with the columns
+    date, currency and rate (NPR per unit of the currency). Currencies may
+    be given as the stored symbol or the label (USD, INR).
+
+    Runs offline, e.g. from cron with the central bank's published rates.
+    Rows for a (currency, date) that already exists replace its rate, so a
+    file can be imported again safely. Invalid rows are reported and skipped.
+    """
+    help = "Import exchange rates (NPR per unit) from a CSV or XLSX file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or XLSX file with the columns date, currency, rate.")
+        parser.add_argument('--sheet', help="XLSX worksheet name (default: the active sheet).")
+
+    def handle(self, *args, **options):
+        currencies = ShipmentRowParser._choice_lookup(ExchangeRate._meta.get_field('currency').choices)
+        rate_field = ExchangeRate._meta.get_field('rate')
+
+        try:
+            rows = iter_rows(options['path'], options['sheet'])
+            header = [normalize_header(heading) for heading in next(rows, None) or []]
+            missing = [column for column in COLUMNS if column not in header]
+            if missing:
+                raise CommandError(f"Missing required columns: {', '.join(missing)}")
+            indexes = [header.index(column) for column in COLUMNS]
+
+            started = time.perf_counter()
+            rates = {}
+            invalid = 0
+            for row_number, row in enumerate(rows, start=2):
+                if not any(cell not in (None, '') for cell in row):
+                    continue
+                raw_date, raw_currency, raw_rate = (row[index] if index < len(row) else None for index in indexes)
+                try:
+                    on_date = ShipmentRowParser._to_date(raw_date)
+                    currency = currencies.get(str(raw_currency or '').strip().lower())
+                    if currency is None:
+                        raise ValidationError(f"'{raw_currency}' is not a valid currency.")
+                    if currency == BASE_CURRENCY:
+                        raise ValidationError("NPR is the base currency; its rate is always 1.")
+                    rate = ShipmentRowParser._to_decimal(raw_rate, rate_field)
+                    if rate <= 0:
+                        raise ValidationError("The rate must be positive.")
+                except ValidationError as exc:
+                    invalid += 1
+                    self.stderr.write(f"Row {row_number}: {exc.messages[0]}")
+                    continue
+                # A later row for the same day wins.
+                rates[currency, on_date] = rate
+        except (OSError, ImportError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        objects = [ExchangeRate(currency=currency, date=day, rate=rate) for (currency, day), rate in rates.items()]
+        conflict_target = {}
+        if connection.features.supports_update_conflicts_with_target:
+            # MySQL's ON DUPLICATE KEY UPDATE takes no target; it uses the unique key.
+            conflict_target['unique_fields'] = ['currency', 'date']
+
+        try:
+            with transaction.atomic():
+                ExchangeRate.objects.bulk_create(
+                    objects,
+                    batch_size=1000,
+                    update_conflicts=True,
+                    update_fields=['rate'],
+                    **conflict_target,
+                )
+        except DatabaseError as exc:
+            logger.error(f"Exchange rate import failed | File={options['path']}", exc_info=True)
+            raise CommandError(f"Nothing was imported ({exc}).")
+
+        # bulk_create sends no signals.
+        invalidate_rates()
+        invalidate_reports()
+
+        elapsed = time.perf_counter() - started
+        summary = f"Imported {len(objects)} rates ({invalid} invalid rows) in {elapsed:.1f}s."
+        logger.info(f"Exchange rate import finished | File={options['path']} | {summary}")
+        self.stdout.write(self.style.SUCCESS(summary))
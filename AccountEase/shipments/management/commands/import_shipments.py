@@ -0,0 +1,151 @@
+import logging
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
+
+from shipments.importers import RowError, ShipmentRowParser, iter_rows
+from shipments.models import Shipment
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Imports historical shipments from a CSV or XLSX file.
+
+    The file is streamed and written in batches (one bulk_create and one
+    transaction per batch), so memory use stays flat however large it is.
+    Invalid rows and rows whose invoice number already exists are reported
+    and skipped. After each batch the last committed row is printed; pass
+    it + 1 as --start-row to resume an interrupted import.
+    """
+    help = "Import shipments from a CSV or XLSX file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or XLSX file; the first row holds the column names.")
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Rows per bulk_create / transaction (default: 1000).",
+        )
+        parser.add_argument(
+            '--start-row',
+            type=int,
+            default=2,
+            help="File row to start at, counting the header as row 1 (default: 2).",
+        )
+        parser.add_argument(
+            '--sheet',
+            help="XLSX worksheet name (default: the active sheet).",
+        )
+        parser.add_argument(
+            '--created-by',
+            help="Username recorded as the creator of the imported shipments.",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help=(
+                "Parse and validate every row without writing; reports rows per second. "
+                "Duplicates are only detected against the database and within a batch."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        start_row = max(options['start_row'], 2)
+        dry_run = options['dry_run']
+
+        created_by = None
+        if options['created_by']:
+            try:
+                created_by = User.objects.get(username=options['created_by'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['created_by']}' does not exist.")
+
+        try:
+            rows = iter_rows(options['path'], options['sheet'])
+            header = next(rows, None)
+            if header is None:
+                raise CommandError("The file is empty.")
+            parser = ShipmentRowParser(header, created_by=created_by)
+        except (OSError, ImportError, KeyError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        self.stats = {'read': 0, 'imported': 0, 'invalid': 0, 'duplicate': 0}
+        started = time.perf_counter()
+        batch = []
+        row_number = 1
+
+        for row_number, row in enumerate(rows, start=2):
+            if row_number < start_row:
+                continue
+            if not any(cell not in (None, '') for cell in row):
+                continue
+
+            self.stats['read'] += 1
+            try:
+                batch.append((row_number, parser.parse(row)))
+            except RowError as exc:
+                self.stats['invalid'] += 1
+                self._report(row_number, exc.args[0])
+
+            if len(batch) >= batch_size:
+                self._flush(batch, dry_run, row_number)
+                batch = []
+
+        self._flush(batch, dry_run, row_number)
+
+        elapsed = time.perf_counter() - started
+        rate = self.stats['read'] / elapsed if elapsed else 0
+        summary = (
+            f"{'Checked' if dry_run else 'Imported'} "
+            f"{self.stats['imported']} of {self.stats['read']} rows "
+            f"({self.stats['invalid']} invalid, {self.stats['duplicate']} duplicates) "
+            f"in {elapsed:.1f}s, {rate:,.0f} rows/s."
+        )
+        logger.info(f"Shipment import finished | File={options['path']} | DryRun={dry_run} | {summary}")
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    def _flush(self, batch, dry_run, last_row):
+        """
+        Drops rows whose invoice number is already taken (in the database or
+        earlier in the batch), then writes the rest in one transaction.
+        """
+        if batch:
+            invoices = [shipment.invoice_no for _, shipment in batch]
+            taken = set(Shipment.objects.filter(invoice_no__in=invoices).values_list('invoice_no', flat=True))
+
+            new = []
+            for row_number, shipment in batch:
+                if shipment.invoice_no in taken:
+                    self.stats['duplicate'] += 1
+                    self._report(row_number, {'invoice_no': f"'{shipment.invoice_no}' already exists."})
+                    continue
+                taken.add(shipment.invoice_no)
+                new.append(shipment)
+
+            if not dry_run:
+                try:
+                    with transaction.atomic():
+                        Shipment.objects.bulk_create(new)
+                except DatabaseError as exc:
+                    logger.error(f"Shipment import batch failed | Rows={batch[0][0]}-{last_row}", exc_info=True)
+                    raise CommandError(
+                        f"Batch ending at row {last_row} failed ({exc}). "
+                        f"Nothing after row {batch[0][0] - 1} was written; "
+                        f"fix the file and rerun with --start-row {batch[0][0]}."
+                    )
+            self.stats['imported'] += len(new)
+
+        if not dry_run and self.stats['read']:
+            self.stdout.write(f"Committed through row {last_row} ({self.stats['imported']} imported).")
+
+    def _report(self, row_number, errors):
+        details = "; ".join(f"{field}: {message}" for field, message in errors.items())
+        self.stderr.write(f"Row {row_number}: {details}")
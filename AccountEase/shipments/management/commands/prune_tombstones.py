@@ -0,0 +1,26 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from shipments.models import ShipmentTombstone
+from shipments.sync import tombstone_horizon
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Deletes shipment tombstones older than SHIPMENT_TOMBSTONE_RETENTION_DAYS.
+    The sync API answers tokens older than that with a full resync, so the
+    pruned tombstones are never needed again. Run it daily (cron).
+    """
+    help = "Delete sync tombstones older than the retention period."
+
+    def handle(self, *args, **options):
+        horizon = tombstone_horizon()
+        deleted, _ = ShipmentTombstone.objects.filter(deleted_at__lt=horizon).delete()
+
+        logger.info(f"Tombstones pruned | Deleted={deleted} | Before={horizon.isoformat()}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} tombstones older than {horizon:%Y-%m-%d %H:%M}."
+        ))
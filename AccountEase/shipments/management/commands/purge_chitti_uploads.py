@@ -0,0 +1,26 @@
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from shipments.uploads import purge_uploads
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Deletes chunked chitti uploads untouched for CHITTI_UPLOAD_EXPIRY_HOURS
+    (abandoned or never claimed by a shipment form) with their part files,
+    and part files whose upload no longer exists. Run it daily (cron).
+    """
+    help = "Delete expired chitti uploads and their part files."
+
+    def handle(self, *args, **options):
+        deleted, removed = purge_uploads()
+
+        logger.info(f"Chitti uploads purged | Deleted={deleted} | OrphanParts={removed}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} uploads older than {settings.CHITTI_UPLOAD_EXPIRY_HOURS}h "
+            f"and {removed} orphaned part files."
+        ))
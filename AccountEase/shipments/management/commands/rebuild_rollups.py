@@ -0,0 +1,29 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from shipments.models import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the SettlementRollup and ClientBalance tables from the shipment table.
+    They are maintained incrementally on every write; run this after
+    loading fixtures or raw SQL changes, or if the figures are ever in doubt.
+    Each table's delete and re-insert happen in one transaction, so the
+    Reports and Clients pages never see a half-built table.
+    """
+    help = "Recompute the settlement rollups and client balances behind the Reports and Clients pages."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rollups, balances = rebuild_rollups()
+        elapsed = time.perf_counter() - started
+
+        logger.info(f"Rollups rebuilt | Rollups={rollups} | ClientBalances={balances} | Seconds={elapsed:.2f}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {rollups} rollup rows and {balances} client balances in {elapsed:.1f}s."
+        ))
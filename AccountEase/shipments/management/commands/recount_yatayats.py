@@ -0,0 +1,54 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from shipments.models import Shipment
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Recomputes Shipment.yatayat_count / chitti_count from the yatayat table.
+    Walks the shipments in primary key batches, each in its own transaction,
+    and only writes rows whose stored counts drifted.
+    """
+    help = "Repair the denormalized yatayat and chitti counts on Shipment."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Number of shipments to recount per transaction (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        checked = 0
+        corrected = 0
+
+        while True:
+            ids = list(
+                Shipment.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            with transaction.atomic():
+                corrected += Shipment.objects.filter(pk__in=ids).select_for_update().recount_yatayats()
+
+            checked += len(ids)
+            last_id = ids[-1]
+
+            if options['verbosity'] >= 2:
+                self.stdout.write(f"Checked {checked} shipments (up to ID {last_id})")
+
+        logger.info(f"Yatayat recount finished | Checked={checked} | Corrected={corrected}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {checked} shipments, corrected {corrected}."
+        ))
@@ -0,0 +1,69 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from shipments.models import ChittiPreview
+from shipments.previews import render_pending, require_poppler
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    The chitti preview worker: renders the first-page thumbnail and page
+    count of every pending ChittiPreview (see shipments.previews), so the
+    request that stored the file never waits for it.
+    Without --loop it drains the queue and exits (cron); with --loop it
+    keeps polling every --interval seconds (run it as a service). Several
+    workers may run at once.
+    """
+    help = "Render pending chitti thumbnails and page counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help="Keep polling for new previews instead of exiting when the queue is empty.",
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help="Seconds between polls with --loop (default: 5).",
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help="Queue the previews that failed again before starting.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            require_poppler()
+        except ImportError as e:
+            raise CommandError(str(e))
+
+        if options['retry_failed']:
+            retried = ChittiPreview.objects.filter(status=ChittiPreview.Status.FAILED).update(
+                status=ChittiPreview.Status.PENDING, attempts=0
+            )
+            self.stdout.write(f"Queued {retried} failed previews again.")
+        queued = ChittiPreview.objects.queue_missing()
+        if queued:
+            self.stdout.write(f"Queued {queued} files without a preview.")
+
+        while True:
+            started = time.perf_counter()
+            counts = render_pending()
+            if counts:
+                summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+                logger.info(f"Chitti previews rendered | {summary} | Elapsed={time.perf_counter() - started:.1f}s")
+                self.stdout.write(self.style.SUCCESS(f"Previews: {summary}."))
+            elif not options['loop']:
+                self.stdout.write("No pending previews.")
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipments', '0003_alter_shipment_amount_alter_shipment_margin_amount'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['applicant'], name='shipment_applicant_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipments', '0004_shipment_applicant_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['created_by', '-id'], name='shipment_owner_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['-dispatch_date', '-id'], name='shipment_dispatch_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['settlement_date'], name='shipment_settlement_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['eta_date'], name='shipment_eta_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['bank_name', 'currency'], name='shipment_bank_currency_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:43
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+BATCH_SIZE = 1000
+
+
+def backfill_yatayat_counts(apps, schema_editor):
+    """
+    Populates the new count columns in primary key batches so large tables
+    are never loaded into memory at once.
+    """
+    Shipment = apps.get_model('shipments', 'Shipment')
+    ShipmentYatayat = apps.get_model('shipments', 'ShipmentYatayat')
+    has_chitti = Q(chitti_file__isnull=False) & ~Q(chitti_file='')
+
+    last_id = 0
+    while True:
+        ids = list(
+            Shipment.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:BATCH_SIZE]
+        )
+        if not ids:
+            break
+
+        counts = {
+            row['shipment_id']: row
+            for row in ShipmentYatayat.objects
+            .filter(shipment_id__in=ids)
+            .values('shipment_id')
+            .annotate(total=Count('id'), chittis=Count('id', filter=has_chitti))
+            .order_by()
+        }
+        shipments = [
+            Shipment(
+                pk=pk,
+                yatayat_count=counts[pk]['total'],
+                chitti_count=counts[pk]['chittis'],
+            )
+            for pk in ids if pk in counts
+        ]
+        Shipment.objects.bulk_update(shipments, ['yatayat_count', 'chitti_count'])
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipments', '0005_shipment_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipment',
+            name='chitti_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='yatayat_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_yatayat_counts, migrations.RunPython.noop),
+    ]
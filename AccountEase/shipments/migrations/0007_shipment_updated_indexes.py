@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipments', '0006_shipment_yatayat_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['created_by', 'updated_at'], name='shipment_owner_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['updated_at'], name='shipment_updated_idx'),
+        ),
+    ]
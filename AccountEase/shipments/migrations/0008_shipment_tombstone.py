@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:50
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipments', '0007_shipment_updated_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShipmentTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shipment_id', models.BigIntegerField()),
+                ('invoice_no', models.CharField(max_length=20)),
+                ('deleted_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Shipment Tombstone',
+                'verbose_name_plural': 'Shipment Tombstones',
+                'ordering': ['deleted_at'],
+            },
+        ),
+    ]
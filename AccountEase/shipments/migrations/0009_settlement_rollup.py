@@ -0,0 +1,69 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:02
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    """Aggregates the existing shipments with one GROUP BY (same as SettlementRollup.objects.rebuild())."""
+    Shipment = apps.get_model('shipments', 'Shipment')
+    SettlementRollup = apps.get_model('shipments', 'SettlementRollup')
+    settled = Q(settlement_date__isnull=False)
+    zero = Value(Decimal(0))
+
+    rows = (
+        Shipment.objects
+        .values(
+            'bank_name', 'currency', 'payment_terms',
+            month=TruncMonth('dispatch_date'),
+            rollup_vanshar=Coalesce('vanshar', Value('')),
+        )
+        .annotate(
+            shipment_count=Count('id'),
+            total_amount=Coalesce(Sum('amount'), zero),
+            settled_count=Count('id', filter=settled),
+            settled_amount=Coalesce(Sum('amount', filter=settled), zero),
+            margin_total=Coalesce(Sum('margin_amount'), zero),
+        )
+        .order_by()
+    )
+    SettlementRollup.objects.bulk_create(
+        [SettlementRollup(vanshar=row.pop('rollup_vanshar'), **row) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipments', '0008_shipment_tombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SettlementRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the dispatch month.')),
+                ('bank_name', models.CharField(choices=[('Nabil', 'Nabil Bank'), ('NIC', 'NIC Asia Bank'), ('SBI', 'Nepal SBI Bank'), ('Global', 'Global IME Bank'), ('Prabhu', 'Prabhu Bank'), ('Machha', 'Machhapuchhre Bank'), ('Sanima', 'Sanima Bank'), ('Mega', 'Mega Bank'), ('Kumari', 'Kumari Bank'), ('N/A', 'N/A')], max_length=20)),
+                ('currency', models.CharField(choices=[('$', 'USD'), ('₹', 'INR'), ('रु ', 'NPR')], max_length=5)),
+                ('payment_terms', models.CharField(choices=[('CFR', 'CFR'), ('CIF', 'CIF'), ('FOB', 'FOB'), ('EXW', 'EXW'), ('N/A', 'N/A')], max_length=10)),
+                ('vanshar', models.CharField(choices=[('Mechi', 'Mechi'), ('Birgunj', 'Birgunj'), ('Biratnagar', 'Biratnagar'), ('Tatopani', 'Tatopani'), ('TIA', 'Tribhuvan International Airport'), ('N/A', 'N/A')], max_length=50, blank=True)),
+                ('shipment_count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('settled_count', models.IntegerField(default=0)),
+                ('settled_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('margin_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+            options={
+                'verbose_name': 'Settlement Rollup',
+                'verbose_name_plural': 'Settlement Rollups',
+                'ordering': ['-month'],
+                'constraints': [models.UniqueConstraint(fields=('month', 'bank_name', 'currency', 'payment_terms', 'vanshar'), name='settlement_rollup_key')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:08
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipments', '0009_settlement_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('currency', models.CharField(choices=[('$', 'USD'), ('₹', 'INR'), ('रु ', 'NPR')], max_length=5)),
+                ('rate', models.DecimalField(decimal_places=6, max_digits=14, validators=[django.core.validators.MinValueValidator(0)])),
+            ],
+            options={
+                'verbose_name': 'Exchange Rate',
+                'verbose_name_plural': 'Exchange Rates',
+                'ordering': ['-date', 'currency'],
+                'constraints': [models.UniqueConstraint(fields=('currency', 'date'), name='exchange_rate_currency_date')],
+            },
+        ),
+    ]
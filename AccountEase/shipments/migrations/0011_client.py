@@ -0,0 +1,137 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:14
+
+import re
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 500
+
+
+def normalize_client_name(name):
+    """Copy of shipments.models.normalize_client_name as of this migration."""
+    words = re.findall(r'\w+', re.sub(r"['’]", '', str(name or '').casefold()))
+    # Initials ('A.B.C.', 'A B C') become one word.
+    merged = []
+    for word, previous in zip(words, [''] + words):
+        if len(word) == 1 and len(previous) == 1:
+            merged[-1] += word
+        else:
+            merged.append(word)
+    return ' '.join(merged)
+
+
+def link_clients(apps, schema_editor):
+    """
+    Creates one client per distinct normalized applicant, named after its
+    most used spelling, and links the shipments. Distinct spellings come
+    from one GROUP BY on the applicant index; clients are created and
+    shipments updated BATCH_SIZE clients at a time, one transaction per
+    batch. Batches already done are skipped if the migration is rerun.
+    """
+    Shipment = apps.get_model('shipments', 'Shipment')
+    Client = apps.get_model('shipments', 'Client')
+    ClientAlias = apps.get_model('shipments', 'ClientAlias')
+    ClientBalance = apps.get_model('shipments', 'ClientBalance')
+
+    spellings = defaultdict(Counter)
+    for row in Shipment.objects.values('applicant').annotate(uses=Count('id')).order_by():
+        key = normalize_client_name(row['applicant'])
+        if key:
+            spellings[key][row['applicant']] += row['uses']
+
+    keys = sorted(spellings)
+    for start in range(0, len(keys), BATCH_SIZE):
+        batch = keys[start:start + BATCH_SIZE]
+        done = set(ClientAlias.objects.filter(normalized_name__in=batch).values_list('normalized_name', flat=True))
+        with transaction.atomic():
+            for key in batch:
+                if key in done:
+                    continue
+                name = spellings[key].most_common(1)[0][0].strip()
+                client = Client.objects.create(name=name[:100])
+                ClientAlias.objects.create(client=client, normalized_name=key[:100])
+                Shipment.objects.filter(applicant__in=list(spellings[key])).update(client=client)
+
+    # Balances: one GROUP BY (same as ClientBalance.objects.rebuild()).
+    open_shipments = Q(settlement_date__isnull=True)
+    rows = (
+        Shipment.objects
+        .filter(client__isnull=False)
+        .values('client_id', 'currency')
+        .annotate(
+            shipment_count=Count('id'),
+            open_count=Count('id', filter=open_shipments),
+            outstanding_amount=Coalesce(Sum('amount', filter=open_shipments), Value(Decimal(0))),
+        )
+        .order_by()
+    )
+    with transaction.atomic():
+        ClientBalance.objects.all().delete()
+        ClientBalance.objects.bulk_create([ClientBalance(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    # link_clients commits per batch.
+    atomic = False
+
+    dependencies = [
+        ('shipments', '0010_exchange_rate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Client',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Client',
+                'verbose_name_plural': 'Clients',
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['name'], name='client_name_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='client',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='shipments', to='shipments.client'),
+        ),
+        migrations.CreateModel(
+            name='ClientAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('normalized_name', models.CharField(max_length=100, unique=True)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='shipments.client')),
+            ],
+            options={
+                'verbose_name': 'Client Alias',
+                'verbose_name_plural': 'Client Aliases',
+                'ordering': ['normalized_name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ClientBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(choices=[('$', 'USD'), ('₹', 'INR'), ('रु ', 'NPR')], max_length=5)),
+                ('shipment_count', models.IntegerField(default=0)),
+                ('open_count', models.IntegerField(default=0)),
+                ('outstanding_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='shipments.client')),
+            ],
+            options={
+                'verbose_name': 'Client Balance',
+                'verbose_name_plural': 'Client Balances',
+                'ordering': ['client', 'currency'],
+                'constraints': [models.UniqueConstraint(fields=('client', 'currency'), name='client_balance_key')],
+            },
+        ),
+        migrations.RunPython(link_clients, migrations.RunPython.noop),
+    ]
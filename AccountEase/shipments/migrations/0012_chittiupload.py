@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:23
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipments', '0011_client'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChittiUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('yatayat', models.CharField(blank=True, choices=[('Mechi', 'Mechi'), ('Koshi', 'Koshi'), ('Sagarmatha', 'Sagarmatha'), ('Janakpur', 'Janakpur'), ('Bagmati', 'Bagmati'), ('Narayani', 'Narayani'), ('Gandaki', 'Gandaki'), ('Dhaulagiri', 'Dhaulagiri'), ('Lumbini', 'Lumbini'), ('Rapti', 'Rapti'), ('Bheri', 'Bheri'), ('Karnali', 'Karnali'), ('Seti', 'Seti'), ('Mahakali', 'Mahakali'), ('N/A', 'N/A')], max_length=50, null=True)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField()),
+                ('offset', models.PositiveBigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('uploading', 'Uploading'), ('complete', 'Complete'), ('attached', 'Attached')], default='uploading', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('attached_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='shipments.shipmentyatayat')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chitti_uploads', to=settings.AUTH_USER_MODEL)),
+                ('shipment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='chitti_uploads', to='shipments.shipment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='chitti_upload_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:28
+
+import shipments.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipments', '0012_chittiupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChittiBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('size', models.PositiveBigIntegerField()),
+                ('ref_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='shipmentyatayat',
+            name='original_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='shipmentyatayat',
+            name='chitti_file',
+            field=shipments.storage.ChittiFileField(blank=True, db_index=True, null=True, storage=shipments.storage.ContentAddressedStorage(), upload_to='chittis/'),
+        ),
+    ]
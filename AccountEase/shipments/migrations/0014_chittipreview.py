@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:32
+
+import django.db.models.deletion
+import shipments.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipments', '0013_chittiblob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChittiPreview',
+            fields=[
+                ('blob', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='preview', serialize=False, to='shipments.chittiblob')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('thumbnail', models.FileField(blank=True, upload_to=shipments.models.preview_upload_to)),
+                ('page_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.CharField(blank=True, default='', max_length=255)),
+                ('queued_at', models.DateTimeField(auto_now_add=True)),
+                ('rendered_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'queued_at'], name='chitti_preview_queue_idx')],
+            },
+        ),
+    ]
@@ -1,7 +1,21 @@
-from django.db import models
+import os
+import re
+import uuid
+from collections import defaultdict
+
+from decimal import Decimal
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.utils import timezone
 from django.core.validators import MinValueValidator
+from django.urls import reverse
+
+from .roles import get_roles
+from .storage import ChittiFileField, ContentAddressedStorage
 import logging
 
 logger = logging.getLogger(__name__)
@@ -56,6 +70,9 @@ CURRENCY_CHOICES = [
     ('रु ', 'NPR'),
 ]
 
+# Reports convert every amount to NPR (note the stored code's trailing space).
+BASE_CURRENCY = 'रु '
+
 VANSHAR_CHOICES = [
     ('Mechi', 'Mechi'),
     ('Birgunj', 'Birgunj'),
@@ -84,6 +101,256 @@ YATAYAT_CHOICES = [
 ]
 
 
+# A yatayat "has a chitti" when a non-empty file name is stored.
+HAS_CHITTI = Q(chitti_file__isnull=False) & ~Q(chitti_file='')
+
+
+# --------------------------
+# Settlement Rollup Helpers
+# --------------------------
+# A shipment counts towards the SettlementRollup row of its dispatch month
+# and these dimensions, and towards its client's ClientBalance row.
+ROLLUP_DIMENSIONS = ('bank_name', 'currency', 'payment_terms', 'vanshar')
+ROLLUP_SOURCE_FIELDS = ('dispatch_date', 'amount', 'settlement_date', 'margin_amount', 'client_id') + ROLLUP_DIMENSIONS
+ROLLUP_MEASURES = ('shipment_count', 'total_amount', 'settled_count', 'settled_amount', 'margin_total')
+
+# Names under which a save(update_fields=...) / update(...) may touch them.
+ROLLUP_UPDATE_FIELDS = frozenset(ROLLUP_SOURCE_FIELDS) | {'client'}
+
+
+def rollup_contribution(row):
+    """
+    (key, measures) a shipment adds to the rollups, from a dict of its
+    ROLLUP_SOURCE_FIELDS; key is (month, bank_name, currency, payment_terms, vanshar).
+    A missing vanshar is stored as '' so the unique key also covers it.
+    """
+    key = (row['dispatch_date'].replace(day=1),) + tuple(row[field] or '' for field in ROLLUP_DIMENSIONS)
+    amount = row['amount'] or 0
+    settled = row['settlement_date'] is not None
+    return key, (1, amount, int(settled), amount if settled else 0, row['margin_amount'] or 0)
+
+
+def rollup_deltas(old_rows=(), new_rows=()):
+    """
+    {key: measures} to apply when `old_rows` are replaced by `new_rows`
+    (either may be empty: creates and deletes). Keys that cancel out are dropped.
+    """
+    deltas = defaultdict(lambda: [0] * len(ROLLUP_MEASURES))
+    for rows, sign in ((old_rows, -1), (new_rows, 1)):
+        for row in rows:
+            key, measures = rollup_contribution(row)
+            total = deltas[key]
+            for position, value in enumerate(measures):
+                total[position] += sign * value
+    return {key: tuple(total) for key, total in deltas.items() if any(total)}
+
+
+def rollup_row(instance):
+    """
+    The instance's ROLLUP_SOURCE_FIELDS, converted like the database would
+    return them: Shipment.objects.create(dispatch_date='2026-02-03', amount='50')
+    is valid and must yield a date and a Decimal.
+    """
+    return {
+        field: instance._meta.get_field(field).to_python(getattr(instance, field))
+        for field in ROLLUP_SOURCE_FIELDS
+    }
+
+
+def apply_rollup_deltas(old_rows=(), new_rows=()):
+    """Moves shipments' contributions in SettlementRollup and ClientBalance (see rollup_deltas)."""
+    old_rows, new_rows = list(old_rows), list(new_rows)
+    SettlementRollup.objects.apply_deltas(rollup_deltas(old_rows, new_rows))
+    ClientBalance.objects.apply_deltas(client_balance_deltas(old_rows, new_rows))
+
+
+def rebuild_rollups():
+    """Recomputes SettlementRollup and ClientBalance from the shipment table."""
+    return SettlementRollup.objects.rebuild(), ClientBalance.objects.rebuild()
+
+
+# --------------------------
+# Client Helpers
+# --------------------------
+CLIENT_BALANCE_MEASURES = ('shipment_count', 'open_count', 'outstanding_amount')
+
+
+def normalize_client_name(name):
+    """
+    The key applicant spellings are matched on: case, punctuation and spacing
+    are ignored ('A.B.C. Traders ' and 'abc  traders' are the same client).
+    """
+    words = re.findall(r'\w+', re.sub(r"['’]", '', str(name or '').casefold()))
+    # Initials ('A.B.C.', 'A B C') become one word.
+    merged = []
+    for word, previous in zip(words, [''] + words):
+        if len(word) == 1 and len(previous) == 1:
+            merged[-1] += word
+        else:
+            merged.append(word)
+    return ' '.join(merged)
+
+
+def client_balance_deltas(old_rows=(), new_rows=()):
+    """
+    {(client_id, currency): measures} to apply when `old_rows` are replaced by
+    `new_rows` (dicts of ROLLUP_SOURCE_FIELDS). A shipment is open, and its
+    amount outstanding, until it has a settlement date.
+    """
+    deltas = defaultdict(lambda: [0] * len(CLIENT_BALANCE_MEASURES))
+    for rows, sign in ((old_rows, -1), (new_rows, 1)):
+        for row in rows:
+            if row['client_id'] is None:
+                continue
+            total = deltas[row['client_id'], row['currency']]
+            if row['settlement_date'] is None:
+                measures = (1, 1, row['amount'] or 0)
+            else:
+                measures = (1, 0, 0)
+            for position, value in enumerate(measures):
+                total[position] += sign * value
+    return {key: tuple(total) for key, total in deltas.items() if any(total)}
+
+
+# --------------------------
+# Report Cache Generation
+# --------------------------
+# Part of every cached report's key (shipments.reports); replaced whenever
+# shipment data changes, which invalidates all of them at once.
+REPORTS_GENERATION_KEY = 'reports:generation'
+
+
+def invalidate_reports(using=None):
+    """
+    Marks the cached reports stale once the current transaction commits, so a
+    report recomputed meanwhile can't be cached under the new generation
+    with the old data.
+    """
+    transaction.on_commit(lambda: cache.set(REPORTS_GENERATION_KEY, uuid.uuid4().hex, None), using=using)
+
+
+# --------------------------
+# Shipment QuerySet
+# --------------------------
+def sees_all_shipments(user):
+    """Staff and holders of view_shipment see every shipment; other users only their own."""
+    return user.is_staff or get_roles(user).has_perm('shipments.view_shipment')
+
+
+class ShipmentQuerySet(models.QuerySet):
+    """
+    Maintains the denormalized 'yatayat_count' / 'chitti_count' columns, and
+    keeps the client links, the rollups (SettlementRollup, ClientBalance)
+    and the report cache in step for bulk_create / bulk_update / update,
+    which bypass Shipment.save() and the save signals.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            Client.objects.using(self.db).assign(objs)
+            objs = super().bulk_create(objs, *args, **kwargs)
+            if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+                # Not every object was necessarily inserted.
+                rebuild_rollups()
+            else:
+                apply_rollup_deltas(new_rows=[rollup_row(obj) for obj in objs])
+                for obj in objs:
+                    obj._rollup_row = rollup_row(obj)
+            invalidate_reports(using=self.db)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        # The rollups are updated by update(), which bulk_update() calls per batch.
+        objs = list(objs)
+        fields = list(fields)
+        if 'applicant' in fields and 'client' not in fields:
+            Client.objects.using(self.db).assign(objs)
+            fields.append('client')
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if ROLLUP_UPDATE_FIELDS & set(fields):
+            for obj in objs:
+                if hasattr(obj, '_rollup_row'):
+                    obj._rollup_row = rollup_row(obj)
+        return rows
+
+    def update(self, **kwargs):
+        if isinstance(kwargs.get('applicant'), str) and not kwargs.keys() & {'client', 'client_id'}:
+            # A plain value; bulk_update() passes expressions and assigns clients itself.
+            kwargs['client_id'] = Client.objects.using(self.db).resolve([kwargs['applicant']]).get(
+                normalize_client_name(kwargs['applicant'])
+            )
+        if kwargs.keys() - {'updated_at', *Shipment.COUNT_FIELDS}:
+            invalidate_reports(using=self.db)
+        if not ROLLUP_UPDATE_FIELDS & kwargs.keys():
+            return super().update(**kwargs)
+
+        with transaction.atomic(using=self.db):
+            old_rows = list(self.select_for_update().values('id', *ROLLUP_SOURCE_FIELDS))
+            rows = super().update(**kwargs)
+            new_rows = self.model._base_manager.using(self.db).filter(
+                pk__in=[row['id'] for row in old_rows]
+            ).values(*ROLLUP_SOURCE_FIELDS)
+            apply_rollup_deltas(old_rows, new_rows)
+        return rows
+
+    def visible_to(self, user):
+        """Shipments `user` may see: all for staff and holders of view_shipment, else their own."""
+        if sees_all_shipments(user):
+            return self
+        return self.filter(created_by=user)
+
+    def record_yatayat_changes(self, deltas):
+        """
+        Applies count changes caused by yatayat writes and touches 'updated_at'.
+        deltas: {shipment_id: (yatayat_delta, chitti_delta)}
+        Uses F() expressions so concurrent writers never lose an increment.
+        Shipments with the same delta share one UPDATE (bulk writes usually
+        add the same number of yatayats to many shipments).
+        """
+        now = timezone.now()
+        by_delta = defaultdict(list)
+        for shipment_id, delta in deltas.items():
+            if shipment_id is not None:
+                by_delta[delta].append(shipment_id)
+
+        for (yatayat_delta, chitti_delta), shipment_ids in by_delta.items():
+            self.filter(pk__in=shipment_ids).update(
+                yatayat_count=F('yatayat_count') + yatayat_delta,
+                chitti_count=F('chitti_count') + chitti_delta,
+                updated_at=now,
+            )
+
+    def recount_yatayats(self):
+        """
+        Recomputes the counts of every shipment in this queryset from the
+        yatayat table and saves the ones that drifted.
+        Returns the number of shipments corrected.
+        """
+        shipments = list(self.only('id', 'yatayat_count', 'chitti_count'))
+        counts = {
+            row['shipment_id']: (row['total'], row['chittis'])
+            for row in ShipmentYatayat.objects
+            .filter(shipment_id__in=[s.pk for s in shipments])
+            .values('shipment_id')
+            .annotate(total=Count('id'), chittis=Count('id', filter=HAS_CHITTI))
+            .order_by()
+        }
+
+        now = timezone.now()
+        drifted = []
+        for shipment in shipments:
+            total, chittis = counts.get(shipment.pk, (0, 0))
+            if (shipment.yatayat_count, shipment.chitti_count) != (total, chittis):
+                shipment.yatayat_count = total
+                shipment.chitti_count = chittis
+                shipment.updated_at = now
+                drifted.append(shipment)
+
+        Shipment.objects.bulk_update(drifted, ['yatayat_count', 'chitti_count', 'updated_at'])
+        return len(drifted)
+
+
 # --------------------------
 # Shipment Model
 # --------------------------
@@ -95,6 +362,11 @@ class Shipment(models.Model):
     applicant = models.CharField(max_length=20)
     invoice_no = models.CharField(max_length=20, unique=True)
 
+    # Resolved from 'applicant' on every write (see Client).
+    client = models.ForeignKey(
+        'Client', on_delete=models.PROTECT, null=True, blank=True, editable=False, related_name='shipments'
+    )
+
     bank_name = models.CharField(max_length=20, choices=BANK_CHOICES)
     bank_ref_no = models.CharField(max_length=20, blank=True, null=True)
 
@@ -137,10 +409,74 @@ class Shipment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized from ShipmentYatayat; kept up to date by shipments.signals
+    # and ShipmentYatayatQuerySet, repaired by 'manage.py recount_yatayats'.
+    yatayat_count = models.PositiveIntegerField(default=0, editable=False)
+    chitti_count = models.PositiveIntegerField(default=0, editable=False)
+
+    COUNT_FIELDS = ('yatayat_count', 'chitti_count')
+
+    objects = ShipmentQuerySet.as_manager()
+
     class Meta:
         ordering = ['-dispatch_date']
         verbose_name = 'Shipment'
         verbose_name_plural = 'Shipments'
+        indexes = [
+            # Prefix search ('q' filter on the shipment list); invoice_no is already unique-indexed.
+            models.Index(fields=['applicant'], name='shipment_applicant_idx'),
+            # "My Shipment Records": filter by owner, keyset-paginated on -id.
+            models.Index(fields=['created_by', '-id'], name='shipment_owner_recent_idx'),
+            # Default ordering and the API ordering (-dispatch_date, -id).
+            models.Index(fields=['-dispatch_date', '-id'], name='shipment_dispatch_recent_idx'),
+            # Settled / unsettled filter and outstanding settlement queries.
+            models.Index(fields=['settlement_date'], name='shipment_settlement_idx'),
+            # ETA range filter.
+            models.Index(fields=['eta_date'], name='shipment_eta_idx'),
+            # Admin list filters by bank and currency.
+            models.Index(fields=['bank_name', 'currency'], name='shipment_bank_currency_idx'),
+            # MAX(updated_at) for the conditional GET validators (shipments.conditional).
+            models.Index(fields=['created_by', 'updated_at'], name='shipment_owner_updated_idx'),
+            models.Index(fields=['updated_at'], name='shipment_updated_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remembers the loaded rollup fields so the signal handlers can move the
+        shipment between SettlementRollup rows without re-reading it.
+        """
+        instance = super().from_db(db, field_names, values)
+        row = dict(zip(field_names, values))
+        if all(field in field_names for field in ROLLUP_SOURCE_FIELDS):
+            instance._rollup_row = {field: row[field] for field in ROLLUP_SOURCE_FIELDS}
+        if 'applicant' in row and 'client_id' in row:
+            instance._loaded_client = (row['applicant'], row['client_id'])
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        On update, writes every field except the denormalized counts, so a
+        stale instance (e.g. loaded by an edit form) can't overwrite them.
+        Links the shipment to the client its applicant names, unless neither
+        changed since it was loaded.
+        Saves inside a transaction so the rollup updates made by the
+        post_save handler commit (or roll back) together with this row.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNT_FIELDS
+            ]
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic(using=kwargs.get('using')):
+            if update_fields is None or 'applicant' in update_fields:
+                if getattr(self, '_loaded_client', None) != (self.applicant, self.client_id):
+                    Client.objects.db_manager(kwargs.get('using')).assign([self])
+                    if update_fields is not None and 'client' not in update_fields:
+                        kwargs['update_fields'] = [*update_fields, 'client']
+            super().save(*args, **kwargs)
+            self._loaded_client = (self.applicant, self.client_id)
 
     def __str__(self):
         """Returns the string representation of the shipment."""
@@ -158,6 +494,78 @@ class Shipment(models.Model):
     amount_display.short_description = "Amount"
 
 
+# --------------------------
+# Shipment Yatayat QuerySet
+# --------------------------
+class ShipmentYatayatQuerySet(models.QuerySet):
+    """
+    Keeps the parent Shipment counts and the ChittiBlob reference counts
+    correct for bulk operations, which bypass the save/delete signals.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+
+            if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+                # Not every object was necessarily inserted; count from the table.
+                shipment_ids = {obj.shipment_id for obj in objs}
+                Shipment.objects.filter(pk__in=shipment_ids).recount_yatayats()
+                ChittiBlob.objects.recount({obj.chitti_file.name for obj in objs if obj.chitti_file})
+                return objs
+
+            references = defaultdict(int)
+            for obj in objs:
+                if obj.chitti_file:
+                    references[obj.chitti_file.name] += 1
+            ChittiBlob.objects.add_references(references)
+
+            deltas = defaultdict(lambda: (0, 0))
+            for obj in objs:
+                yatayats, chittis = deltas[obj.shipment_id]
+                deltas[obj.shipment_id] = (yatayats + 1, chittis + int(obj.has_chitti()))
+            Shipment.objects.record_yatayat_changes(deltas)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            old_rows = list(self.filter(pk__in=[obj.pk for obj in objs]).values_list('shipment_id', 'chitti_file'))
+            old_ids, old_files = {row[0] for row in old_rows}, {row[1] for row in old_rows}
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            self._refresh_parents(
+                old_ids | {obj.shipment_id for obj in objs},
+                recount=bool({'shipment', 'chitti_file'} & set(fields)),
+            )
+            if 'chitti_file' in fields:
+                ChittiBlob.objects.recount(old_files | {obj.chitti_file.name for obj in objs})
+        return rows
+
+    def update(self, **kwargs):
+        with transaction.atomic(using=self.db):
+            old_rows = list(self.values_list('shipment_id', 'chitti_file'))
+            old_ids, old_files = {row[0] for row in old_rows}, {row[1] for row in old_rows}
+            rows = super().update(**kwargs)
+            new_id = kwargs.get('shipment_id') or getattr(kwargs.get('shipment'), 'pk', None)
+            self._refresh_parents(
+                old_ids | {new_id},
+                recount=bool({'shipment', 'shipment_id', 'chitti_file'} & kwargs.keys()),
+            )
+            if 'chitti_file' in kwargs:
+                ChittiBlob.objects.recount(old_files | {str(kwargs['chitti_file'] or '')})
+        return rows
+
+    def _refresh_parents(self, shipment_ids, recount):
+        """
+        Touches the parent shipments after a bulk change and, if the change
+        could affect the counts, recomputes them.
+        """
+        parents = Shipment.objects.filter(pk__in=shipment_ids - {None})
+        if recount:
+            parents.recount_yatayats()
+        parents.update(updated_at=timezone.now())
+
+
 # --------------------------
 # Shipment Yatayat Model (Child)
 # --------------------------
@@ -177,19 +585,610 @@ class ShipmentYatayat(models.Model):
         blank=True,
         null=True
     )
-    chitti_file = models.FileField(
-        upload_to='shipment_chittis/%Y/%m/',
+    # Stored once per distinct content under chittis/ (see ChittiBlob);
+    # indexed for reference counting.
+    chitti_file = ChittiFileField(
+        upload_to='chittis/',
+        storage=ContentAddressedStorage(),
         blank=True,
-        null=True
+        null=True,
+        db_index=True
     )
+    # The uploaded file's own name (set by ChittiFileField); the stored name is its digest.
+    original_name = models.CharField(max_length=255, blank=True, default='')
     date_issued = models.DateField(auto_now_add=True)
 
+    objects = ShipmentYatayatQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remembers the loaded (shipment_id, has_chitti) pair and file name so
+        the signal handlers can apply count and blob reference deltas without
+        re-reading the row.
+        """
+        instance = super().from_db(db, field_names, values)
+        row = dict(zip(field_names, values))
+        if 'shipment_id' in row and 'chitti_file' in row:
+            instance._loaded_counts = (row['shipment_id'], bool(row['chitti_file']))
+        if 'chitti_file' in row:
+            instance._loaded_chitti = row['chitti_file'] or ''
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Saves inside a transaction so the parent count update made by the
+        post_save handler commits (or rolls back) together with this row.
+        """
+        if not self.chitti_file:
+            self.original_name = ''
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.yatayat or 'N/A'} for {self.shipment.invoice_no}"
 
+    def has_chitti(self):
+        """Returns True if a chitti file is attached."""
+        return bool(self.chitti_file)
+
+    @property
+    def display_name(self):
+        """The chitti's name as uploaded (files stored before deduplication: the stored name)."""
+        if not self.chitti_file:
+            return None
+        return self.original_name or os.path.basename(self.chitti_file.name)
+
     def get_file_url(self):
-        """Returns the URL of the uploaded chitti file if it exists."""
-        return self.chitti_file.url if self.chitti_file else None
+        """Returns the download URL of the uploaded chitti file if it exists."""
+        return self.file_url(self.pk, self.chitti_file.name) if self.chitti_file else None
+
+    @staticmethod
+    def file_url(pk, name):
+        """
+        Download URL (the authorized chitti_file view) of a yatayat's stored
+        file. It ends with the file name, so it changes when the file does.
+        """
+        return reverse('shipments:chitti_file', args=[pk, os.path.basename(name)])
+
+    @staticmethod
+    def preview_url(pk, name):
+        """URL of the first-page thumbnail (chitti_preview view); changes with the file like file_url."""
+        return reverse('shipments:chitti_preview', args=[pk, os.path.basename(name)])
+
+    @property
+    def preview(self):
+        """
+        The rendered ChittiPreview of the file, or None (no file, not rendered
+        yet, or stored before deduplication). attach_previews() loads it for
+        many yatayats at once.
+        """
+        if not hasattr(self, '_preview'):
+            name = self.chitti_file.name if self.chitti_file else None
+            self._preview = ChittiPreview.objects.for_files([name]).get(name)
+        return self._preview
+
+
+def attach_previews(yatayats):
+    """Loads the previews of `yatayats` (see ShipmentYatayat.preview) in one query."""
+    yatayats = list(yatayats)
+    previews = ChittiPreview.objects.for_files(y.chitti_file.name for y in yatayats if y.chitti_file)
+    for yatayat in yatayats:
+        yatayat._preview = previews.get(yatayat.chitti_file.name) if yatayat.chitti_file else None
+    return yatayats
+
+
+# --------------------------
+# Chitti Blob Model
+# --------------------------
+class ChittiBlobQuerySet(models.QuerySet):
+    """
+    Reference counting of the deduplicated chitti files. Names that aren't
+    blobs (files stored before deduplication) are ignored.
+    """
+
+    def add_references(self, deltas):
+        """
+        Applies reference changes: {stored name: delta}. Uses F() expressions
+        like the other counters; blobs that may have dropped to zero are
+        collected after the transaction commits.
+        """
+        by_delta = defaultdict(list)
+        for name, delta in deltas.items():
+            if name and delta:
+                by_delta[delta].append(name)
+
+        for delta, names in by_delta.items():
+            self.filter(name__in=names).update(ref_count=F('ref_count') + delta)
+
+        released = [name for delta, names in by_delta.items() if delta < 0 for name in names]
+        if released:
+            self.collect_on_commit(released)
+
+    def recount(self, names):
+        """Recomputes the reference counts of the blobs stored under `names`."""
+        names = {name for name in names if name}
+        if not names:
+            return
+        counts = dict(
+            ShipmentYatayat.objects.filter(chitti_file__in=names)
+            .values('chitti_file').annotate(total=Count('id')).order_by()
+            .values_list('chitti_file', 'total')
+        )
+        for blob in self.filter(name__in=names).only('pk', 'name', 'ref_count'):
+            total = counts.get(blob.name, 0)
+            if blob.ref_count != total:
+                self.filter(pk=blob.pk).update(ref_count=total)
+        self.collect_on_commit([name for name in names if not counts.get(name)])
+
+    def collect_on_commit(self, names):
+        names = list(names)
+        transaction.on_commit(lambda: self.model.objects.collect(names), using=self.db)
+
+    def collect(self, names=None):
+        """
+        Deletes unreferenced blobs (all of them when `names` is None) and their
+        files. Each blob is locked first (see ContentAddressedStorage), and
+        the yatayat table is checked too, so a drifted count never costs a file.
+        Returns the number of blobs deleted.
+        """
+        candidates = self.filter(ref_count__lte=0)
+        if names is not None:
+            candidates = candidates.filter(name__in=list(names))
+        storage = ShipmentYatayat._meta.get_field('chitti_file').storage
+
+        deleted = 0
+        for pk in candidates.values_list('pk', flat=True):
+            with transaction.atomic(using=self.db):
+                blob = self.select_for_update().filter(pk=pk, ref_count__lte=0).first()
+                if blob is None:
+                    continue
+                references = ShipmentYatayat.objects.filter(chitti_file=blob.name).count()
+                if references:
+                    self.filter(pk=pk).update(ref_count=references)
+                    continue
+                blob.delete()
+                storage.delete(blob.name)
+                deleted += 1
+                logger.info(f"Chitti blob collected | Digest={blob.digest}")
+        return deleted
+
+
+class ChittiBlob(models.Model):
+    """
+    A stored chitti file, shared by every yatayat whose file has the same
+    content (shipments.storage.ContentAddressedStorage).
+    `ref_count` is the number of yatayats referencing it; the blob and its
+    file are deleted once the last reference is gone.
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=100, unique=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ChittiBlobQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.ref_count} references)"
+
+
+# --------------------------
+# Chitti Preview Model
+# --------------------------
+def preview_upload_to(instance, filename):
+    return f"chitti_previews/{instance.blob.digest[:2]}/{instance.blob.digest}.png"
+
+
+class ChittiPreviewQuerySet(models.QuerySet):
+
+    def queue(self, blobs):
+        """Creates a PENDING preview for each of `blobs` that has none."""
+        self.bulk_create([self.model(blob=blob) for blob in blobs], ignore_conflicts=True)
+
+    def queue_missing(self):
+        """Queues every blob without a preview (e.g. blobs created by dedupe_chitti_files)."""
+        missing = list(ChittiBlob.objects.filter(preview__isnull=True))
+        self.queue(missing)
+        return len(missing)
+
+    def for_files(self, names):
+        """{stored chitti name: rendered preview} for the blobs stored under `names`."""
+        names = {name for name in names if name}
+        if not names:
+            return {}
+        previews = self.filter(blob__name__in=names, status=self.model.Status.DONE).select_related('blob')
+        return {preview.blob.name: preview for preview in previews}
+
+
+class ChittiPreview(models.Model):
+    """
+    First-page thumbnail and page count of a chitti blob, shared by every
+    yatayat using it. Rows are created PENDING when a new blob is stored
+    and rendered outside the request cycle by `manage.py render_chitti_previews`
+    (shipments.previews). A file that can't be rendered after
+    CHITTI_PREVIEW_MAX_ATTEMPTS tries is marked FAILED with the last error.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    blob = models.OneToOneField(ChittiBlob, on_delete=models.CASCADE, primary_key=True, related_name='preview')
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    thumbnail = models.FileField(upload_to=preview_upload_to, blank=True)
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.CharField(max_length=255, blank=True, default='')
+    queued_at = models.DateTimeField(auto_now_add=True)
+    rendered_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ChittiPreviewQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Worker queue: pending previews, oldest first.
+            models.Index(fields=['status', 'queued_at'], name='chitti_preview_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Preview of {self.blob.digest[:12]} ({self.status})"
+
+
+# --------------------------
+# Chitti Upload Model
+# --------------------------
+class ChittiUpload(models.Model):
+    """
+    A resumable, chunked chitti upload (see shipments.uploads).
+    Chunks are appended to a part file in CHITTI_UPLOAD_DIR; `offset` is how
+    many bytes have been received, so a client that lost its connection asks
+    for it and carries on from there.
+    When every byte is in, the file is attached to a new ShipmentYatayat of
+    `shipment`, or, for uploads started from the shipment form (no shipment
+    yet), kept as COMPLETE until the form is saved with its id.
+    """
+    class Status(models.TextChoices):
+        UPLOADING = 'uploading', 'Uploading'
+        COMPLETE = 'complete', 'Complete'
+        ATTACHED = 'attached', 'Attached'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chitti_uploads')
+    shipment = models.ForeignKey(
+        Shipment, on_delete=models.CASCADE, null=True, blank=True, related_name='chitti_uploads'
+    )
+    yatayat = models.CharField(max_length=50, choices=YATAYAT_CHOICES, blank=True, null=True)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.UPLOADING)
+    attached_to = models.ForeignKey(
+        ShipmentYatayat, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Expiry sweep: unattached uploads by age.
+            models.Index(fields=['status', 'updated_at'], name='chitti_upload_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size} bytes, {self.status})"
+
+
+# --------------------------
+# Shipment Tombstone Model
+# --------------------------
+class ShipmentTombstoneQuerySet(models.QuerySet):
+
+    def visible_to(self, user):
+        """Deletions of the shipments `user` could see (see ShipmentQuerySet.visible_to)."""
+        if sees_all_shipments(user):
+            return self
+        return self.filter(created_by=user)
+
+
+class ShipmentTombstone(models.Model):
+    """
+    Records a deleted shipment so the sync API can tell clients to drop it.
+    Written by a post_delete handler (delete view, admin, API, queryset
+    deletes) and pruned after SHIPMENT_TOMBSTONE_RETENTION_DAYS.
+    `created_by` is the shipment's owner, so a user is only told about
+    deletions of shipments they could see.
+    """
+    shipment_id = models.BigIntegerField()
+    invoice_no = models.CharField(max_length=20)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    objects = ShipmentTombstoneQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['deleted_at']
+        verbose_name = 'Shipment Tombstone'
+        verbose_name_plural = 'Shipment Tombstones'
+
+    def __str__(self):
+        return f"Deleted {self.invoice_no} (ID {self.shipment_id})"
+
+
+# --------------------------
+# Rollup Counters
+# --------------------------
+class CounterQuerySet(models.QuerySet):
+    """
+    Base for pre-aggregated tables: one row per KEY_FIELDS value, whose
+    MEASURES are moved by deltas as shipments change.
+    """
+    KEY_FIELDS = ()
+    MEASURES = ()
+
+    def apply_deltas(self, deltas):
+        """
+        Adds {key: measures} (see rollup_deltas) to the rows, creating
+        missing ones. Uses F() expressions so concurrent writers never lose
+        an update; a row created concurrently is retried as an update.
+        """
+        for key, measures in deltas.items():
+            lookup = dict(zip(self.KEY_FIELDS, key))
+            increments = {
+                measure: F(measure) + value
+                for measure, value in zip(self.MEASURES, measures) if value
+            }
+            if self.filter(**lookup).update(**increments):
+                continue
+            try:
+                with transaction.atomic(using=self.db):
+                    self.create(**lookup, **dict(zip(self.MEASURES, measures)))
+            except IntegrityError:
+                self.filter(**lookup).update(**increments)
+
+
+# --------------------------
+# Settlement Rollup
+# --------------------------
+class SettlementRollupQuerySet(CounterQuerySet):
+    KEY_FIELDS = ('month',) + ROLLUP_DIMENSIONS
+    MEASURES = ROLLUP_MEASURES
+
+    def rebuild(self):
+        """
+        Recomputes every rollup row from the shipment table (one GROUP BY).
+        Returns the number of rows written.
+        """
+        rows = (
+            Shipment.objects
+            .values(
+                *ROLLUP_DIMENSIONS[:-1],
+                month=TruncMonth('dispatch_date'),
+                rollup_vanshar=Coalesce('vanshar', Value('')),
+            )
+            .annotate(
+                shipment_count=Count('id'),
+                total_amount=Coalesce(Sum('amount'), Value(Decimal(0))),
+                settled_count=Count('id', filter=Q(settlement_date__isnull=False)),
+                settled_amount=Coalesce(Sum('amount', filter=Q(settlement_date__isnull=False)), Value(Decimal(0))),
+                margin_total=Coalesce(Sum('margin_amount'), Value(Decimal(0))),
+            )
+            .order_by()
+        )
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            created = self.bulk_create(
+                [SettlementRollup(vanshar=row.pop('rollup_vanshar'), **row) for row in rows],
+                batch_size=1000,
+            )
+        return len(created)
+
+
+class SettlementRollup(models.Model):
+    """
+    Pre-aggregated shipment totals per dispatch month and bank, currency,
+    payment terms and vanshar, read by the Reports page.
+    Kept up to date by shipments.signals and ShipmentQuerySet, rebuilt by
+    'manage.py rebuild_rollups'.
+    """
+    month = models.DateField(help_text="First day of the dispatch month.")
+    bank_name = models.CharField(max_length=20, choices=BANK_CHOICES)
+    currency = models.CharField(max_length=5, choices=CURRENCY_CHOICES)
+    payment_terms = models.CharField(max_length=10, choices=PAYMENT_TERMS_CHOICES)
+    vanshar = models.CharField(max_length=50, choices=VANSHAR_CHOICES, blank=True)
+
+    shipment_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    settled_count = models.IntegerField(default=0)
+    settled_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    margin_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    objects = SettlementRollupQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-month']
+        verbose_name = 'Settlement Rollup'
+        verbose_name_plural = 'Settlement Rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['month', 'bank_name', 'currency', 'payment_terms', 'vanshar'],
+                name='settlement_rollup_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.bank_name} {self.currency.strip()}: {self.shipment_count}"
+
+
+# --------------------------
+# Client Models
+# --------------------------
+class ClientQuerySet(models.QuerySet):
+
+    def resolve(self, names):
+        """
+        {normalized name: client id} for applicant spellings, creating a
+        client (and its alias) for each name no alias matches yet.
+        Blank names are left out.
+        """
+        spellings = {}
+        for name in names:
+            key = normalize_client_name(name)
+            if key:
+                spellings.setdefault(key, str(name).strip())
+
+        aliases = ClientAlias.objects.using(self.db)
+        found = dict(aliases.filter(normalized_name__in=spellings).values_list('normalized_name', 'client_id'))
+        for key in spellings.keys() - found.keys():
+            try:
+                with transaction.atomic(using=self.db):
+                    client = self.create(name=spellings[key][:Client._meta.get_field('name').max_length])
+                    aliases.create(client=client, normalized_name=key)
+                found[key] = client.pk
+            except IntegrityError:
+                # Created concurrently.
+                found[key] = aliases.get(normalized_name=key).client_id
+        return found
+
+    def assign(self, shipments):
+        """Sets each shipment's client from its applicant (batched: one lookup for all)."""
+        clients = self.resolve(shipment.applicant for shipment in shipments)
+        for shipment in shipments:
+            shipment.client_id = clients.get(normalize_client_name(shipment.applicant))
+
+    def merge(self, target, others):
+        """
+        Moves the shipments and aliases of `others` to `target` and deletes
+        them. The shipment update moves their balances too.
+        """
+        others = self.filter(pk__in=[client.pk for client in others]).exclude(pk=target.pk)
+        with transaction.atomic(using=self.db):
+            Shipment.objects.using(self.db).filter(client__in=others).update(client=target)
+            ClientAlias.objects.using(self.db).filter(client__in=others).update(client=target)
+            merged = others.count()
+            others.delete()
+        logger.info(f"Clients merged | Into={target.pk} | Merged={merged}")
+        return merged
+
+
+class Client(models.Model):
+    """
+    A customer shipments are raised for. Shipments are linked through their
+    free-text applicant: every spelling that normalizes to one of the
+    client's aliases (see normalize_client_name) belongs to the client.
+    """
+    name = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ClientQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Client'
+        verbose_name_plural = 'Clients'
+        indexes = [
+            models.Index(fields=['name'], name='client_name_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ClientAlias(models.Model):
+    """A normalized applicant spelling of a client (unique: one client per spelling)."""
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='aliases')
+    normalized_name = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        ordering = ['normalized_name']
+        verbose_name = 'Client Alias'
+        verbose_name_plural = 'Client Aliases'
+
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_client_name(self.normalized_name)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.normalized_name
+
+
+class ClientBalanceQuerySet(CounterQuerySet):
+    KEY_FIELDS = ('client_id', 'currency')
+    MEASURES = CLIENT_BALANCE_MEASURES
+
+    def rebuild(self):
+        """
+        Recomputes every balance from the shipment table (one GROUP BY).
+        Returns the number of rows written.
+        """
+        open_shipments = Q(settlement_date__isnull=True)
+        rows = (
+            Shipment.objects
+            .filter(client__isnull=False)
+            .values('client_id', 'currency')
+            .annotate(
+                shipment_count=Count('id'),
+                open_count=Count('id', filter=open_shipments),
+                outstanding_amount=Coalesce(Sum('amount', filter=open_shipments), Value(Decimal(0))),
+            )
+            .order_by()
+        )
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            created = self.bulk_create([ClientBalance(**row) for row in rows], batch_size=1000)
+        return len(created)
+
+
+class ClientBalance(models.Model):
+    """
+    Running totals of a client's shipments in one currency, read by the
+    Clients page. Kept up to date like SettlementRollup.
+    """
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='balances')
+    currency = models.CharField(max_length=5, choices=CURRENCY_CHOICES)
+
+    shipment_count = models.IntegerField(default=0)
+    open_count = models.IntegerField(default=0)
+    outstanding_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    objects = ClientBalanceQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['client', 'currency']
+        verbose_name = 'Client Balance'
+        verbose_name_plural = 'Client Balances'
+        constraints = [
+            models.UniqueConstraint(fields=['client', 'currency'], name='client_balance_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.client_id} {self.currency.strip()}: {self.outstanding_amount}"
+
+
+# --------------------------
+# Exchange Rate Model
+# --------------------------
+class ExchangeRate(models.Model):
+    """
+    NPR value of one unit of a foreign currency, effective from `date`.
+    Imported with 'manage.py import_exchange_rates'; see shipments.currency
+    for the lookups and the in-database conversion.
+    """
+    date = models.DateField()
+    currency = models.CharField(max_length=5, choices=CURRENCY_CHOICES)
+    rate = models.DecimalField(max_digits=14, decimal_places=6, validators=[MinValueValidator(0)])
+
+    class Meta:
+        ordering = ['-date', 'currency']
+        verbose_name = 'Exchange Rate'
+        verbose_name_plural = 'Exchange Rates'
+        constraints = [
+            # Also the index of the "latest rate on or before a date" lookup.
+            models.UniqueConstraint(fields=['currency', 'date'], name='exchange_rate_currency_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_currency_display()} {self.date}: {self.rate} NPR"
 
 
 # --------------------------
@@ -0,0 +1,241 @@
+import base64
+import binascii
+import logging
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------
+# Keyset Pagination (Web List)
+# --------------------------
+class KeysetPage:
+    """
+    A single page of results produced by KeysetPaginator.
+    Exposes the cursors needed to build 'Older' / 'Newer' navigation links.
+    """
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    @property
+    def next_cursor(self):
+        """Primary key to pass as '?after=' to fetch the next (older) page."""
+        if self.has_next and self.object_list:
+            return self.object_list[-1].pk
+        return None
+
+    @property
+    def previous_cursor(self):
+        """Primary key to pass as '?before=' to fetch the previous (newer) page."""
+        if self.has_previous and self.object_list:
+            return self.object_list[0].pk
+        return None
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Paginates a queryset on its primary key, newest first ('-id').
+    Unlike OFFSET pagination, every page is a single indexed range scan
+    of at most `per_page + 1` rows, so the cost does not grow with the table size.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def page(self, after=None, before=None):
+        """
+        Returns a KeysetPage.
+        - after:  return rows older than this primary key.
+        - before: return rows newer than this primary key.
+        - neither: return the first (newest) page.
+        """
+        limit = self.per_page + 1
+
+        if before is not None:
+            rows = list(self.queryset.filter(pk__gt=before).order_by('pk')[:limit])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            rows.reverse()
+            return KeysetPage(rows, has_next=True, has_previous=has_previous)
+
+        qs = self.queryset.order_by('-pk')
+        if after is not None:
+            qs = qs.filter(pk__lt=after)
+
+        rows = list(qs[:limit])
+        has_next = len(rows) > self.per_page
+        return KeysetPage(
+            rows[:self.per_page],
+            has_next=has_next,
+            has_previous=after is not None,
+        )
+
+
+def parse_cursor(value):
+    """
+    Converts a cursor query parameter into a primary key.
+    Returns None for missing or malformed values instead of raising.
+    """
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        return None
+    return cursor if cursor > 0 else None
+
+
+# --------------------------
+# Cursor Pagination (API)
+# --------------------------
+class ShipmentCursorPagination(BasePagination):
+    """
+    Cursor pagination for the shipments API, ordered by (-dispatch_date, -id).
+
+    The cursor holds the (dispatch_date, id) of the last row served, and the
+    next page is "strictly after that key". Rows inserted concurrently
+    therefore never shift the pages: nothing is repeated or skipped.
+    Each page is one range scan on the (-dispatch_date, -id) index.
+
+    Query parameters:
+    - cursor:    opaque token taken from 'next' / 'previous'.
+    - page_size: rows per page (capped at max_page_size).
+    - paginate=false: return the legacy unpaginated JSON array.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    unpaginated_query_param = 'paginate'
+    max_page_size = 500
+
+    def get_page_size(self, request):
+        default = getattr(settings, 'SHIPMENT_API_PAGE_SIZE', 50)
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, default))
+        except (TypeError, ValueError):
+            size = default
+        return min(max(size, 1), self.max_page_size)
+
+    def is_unpaginated(self, request):
+        value = request.query_params.get(self.unpaginated_query_param, '')
+        return value.lower() in ('false', '0', 'no')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_unpaginated(request):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        limit = self.page_size + 1
+
+        if cursor is None:
+            rows = list(queryset.order_by('-dispatch_date', '-id')[:limit])
+            self.has_previous = False
+            self.has_next = len(rows) > self.page_size
+            rows = rows[:self.page_size]
+        else:
+            dispatch_date, pk, reverse = cursor
+            if reverse:
+                rows = list(
+                    queryset.filter(
+                        Q(dispatch_date__gt=dispatch_date) | Q(dispatch_date=dispatch_date, id__gt=pk)
+                    ).order_by('dispatch_date', 'id')[:limit]
+                )
+                self.has_previous = len(rows) > self.page_size
+                self.has_next = True
+                rows = rows[:self.page_size]
+                rows.reverse()
+            else:
+                rows = list(
+                    queryset.filter(
+                        Q(dispatch_date__lt=dispatch_date) | Q(dispatch_date=dispatch_date, id__lt=pk)
+                    ).order_by('-dispatch_date', '-id')[:limit]
+                )
+                self.has_previous = True
+                self.has_next = len(rows) > self.page_size
+                rows = rows[:self.page_size]
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Walked past the end: the first page is the way back.
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self._link(self.page[0], reverse=True)
+
+    def _link(self, row, reverse):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(row, reverse))
+
+    # --- Cursor encoding ---
+
+    def encode_cursor(self, row, reverse):
+        dispatch_date, pk = self._row_key(row)
+        raw = f"{dispatch_date.isoformat()}|{pk}|{'r' if reverse else 'f'}"
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        """
+        Returns (dispatch_date, id, reverse) or None for the first page.
+        Raises NotFound for a malformed cursor.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('ascii')
+            dispatch_date, pk, direction = raw.split('|')
+            return date.fromisoformat(dispatch_date), int(pk), direction == 'r'
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            logger.warning(f"Invalid shipment API cursor: {encoded}")
+            raise NotFound("Invalid cursor")
+
+    @staticmethod
+    def _row_key(row):
+        """Returns (dispatch_date, id) from a model instance or a values() dict."""
+        if isinstance(row, dict):
+            return row['dispatch_date'], row['id']
+        return row.dispatch_date, row.pk
@@ -0,0 +1,143 @@
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChittiPreview, Shipment, ShipmentYatayat
+
+logger = logging.getLogger(__name__)
+
+PAGES_RE = re.compile(rb'^Pages:\s+(\d+)\s*$', re.MULTILINE)
+
+
+class RenderError(Exception):
+    """A chitti that pdfinfo / pdftoppm could not read."""
+
+
+def require_poppler():
+    """Raises ImportError unless the poppler-utils binaries are on the PATH."""
+    for binary in (settings.PDFINFO_BINARY, settings.PDFTOPPM_BINARY):
+        if shutil.which(binary) is None:
+            raise ImportError(
+                f"Chitti previews require poppler-utils ({binary} not found; apt install poppler-utils)."
+            )
+
+
+# --------------------------
+# Rendering
+# --------------------------
+def _run(args):
+    try:
+        result = subprocess.run(args, capture_output=True, timeout=settings.CHITTI_PREVIEW_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise RenderError(f"{os.path.basename(args[0])} timed out after {settings.CHITTI_PREVIEW_TIMEOUT}s.")
+    if result.returncode:
+        message = result.stderr.decode('utf-8', 'replace').strip().splitlines()
+        raise RenderError(message[-1] if message else f"{args[0]} exited with {result.returncode}.")
+    return result.stdout
+
+
+def page_count(path):
+    match = PAGES_RE.search(_run([settings.PDFINFO_BINARY, path]))
+    if not match:
+        raise RenderError("pdfinfo reported no page count.")
+    return int(match.group(1))
+
+
+def render_first_page(path, directory):
+    """
+    Renders page 1 of the PDF at `path` as a PNG CHITTI_PREVIEW_WIDTH pixels
+    wide (height by aspect ratio) into `directory`; returns the PNG's path.
+    """
+    prefix = os.path.join(directory, 'preview')
+    _run([
+        settings.PDFTOPPM_BINARY, '-png', '-singlefile', '-f', '1', '-l', '1',
+        '-scale-to-x', str(settings.CHITTI_PREVIEW_WIDTH), '-scale-to-y', '-1',
+        path, prefix,
+    ])
+    return f"{prefix}.png"
+
+
+def render_preview(preview):
+    """
+    Renders `preview` (page count and thumbnail) and saves it DONE; a file
+    that can't be rendered stays PENDING for another try, or becomes FAILED
+    after CHITTI_PREVIEW_MAX_ATTEMPTS. Returns the new status.
+    """
+    storage = ShipmentYatayat._meta.get_field('chitti_file').storage
+    preview.attempts += 1
+    try:
+        with tempfile.TemporaryDirectory(prefix='chitti-preview-') as directory:
+            path = storage.path(preview.blob.name)
+            if not os.path.exists(path):
+                raise RenderError("The file is missing from storage.")
+            pages = page_count(path)
+            png = render_first_page(path, directory)
+            if preview.thumbnail:
+                preview.thumbnail.delete(save=False)
+            with open(png, 'rb') as content:
+                preview.thumbnail.save(os.path.basename(png), File(content), save=False)
+    except RenderError as e:
+        preview.error = str(e)[:255]
+        if preview.attempts >= settings.CHITTI_PREVIEW_MAX_ATTEMPTS:
+            preview.status = ChittiPreview.Status.FAILED
+        else:
+            preview.queued_at = timezone.now()  # Retried after the rest of the queue.
+        logger.warning(
+            f"Chitti preview failed | Digest={preview.blob.digest} | Attempt={preview.attempts} | Error={preview.error}"
+        )
+    else:
+        preview.page_count = pages
+        preview.status = ChittiPreview.Status.DONE
+        preview.error = ''
+        preview.rendered_at = timezone.now()
+        logger.debug(f"Chitti preview rendered | Digest={preview.blob.digest} | Pages={pages}")
+    preview.save()
+
+    if preview.status == ChittiPreview.Status.DONE:
+        # The API output of the shipments using the file changed: let sync and ETags see it.
+        shipment_ids = list(
+            ShipmentYatayat.objects.filter(chitti_file=preview.blob.name).values_list('shipment_id', flat=True)
+        )
+        Shipment.objects.filter(pk__in=shipment_ids).update(updated_at=timezone.now())
+    return preview.status
+
+
+# --------------------------
+# Queue
+# --------------------------
+def render_pending(limit=None):
+    """
+    Renders the previews pending when it was called, oldest first (or the
+    first `limit`); one that fails is retried by the next call. Each one is
+    claimed with SELECT ... FOR UPDATE SKIP LOCKED and rendered in that
+    transaction, so several workers can run side by side and a worker that
+    dies leaves its preview pending.
+    Returns {status: count} of the previews tried.
+    """
+    cutoff = timezone.now()
+    counts = {}
+    tried = 0
+    while limit is None or tried < limit:
+        with transaction.atomic():
+            preview = (
+                ChittiPreview.objects
+                .filter(status=ChittiPreview.Status.PENDING, queued_at__lte=cutoff)
+                .select_for_update(skip_locked=True, of=('self',))
+                .select_related('blob')
+                .order_by('queued_at')
+                .first()
+            )
+            if preview is None:
+                break
+            status = render_preview(preview)
+        counts[status] = counts.get(status, 0) + 1
+        tried += 1
+    return counts
@@ -0,0 +1,183 @@
+import hashlib
+import logging
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate):
+    """'5/min' -> (5, 60); None -> None (unlimited)."""
+    if not rate:
+        return None
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def get_rate(scope):
+    return parse_rate(getattr(settings, 'RATE_LIMITS', {}).get(scope))
+
+
+def client_ip(request):
+    """
+    The client's address. Behind RATELIMIT_NUM_PROXIES trusted proxies it is
+    taken from X-Forwarded-For (the entry the outermost proxy appended), so a
+    client can't pick its own key by sending the header itself.
+    """
+    num_proxies = getattr(settings, 'RATELIMIT_NUM_PROXIES', 0)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if num_proxies and forwarded:
+        addresses = [address.strip() for address in forwarded.split(',')]
+        return addresses[-min(num_proxies, len(addresses))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+# --------------------------
+# Limiter
+# --------------------------
+def hit(scope, ident, rate=None):
+    """
+    Counts one request for `ident` (an IP, username or token) under `scope`
+    and returns 0 if it is allowed, else the seconds until it would be.
+
+    Approximates a token bucket refilling at count/period with a sliding
+    window: the current fixed window's count plus the previous window's,
+    weighted by how much of it still overlaps the last `period` seconds.
+    Every step is an atomic cache operation (add / incr / get), so it holds
+    across workers with the Redis cache, and costs three round trips.
+    Denied requests are counted too: a client that keeps hammering stays
+    blocked until it slows down.
+    """
+    rate = rate or get_rate(scope)
+    if rate is None or not ident:
+        return 0
+    limit, period = rate
+
+    now = time.time()
+    window = int(now // period)
+    elapsed = (now % period) / period
+    digest = hashlib.sha256(str(ident).encode('utf-8')).hexdigest()[:32]
+    key = f"ratelimit:{scope}:{digest}:{period}"
+
+    # Kept for two periods: it is the "previous window" for the next one.
+    cache.add(f"{key}:{window}", 0, period * 2)
+    try:
+        current = cache.incr(f"{key}:{window}")
+    except ValueError:
+        # Expired between add() and incr().
+        cache.set(f"{key}:{window}", 1, period * 2)
+        current = 1
+    previous = cache.get(f"{key}:{window - 1}", 0)
+
+    if previous * (1 - elapsed) + current <= limit:
+        return 0
+
+    # Time until the previous window's weight has decayed enough; if the
+    # current window alone is over the limit, until it becomes the previous one.
+    if current <= limit and previous:
+        wait = ((previous + current - limit) / previous - elapsed) * period
+    else:
+        wait = (1 - elapsed) * period
+    wait = max(1, math.ceil(wait))
+    logger.warning(f"Rate limit exceeded | Scope={scope} | Retry-After={wait}s")
+    return wait
+
+
+def check(scopes):
+    """
+    Applies several (scope, ident) limits to one request; returns the longest
+    wait among those exceeded, or 0.
+    """
+    return max((hit(scope, ident) for scope, ident in scopes), default=0)
+
+
+# --------------------------
+# Web Views
+# --------------------------
+def ratelimit(*rules, methods=('POST',)):
+    """
+    View decorator. Each rule is (scope, key_func) where key_func(request)
+    returns the identifier to count, e.g.
+
+        @ratelimit(('login_ip', client_ip), ('login_user', lambda r: r.POST.get('username')))
+
+    Only `methods` are counted. Over the limit, the view is not called and a
+    429 page with a Retry-After header is returned instead.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method in methods:
+                wait = check((scope, key_func(request)) for scope, key_func in rules)
+                if wait:
+                    return too_many_requests(request, wait)
+            return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
+
+
+def too_many_requests(request, wait):
+    response = render(request, 'ratelimited.html', {'retry_after': wait}, status=429)
+    response['Retry-After'] = str(wait)
+    return response
+
+
+def posted(field):
+    """key_func for ratelimit(): a normalised POST field (username, email)."""
+    def key_func(request):
+        return (request.POST.get(field) or '').strip().lower()
+    return key_func
+
+
+# --------------------------
+# API
+# --------------------------
+class ScopedRateThrottle(BaseThrottle):
+    """
+    DRF throttle backed by hit(). Subclasses set `rules`: (scope, method name)
+    pairs whose method returns the identifier to count for the request.
+    DRF turns a denial into 429 with a Retry-After header.
+    """
+    rules = ()
+
+    def allow_request(self, request, view):
+        self.wait_seconds = check(
+            (scope, getattr(self, method)(request)) for scope, method in self.rules
+        )
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+    def ip(self, request):
+        return client_ip(request)
+
+
+class APIRateThrottle(ScopedRateThrottle):
+    """All API calls: per token when authenticated, otherwise per IP."""
+
+    def allow_request(self, request, view):
+        if request.auth:
+            self.rules = (('api_token', 'token'),)
+        else:
+            self.rules = (('api_anon', 'ip'),)
+        return super().allow_request(request, view)
+
+    def token(self, request):
+        return request.auth
+
+
+class LoginRateThrottle(ScopedRateThrottle):
+    """API login attempts, per IP and per username."""
+    rules = (('login_ip', 'ip'), ('login_user', 'username'))
+
+    def username(self, request):
+        return str(request.data.get('username') or '').strip().lower()
@@ -0,0 +1,143 @@
+import logging
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import BANK_CHOICES, CURRENCY_CHOICES, REPORTS_GENERATION_KEY, Shipment
+
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_TIMEOUT = 60 * 60  # 1 hour; writes invalidate earlier
+
+# Dates an unsettled shipment's age can be counted from (?ageing= on the Reports page).
+AGEING_BASES = [
+    ('dispatch_date', 'Dispatch Date'),
+    ('doc_to_bank', 'Doc To Bank'),
+    ('eta_date', 'ETA'),
+]
+DEFAULT_AGEING_BASIS = 'dispatch_date'
+
+# (key, label, lowest age in days, highest age in days or None).
+# Dates in the future count as 0 days.
+AGEING_BUCKETS = [
+    ('current', '0–30 days', None, 30),
+    ('days_31_60', '31–60 days', 31, 60),
+    ('days_61_90', '61–90 days', 61, 90),
+    ('over_90', '90+ days', 91, None),
+]
+
+BANK_LABELS = dict(BANK_CHOICES)
+CURRENCY_LABELS = dict(CURRENCY_CHOICES)
+
+
+def reports_generation():
+    """The current generation token (see shipments.models.invalidate_reports)."""
+    generation = cache.get(REPORTS_GENERATION_KEY)
+    if generation is None:
+        cache.add(REPORTS_GENERATION_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(REPORTS_GENERATION_KEY)
+    return generation
+
+
+# --------------------------
+# Ageing
+# --------------------------
+def ageing_buckets(basis):
+    """[(key, label)] of the report's columns; nullable bases add "No date"."""
+    buckets = [(key, label) for key, label, _, _ in AGEING_BUCKETS]
+    if Shipment._meta.get_field(basis).null:
+        buckets.append(('no_date', 'No date'))
+    return buckets
+
+
+def _bucket_filters(basis, today):
+    """
+    {bucket key: Q} on the basis date. Ages become date ranges computed here,
+    so the database compares the column against constants instead of
+    evaluating date arithmetic per row (portable across MySQL and SQLite).
+    """
+    filters = {}
+    for key, _, low, high in AGEING_BUCKETS:
+        condition = Q(**{f'{basis}__isnull': False})
+        if low is not None:
+            condition &= Q(**{f'{basis}__lte': today - timedelta(days=low)})
+        if high is not None:
+            condition &= Q(**{f'{basis}__gt': today - timedelta(days=high + 1)})
+        filters[key] = condition
+    filters['no_date'] = Q(**{f'{basis}__isnull': True})
+    return filters
+
+
+def compute_ageing(basis=DEFAULT_AGEING_BASIS, today=None):
+    """
+    Unsettled shipments per bank and currency, bucketed by days since `basis`.
+    A single GROUP BY with conditional aggregates (COUNT/SUM ... FILTER, or
+    CASE WHEN on MySQL) over the unsettled rows; nothing is loaded per shipment.
+    """
+    today = today or timezone.localdate()
+    buckets = ageing_buckets(basis)
+    filters = _bucket_filters(basis, today)
+    aggregates = {}
+    for key, _ in buckets:
+        aggregates[f'{key}_count'] = Count('id', filter=filters[key])
+        aggregates[f'{key}_amount'] = Sum('amount', filter=filters[key])
+
+    rows = list(
+        Shipment.objects
+        .filter(settlement_date__isnull=True)
+        .values('bank_name', 'currency')
+        .annotate(total_count=Count('id'), total_amount=Sum('amount'), **aggregates)
+        .order_by('currency', 'bank_name')
+    )
+
+    totals = {}
+    for row in rows:
+        row['bank_label'] = BANK_LABELS.get(row['bank_name'], row['bank_name'])
+        row['currency_label'] = CURRENCY_LABELS.get(row['currency'], row['currency'])
+        row['buckets'] = [
+            {'count': row[f'{key}_count'], 'amount': row[f'{key}_amount'] or Decimal(0)}
+            for key, _ in buckets
+        ]
+
+        # Per-currency totals (amounts are never added across currencies).
+        total = totals.setdefault(row['currency'], {
+            'currency': row['currency'],
+            'currency_label': row['currency_label'],
+            'total_count': 0,
+            'total_amount': Decimal(0),
+            'buckets': [{'count': 0, 'amount': Decimal(0)} for _ in buckets],
+        })
+        total['total_count'] += row['total_count']
+        total['total_amount'] += row['total_amount'] or Decimal(0)
+        for bucket, value in zip(total['buckets'], row['buckets']):
+            bucket['count'] += value['count']
+            bucket['amount'] += value['amount']
+
+    return {
+        'basis': basis,
+        'as_of': today,
+        'labels': [label for _, label in buckets],
+        'rows': rows,
+        'totals': list(totals.values()),
+    }
+
+
+def ageing_report(basis=DEFAULT_AGEING_BASIS):
+    """
+    compute_ageing(), cached until the next shipment write (or the next day,
+    since the ages move with the date).
+    """
+    today = timezone.localdate()
+    key = f"reports:ageing:{reports_generation()}:{basis}:{today.isoformat()}"
+    report = cache.get(key)
+    if report is None:
+        started = time.perf_counter()
+        report = compute_ageing(basis, today)
+        cache.set(key, report, REPORT_CACHE_TIMEOUT)
+        logger.debug(f"Ageing report computed | Basis={basis} | Seconds={time.perf_counter() - started:.3f}")
+    return report
@@ -0,0 +1,156 @@
+import logging
+import uuid
+
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+ROLE_CACHE_TIMEOUT = 60 * 15  # 15 minutes
+GENERATION_KEY = 'rbac:generation'
+
+ADMIN_GROUP = 'Admin'
+VIEWER_GROUP = 'Viewer'
+
+
+# --------------------------
+# Roles
+# --------------------------
+class Roles:
+    """
+    A user's resolved RBAC roles:
+    - is_superadmin: Django Superuser (Full access + Admin Panel)
+    - is_admin: Member of 'Admin' group or Superuser (Full CRUD in frontend)
+    - is_viewer: Member of 'Viewer' group (Read-only access)
+    """
+
+    def __init__(self, user=None, groups=(), permissions=()):
+        self.user = user
+        self.groups = frozenset(groups)
+        self.permissions = frozenset(permissions)
+
+        is_active = bool(user and user.is_authenticated and user.is_active)
+        self.is_superadmin = bool(user and user.is_authenticated and user.is_superuser)
+        self.is_admin = self.is_superadmin or ADMIN_GROUP in self.groups
+        self.is_viewer = VIEWER_GROUP in self.groups
+        self.can_edit = self.is_admin or self.is_superadmin
+        self._is_active = is_active
+
+    def has_perm(self, perm):
+        """Same answer as user.has_perm() with ModelBackend, without a query."""
+        if not self._is_active:
+            return False
+        if self.is_superadmin:
+            return True
+        return perm in self.permissions
+
+    def as_context(self):
+        """Template flags shared by the context processor and RBACContextMixin."""
+        return {
+            "is_superadmin": self.is_superadmin,
+            "is_admin": self.is_admin,
+            "is_viewer": self.is_viewer,
+            "can_edit": self.can_edit,
+        }
+
+
+ANONYMOUS_ROLES = Roles()
+
+
+# --------------------------
+# Resolution
+# --------------------------
+def get_roles(user):
+    """
+    Returns the Roles for a user.
+    Resolved once per request (memoized on the user object) and cached across
+    requests; the cache is invalidated by the signal handlers in shipments.signals.
+    """
+    if not user or not user.is_authenticated:
+        return ANONYMOUS_ROLES
+
+    roles = getattr(user, '_rbac_roles', None)
+    if roles is None:
+        membership = _load_membership(user)
+        roles = Roles(
+            user,
+            groups=membership['groups'],
+            permissions=membership['user_perms'] | membership['group_perms'],
+        )
+        _prime_permission_cache(user, membership)
+        user._rbac_roles = roles
+    return roles
+
+
+def _user_key(user_id):
+    return f'rbac:user:{user_id}'
+
+
+def _current_generation():
+    """
+    Returns the global generation token. Group-wide changes replace it,
+    which invalidates every cached user entry at once.
+    """
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def _load_membership(user):
+    """
+    Returns {'groups', 'user_perms', 'group_perms'} for the user,
+    from the cache when its generation is still current.
+    """
+    key = _user_key(user.pk)
+    cached = cache.get_many([GENERATION_KEY, key])
+    generation = cached.get(GENERATION_KEY) or _current_generation()
+    entry = cached.get(key)
+
+    if entry and entry['generation'] == generation:
+        return entry
+
+    entry = {
+        'generation': generation,
+        'groups': set(user.groups.values_list('name', flat=True)),
+        'user_perms': _permission_names(Permission.objects.filter(user=user)),
+        'group_perms': _permission_names(Permission.objects.filter(group__user=user)),
+    }
+    cache.set(key, entry, ROLE_CACHE_TIMEOUT)
+    logger.debug(f"RBAC roles loaded from database | UserID={user.pk}")
+    return entry
+
+
+def _permission_names(queryset):
+    """Formats permissions as 'app_label.codename', like ModelBackend."""
+    return {
+        f"{app_label}.{codename}"
+        for app_label, codename in queryset.values_list('content_type__app_label', 'codename')
+    }
+
+
+def _prime_permission_cache(user, membership):
+    """
+    Fills ModelBackend's per-object permission caches so user.has_perm(),
+    PermissionRequiredMixin and {{ perms }} in templates don't query again.
+    Superusers are skipped: has_perm() short-circuits for them.
+    """
+    if user.is_superuser:
+        return
+    user._user_perm_cache = set(membership['user_perms'])
+    user._group_perm_cache = set(membership['group_perms'])
+    user._perm_cache = user._user_perm_cache | user._group_perm_cache
+
+
+# --------------------------
+# Invalidation
+# --------------------------
+def invalidate_user_roles(*user_ids):
+    """Drops the cached roles of specific users (membership or direct perms changed)."""
+    cache.delete_many([_user_key(user_id) for user_id in user_ids])
+
+
+def invalidate_all_roles():
+    """Invalidates every cached entry (a group or its permissions changed)."""
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
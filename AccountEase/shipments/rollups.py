@@ -0,0 +1,116 @@
+import logging
+from datetime import date
+
+from django.db.models import ExpressionWrapper, F, Sum
+
+from .models import (
+    BANK_CHOICES,
+    CURRENCY_CHOICES,
+    PAYMENT_TERMS_CHOICES,
+    ROLLUP_MEASURES,
+    VANSHAR_CHOICES,
+    SettlementRollup,
+)
+from .currency import NPR_FIELD, rate_for
+
+logger = logging.getLogger(__name__)
+
+# ?months= choices on the Reports page; 0 = all time.
+REPORT_PERIODS = [(3, 'Last 3 months'), (6, 'Last 6 months'), (12, 'Last 12 months'), (24, 'Last 24 months'), (0, 'All time')]
+DEFAULT_REPORT_PERIOD = 12
+
+BREAKDOWNS = [
+    ('bank_name', 'Bank', dict(BANK_CHOICES)),
+    ('vanshar', 'Vanshar', dict(VANSHAR_CHOICES)),
+    ('payment_terms', 'Payment Terms', dict(PAYMENT_TERMS_CHOICES)),
+]
+CURRENCY_LABELS = dict(CURRENCY_CHOICES)
+
+
+def period_start(months, today=None):
+    """First day of the month `months - 1` months before today's; None for all time."""
+    if not months:
+        return None
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - (months - 1)
+    return date(index // 12, index % 12 + 1, 1)
+
+
+# Amounts converted to NPR inside the query: every rollup row's amounts are
+# multiplied by its currency's rate on the first day of its month (see
+# _with_rates), then summed like the other measures.
+NPR_AMOUNTS = {'total_npr': 'total_amount', 'settled_npr': 'settled_amount', 'margin_npr': 'margin_total'}
+NPR_MEASURES = {name: Sum(f'row_{name}') for name in NPR_AMOUNTS}
+
+
+def _with_rates(queryset):
+    queryset = queryset.annotate(rate=rate_for('currency', 'month'))
+    return queryset.annotate(**{
+        f'row_{name}': ExpressionWrapper(F(amount) * F('rate'), output_field=NPR_FIELD)
+        for name, amount in NPR_AMOUNTS.items()
+    })
+
+
+def _totals(queryset, *group_by):
+    """Sums the rollup measures grouped by `group_by`, with derived figures."""
+    rows = queryset.values(*group_by).annotate(**{
+        measure: Sum(measure) for measure in ROLLUP_MEASURES
+    }, **NPR_MEASURES).order_by(*group_by)
+
+    for row in rows:
+        row['currency_label'] = CURRENCY_LABELS.get(row.get('currency'), row.get('currency'))
+        row['outstanding_amount'] = row['total_amount'] - row['settled_amount']
+        row['settled_percent'] = (
+            round(row['settled_count'] * 100 / row['shipment_count']) if row['shipment_count'] else 0
+        )
+        yield row
+
+
+def _npr_summary(summary):
+    """
+    The per-currency summary rows added up in NPR; None when nothing converts.
+    A currency converts entirely or (without any rate) not at all.
+    """
+    converted = [row for row in summary if row['total_npr'] is not None]
+    if not converted:
+        return None
+    npr = {
+        measure: sum(row[measure] for row in converted)
+        for measure in ('shipment_count', 'settled_count', *NPR_AMOUNTS)
+    }
+    npr['unconverted'] = [row['currency_label'] for row in summary if row['total_npr'] is None]
+    npr['outstanding_npr'] = npr['total_npr'] - npr['settled_npr']
+    npr['settled_percent'] = round(npr['settled_count'] * 100 / npr['shipment_count']) if npr['shipment_count'] else 0
+    return npr
+
+
+def build_report(months=DEFAULT_REPORT_PERIOD):
+    """
+    Everything the Reports page shows, read from SettlementRollup (a few
+    hundred rows) instead of the shipment table. Figures are per currency;
+    the *_npr figures and `npr` (all currencies together) are converted with
+    the ExchangeRate table in the same queries. Currencies without any rate
+    are left out of them (listed in npr['unconverted']).
+    """
+    queryset = SettlementRollup.objects.filter(shipment_count__gt=0)
+    start = period_start(months)
+    if start:
+        queryset = queryset.filter(month__gte=start)
+    queryset = _with_rates(queryset)
+
+    summary = list(_totals(queryset, 'currency'))
+    report = {
+        'start': start,
+        'npr': _npr_summary(summary),
+        'summary': summary,
+        # Newest month first.
+        'monthly': sorted(_totals(queryset, 'month', 'currency'), key=lambda row: row['month'], reverse=True),
+        'breakdowns': [],
+    }
+    for dimension, title, labels in BREAKDOWNS:
+        rows = sorted(_totals(queryset, dimension, 'currency'), key=lambda row: -row['total_amount'])
+        for row in rows:
+            row['label'] = labels.get(row[dimension], row[dimension]) or 'Not set'
+        report['breakdowns'].append({'title': title, 'rows': rows})
+
+    return report
@@ -0,0 +1,59 @@
+import logging
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+logger = logging.getLogger(__name__)
+
+ROW_TEMPLATE = 'shipments/shipment_row.html'
+ROW_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day; stale keys simply expire
+
+# Bump when shipment_row.html changes so old fragments are not served after a deploy.
+ROW_TEMPLATE_VERSION = 1
+
+CachedRow = namedtuple('CachedRow', ['shipment', 'html'])
+
+
+def row_cache_key(shipment, variant, can_edit):
+    """
+    Cache key for one rendered row.
+    'updated_at' changes whenever the shipment or one of its yatayats is
+    written, so edits invalidate the row without explicit deletes.
+    """
+    return (
+        f"shipment_row:v{ROW_TEMPLATE_VERSION}:{shipment.pk}:"
+        f"{shipment.updated_at.timestamp():.6f}:{variant}:{int(bool(can_edit))}"
+    )
+
+
+def render_shipment_rows(shipments, variant, can_edit):
+    """
+    Returns a CachedRow for each shipment, in order.
+    Cached rows are fetched with a single get_many(); only the misses have
+    their yatayats prefetched and are rendered, then stored with set_many().
+    """
+    shipments = list(shipments)
+    show_actions = variant == 'admin'
+    keys = {shipment.pk: row_cache_key(shipment, variant, can_edit) for shipment in shipments}
+
+    cached = cache.get_many(list(keys.values()))
+    misses = [shipment for shipment in shipments if keys[shipment.pk] not in cached]
+
+    if misses:
+        prefetch_related_objects(misses, 'yatayats')
+        rendered = {
+            keys[shipment.pk]: render_to_string(ROW_TEMPLATE, {
+                'shipment': shipment,
+                'show_actions': show_actions,
+            })
+            for shipment in misses
+        }
+        cache.set_many(rendered, ROW_CACHE_TIMEOUT)
+        cached.update(rendered)
+
+    logger.debug(f"Shipment rows rendered | Cached={len(shipments) - len(misses)} | Rendered={len(misses)}")
+
+    return [CachedRow(shipment, mark_safe(cached[keys[shipment.pk]])) for shipment in shipments]
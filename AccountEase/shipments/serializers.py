@@ -1,5 +1,18 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import models
 from rest_framework import serializers
-from .models import Shipment, ShipmentYatayat
+from .models import ChittiPreview, ChittiUpload, Shipment, ShipmentYatayat, attach_previews
+from .validators import NO_FUTURE_DATE_FIELDS, NON_NEGATIVE_FIELDS, shipment_field_validator
+
+
+class ShipmentYatayatListSerializer(serializers.ListSerializer):
+    """Loads the previews of all the yatayats in one query before serializing them."""
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        return super().to_representation(attach_previews(iterable))
 
 
 class ShipmentYatayatSerializer(serializers.ModelSerializer):
@@ -7,14 +20,19 @@ class ShipmentYatayatSerializer(serializers.ModelSerializer):
     Serializer for ShipmentYatayat model.
     Handles serialization of yatayat details including file URLs and display names.
     Includes helper methods to construct absolute URLs for stored files.
+    'thumbnail_url' and 'page_count' stay null until the preview worker has
+    rendered the file (see shipments.previews).
     """
     url = serializers.SerializerMethodField()
     display_name = serializers.SerializerMethodField()
     date = serializers.DateField(source='date_issued', format='%Y-%m-%d', read_only=True)
+    thumbnail_url = serializers.SerializerMethodField()
+    page_count = serializers.SerializerMethodField()
 
     class Meta:
         model = ShipmentYatayat
-        fields = ['id', 'yatayat', 'url', 'display_name', 'date']
+        fields = ['id', 'yatayat', 'url', 'display_name', 'date', 'thumbnail_url', 'page_count']
+        list_serializer_class = ShipmentYatayatListSerializer
 
     def to_representation(self, instance):
         """
@@ -27,23 +45,33 @@ class ShipmentYatayatSerializer(serializers.ModelSerializer):
 
     def get_url(self, obj):
         """
-        Return the absolute URL of the uploaded chitti file.
+        Return the absolute URL of the uploaded chitti file (the access-checked
+        chitti_file view, which accepts the API token).
         Ensures the URL is complete with domain if request context is available.
         """
         request = self.context.get('request')
         if obj.chitti_file:
             if request:
-                return request.build_absolute_uri(obj.chitti_file.url)
-            return obj.chitti_file.url
+                return request.build_absolute_uri(obj.get_file_url())
+            return obj.get_file_url()
         return None
 
     def get_display_name(self, obj):
         """
-        Return only the filename (without path) for cleaner display in UI.
+        Return the file's name as uploaded (without path) for cleaner display in UI.
         """
-        if obj.chitti_file:
-            return obj.chitti_file.name.split('/')[-1]
-        return None
+        return obj.display_name
+
+    def get_thumbnail_url(self, obj):
+        """Absolute URL of the first-page thumbnail (chitti_preview view), once rendered."""
+        if obj.preview is None:
+            return None
+        url = ShipmentYatayat.preview_url(obj.pk, obj.chitti_file.name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_page_count(self, obj):
+        return obj.preview.page_count if obj.preview else None
 
 
 class ShipmentSerializer(serializers.ModelSerializer):
@@ -51,9 +79,18 @@ class ShipmentSerializer(serializers.ModelSerializer):
     Main Serializer for Shipment model.
     Provides a comprehensive API representation of shipment data.
     Nested 'yatayats' are included as read-only fields.
+    Pass `fields=[...]` to serialize only a subset (see resolve_shipment_fields).
     """
     yatayats = ShipmentYatayatSerializer(many=True, read_only=True)
 
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     class Meta:
         model = Shipment
         fields = [
@@ -84,20 +121,260 @@ class ShipmentSerializer(serializers.ModelSerializer):
         Replaces None or empty strings with 'N/A' or 'Pending' based on context.
         """
         data = super().to_representation(instance)
-        
-        # Fields that should return 'N/A' or specific placeholders if empty
-        optional_fields = [
-            'vanshar', 'bank_name', 'bank_ref_no', 'insurance_company',
-            'price_terms', 'payment_terms', 'pp_no', 'currency',
-            'doc_received_date', 'eta_date', 'settlement_date', 
-            'customs_entry_date', 'doc_to_bank'
-        ]
-        
-        for field in optional_fields:
-            if data.get(field) is None or data.get(field) == "":
-                if field == 'settlement_date':
-                    data[field] = "Pending"
-                else:
-                    data[field] = "N/A"
-                
+
+        for field, placeholder in EMPTY_PLACEHOLDERS.items():
+            if field in data and (data[field] is None or data[field] == ""):
+                data[field] = placeholder
+
         return data
+
+
+# Fields that should return 'N/A' or specific placeholders if empty
+EMPTY_PLACEHOLDERS = {
+    field: ("Pending" if field == 'settlement_date' else "N/A")
+    for field in [
+        'vanshar', 'bank_name', 'bank_ref_no', 'insurance_company',
+        'price_terms', 'payment_terms', 'pp_no', 'currency',
+        'doc_received_date', 'eta_date', 'settlement_date',
+        'customs_entry_date', 'doc_to_bank'
+    ]
+}
+
+
+# =========================================================
+# BULK WRITE SERIALIZERS
+# =========================================================
+class ShipmentYatayatBulkSerializer(serializers.ModelSerializer):
+    """
+    A yatayat in a bulk write. Chitti files are uploaded separately
+    (POST /api/v1/chitti-uploads/, see ChittiUploadSerializer).
+    """
+    class Meta:
+        model = ShipmentYatayat
+        fields = ['yatayat']
+
+
+class ShipmentBulkSerializer(serializers.ModelSerializer):
+    """
+    Validates one item of a bulk write (see shipments.bulk).
+    Items with an 'id' update that shipment (only the given fields);
+    items without one create a shipment. 'yatayats' are added to the shipment.
+    Only validates: saving is done in batches by shipments.bulk.
+    """
+    id = serializers.IntegerField(required=False)
+    yatayats = ShipmentYatayatBulkSerializer(many=True, required=False)
+
+    class Meta:
+        model = Shipment
+        fields = [
+            'id',
+            'invoice_no',
+            'applicant',
+            'vanshar',
+            'bank_name',
+            'bank_ref_no',
+            'amount',
+            'currency',
+            'price_terms',
+            'payment_terms',
+            'insurance_company',
+            'pp_no',
+            'dispatch_date',
+            'doc_received_date',
+            'eta_date',
+            'settlement_date',
+            'margin_amount',
+            'margin_date',
+            'customs_entry_date',
+            'doc_to_bank',
+            'yatayats',
+        ]
+        extra_kwargs = {
+            # Uniqueness is checked for the whole batch in one query (shipments.bulk).
+            'invoice_no': {'validators': []},
+            # The same date / amount rules and messages as ShipmentForm (shipments.validators).
+            **{
+                field: {'validators': [shipment_field_validator(field)]}
+                for field in NO_FUTURE_DATE_FIELDS
+            },
+            **{
+                field: {'validators': [shipment_field_validator(field)], 'min_value': None}
+                for field in NON_NEGATIVE_FIELDS
+            },
+        }
+
+
+# =========================================================
+# CHITTI UPLOAD SERIALIZER
+# =========================================================
+class ChittiUploadSerializer(serializers.ModelSerializer):
+    """
+    A resumable chitti upload (see shipments.uploads).
+    Create with filename, size and optionally shipment / yatayat; then PUT
+    the bytes in chunks. 'offset' is where the next chunk starts and
+    'yatayat_record' the yatayat the file was attached to.
+    """
+    yatayat_record = ShipmentYatayatSerializer(source='attached_to', read_only=True)
+
+    class Meta:
+        model = ChittiUpload
+        fields = ['id', 'shipment', 'yatayat', 'filename', 'size', 'offset', 'status', 'yatayat_record']
+        read_only_fields = ['id', 'offset', 'status']
+
+
+# =========================================================
+# SPARSE FIELDSETS
+# =========================================================
+SHIPMENT_FIELDS = ShipmentSerializer.Meta.fields
+
+# '?view=summary': what the list screens need, without the nested yatayats.
+SUMMARY_FIELDS = [
+    'id', 'invoice_no', 'applicant', 'amount', 'currency', 'eta_date', 'settlement_date',
+]
+
+
+def resolve_shipment_fields(params):
+    """
+    Returns the output fields requested by the query parameters, in the
+    serializer's order, or None for all of them.
+    - view=summary: SUMMARY_FIELDS
+    - fields=a,b:   only these (takes precedence over view)
+    - exclude=a,b:  all (or the selected) fields except these
+    Raises ValidationError for unknown field names or views.
+    """
+    view = params.get('view')
+    if view not in (None, '', 'full', 'summary'):
+        raise serializers.ValidationError({'view': "Expected 'full' or 'summary'."})
+
+    selected = set(SUMMARY_FIELDS) if view == 'summary' else None
+
+    for param in ('fields', 'exclude'):
+        names = {name.strip() for name in params.get(param, '').split(',') if name.strip()}
+        unknown = names - set(SHIPMENT_FIELDS)
+        if unknown:
+            raise serializers.ValidationError({param: f"Unknown fields: {', '.join(sorted(unknown))}"})
+        if not names:
+            continue
+        if param == 'fields':
+            selected = names
+        else:
+            selected = (selected or set(SHIPMENT_FIELDS)) - names
+
+    if selected is None:
+        return None
+    return [field for field in SHIPMENT_FIELDS if field in selected]
+
+
+# =========================================================
+# FAST LIST SERIALIZATION
+# =========================================================
+# Shipment columns read by serialize_shipment_rows(), in output order.
+SHIPMENT_VALUE_FIELDS = [f for f in SHIPMENT_FIELDS if f != 'yatayats']
+
+# Always read: keys of the pagination cursor and of the yatayat lookup.
+REQUIRED_VALUE_FIELDS = ('id', 'dispatch_date')
+
+
+def shipment_value_fields(fields=None):
+    """Columns to pass to .values() for serialize_shipment_rows(rows, fields=fields)."""
+    if fields is None:
+        return SHIPMENT_VALUE_FIELDS
+    return [
+        field for field in SHIPMENT_VALUE_FIELDS
+        if field in fields or field in REQUIRED_VALUE_FIELDS
+    ]
+
+DATE_FIELDS = {
+    'dispatch_date', 'doc_received_date', 'eta_date',
+    'settlement_date', 'customs_entry_date', 'doc_to_bank',
+}
+AMOUNT_QUANTUM = Decimal('0.01')
+
+
+def serialize_shipment_rows(rows, request=None, fields=None):
+    """
+    Builds exactly the JSON produced by ShipmentSerializer(many=True, fields=fields),
+    from `.values(*shipment_value_fields(fields))` rows instead of model instances.
+    Nested yatayats come from one extra query for the whole page (skipped when
+    'yatayats' is not requested), and every row is converted in a single pass,
+    without per-field serializer objects.
+    (Verified by 'manage.py benchmark_serializers'.)
+    """
+    rows = list(rows)
+    include_yatayats = fields is None or 'yatayats' in fields
+    if include_yatayats:
+        yatayats = _yatayats_by_shipment([row['id'] for row in rows], request)
+
+    # Precompute how each output field is produced: (name, kind, placeholder)
+    plan = []
+    for field in SHIPMENT_VALUE_FIELDS:
+        if fields is not None and field not in fields:
+            continue
+        if field == 'amount':
+            kind = 'amount'
+        elif field in DATE_FIELDS:
+            kind = 'date'
+        elif field == 'id':
+            kind = 'raw'
+        else:
+            kind = 'str'
+        plan.append((field, kind, EMPTY_PLACEHOLDERS.get(field)))
+
+    data = []
+    for row in rows:
+        item = {}
+        for field, kind, placeholder in plan:
+            value = row[field]
+            if value is not None:
+                if kind == 'date':
+                    value = value.isoformat()
+                elif kind == 'amount':
+                    value = f"{Decimal(value).quantize(AMOUNT_QUANTUM):f}"
+                elif kind == 'str':
+                    value = str(value)
+            if placeholder is not None and (value is None or value == ""):
+                value = placeholder
+            item[field] = value
+        if include_yatayats:
+            item['yatayats'] = yatayats.get(row['id'], [])
+        data.append(item)
+    return data
+
+
+def _yatayats_by_shipment(shipment_ids, request=None):
+    """
+    Returns {shipment_id: [yatayat dict, ...]} shaped like ShipmentYatayatSerializer.
+    """
+    grouped = defaultdict(list)
+
+    yatayat_rows = list(
+        ShipmentYatayat.objects
+        .filter(shipment_id__in=shipment_ids)
+        .order_by('id')
+        .values_list('id', 'shipment_id', 'yatayat', 'chitti_file', 'original_name', 'date_issued')
+    )
+    previews = ChittiPreview.objects.for_files(row[3] for row in yatayat_rows)
+    for pk, shipment_id, yatayat, chitti_file, original_name, date_issued in yatayat_rows:
+        url = display_name = thumbnail_url = page_count = None
+        if chitti_file:
+            url = ShipmentYatayat.file_url(pk, chitti_file)
+            if request:
+                url = request.build_absolute_uri(url)
+            display_name = original_name or chitti_file.split('/')[-1]
+            preview = previews.get(chitti_file)
+            if preview:
+                thumbnail_url = ShipmentYatayat.preview_url(pk, chitti_file)
+                if request:
+                    thumbnail_url = request.build_absolute_uri(thumbnail_url)
+                page_count = preview.page_count
+
+        grouped[shipment_id].append({
+            'id': pk,
+            'yatayat': yatayat or "N/A",
+            'url': url,
+            'display_name': display_name,
+            'date': date_issued.strftime('%Y-%m-%d') if date_issued else None,
+            'thumbnail_url': thumbnail_url,
+            'page_count': page_count,
+        })
+    return grouped
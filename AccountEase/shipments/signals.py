@@ -0,0 +1,249 @@
+import logging
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, pre_save, post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .models import (
+    ROLLUP_SOURCE_FIELDS,
+    ROLLUP_UPDATE_FIELDS,
+    ChittiBlob,
+    ChittiPreview,
+    ExchangeRate,
+    Shipment,
+    ShipmentTombstone,
+    ShipmentYatayat,
+    invalidate_reports,
+    apply_rollup_deltas,
+    rollup_row,
+)
+from .roles import invalidate_all_roles, invalidate_user_roles
+from .authentication import invalidate_token_cache, invalidate_user_tokens, revoke_user_tokens
+from .currency import invalidate_rates
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------
+# Yatayat / Chitti Counts
+# --------------------------
+@receiver(post_save, sender=ShipmentYatayat)
+def update_counts_on_yatayat_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Applies the count change of a saved yatayat to its shipment(s).
+    Runs inside ShipmentYatayat.save()'s transaction.
+    """
+    if raw:
+        return
+
+    current = (instance.shipment_id, instance.has_chitti())
+
+    if created:
+        Shipment.objects.record_yatayat_changes({current[0]: (1, int(current[1]))})
+    elif hasattr(instance, '_loaded_counts'):
+        old_shipment_id, old_has_chitti = instance._loaded_counts
+        if old_shipment_id == current[0]:
+            Shipment.objects.record_yatayat_changes({
+                current[0]: (0, int(current[1]) - int(old_has_chitti)),
+            })
+        else:
+            Shipment.objects.record_yatayat_changes({
+                old_shipment_id: (-1, -int(old_has_chitti)),
+                current[0]: (1, int(current[1])),
+            })
+    else:
+        # Saved without being loaded from the database: previous state unknown.
+        logger.debug(f"Recounting yatayats for shipment {current[0]} (unknown previous state)")
+        Shipment.objects.filter(pk=current[0]).recount_yatayats()
+        Shipment.objects.record_yatayat_changes({current[0]: (0, 0)})
+
+    instance._loaded_counts = current
+
+
+@receiver(post_delete, sender=ShipmentYatayat)
+def update_counts_on_yatayat_delete(sender, instance, **kwargs):
+    """
+    Decrements the shipment counts. Deletes run inside the collector's
+    transaction, including queryset deletes and cascades.
+    """
+    Shipment.objects.record_yatayat_changes({
+        instance.shipment_id: (-1, -int(instance.has_chitti())),
+    })
+
+
+# --------------------------
+# Chitti Blob References
+# --------------------------
+@receiver(post_save, sender=ShipmentYatayat)
+def update_blob_references_on_yatayat_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Moves the yatayat's reference from its previous file to the current one.
+    A blob left without references is collected after the commit.
+    """
+    if raw:
+        return
+
+    current = instance.chitti_file.name or ''
+    if created:
+        ChittiBlob.objects.add_references({current: 1})
+    elif hasattr(instance, '_loaded_chitti'):
+        if instance._loaded_chitti != current:
+            ChittiBlob.objects.add_references({current: 1, instance._loaded_chitti: -1})
+    else:
+        # Saved without being loaded from the database: previous file unknown.
+        ChittiBlob.objects.recount({current})
+
+    instance._loaded_chitti = current
+
+
+@receiver(post_delete, sender=ShipmentYatayat)
+def update_blob_references_on_yatayat_delete(sender, instance, **kwargs):
+    ChittiBlob.objects.add_references({instance.chitti_file.name or '': -1})
+
+
+@receiver(post_delete, sender=ChittiPreview)
+def delete_thumbnail_on_preview_delete(sender, instance, **kwargs):
+    """A collected blob takes its preview along; its thumbnail goes once that commits."""
+    if instance.thumbnail:
+        name, storage = instance.thumbnail.name, instance.thumbnail.storage
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+# --------------------------
+# Sync Tombstones
+# --------------------------
+@receiver(post_delete, sender=Shipment)
+def record_shipment_tombstone(sender, instance, **kwargs):
+    """
+    Leaves a tombstone for the sync API. Runs inside the delete's transaction,
+    so the tombstone exists exactly when the shipment is gone.
+    """
+    ShipmentTombstone.objects.create(
+        shipment_id=instance.pk,
+        invoice_no=instance.invoice_no,
+        created_by_id=instance.created_by_id,
+    )
+
+
+# --------------------------
+# Settlement Rollups / Client Balances / Report Cache
+# --------------------------
+@receiver(pre_save, sender=Shipment)
+def load_rollup_row_before_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    A shipment saved without having been loaded (e.g. Shipment(pk=...).save())
+    has no remembered rollup fields: read them before they are overwritten
+    (None if the row does not exist yet).
+    """
+    if raw or instance.pk is None or hasattr(instance, '_rollup_row'):
+        return
+    if update_fields is not None and not ROLLUP_UPDATE_FIELDS & set(update_fields):
+        return
+    instance._rollup_row = (
+        Shipment.objects.filter(pk=instance.pk).values(*ROLLUP_SOURCE_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=Shipment)
+def update_rollups_on_shipment_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Moves the shipment's contribution from its old rollup and client balance
+    rows to its new ones and marks the cached reports stale. Runs inside
+    Shipment.save()'s transaction.
+    """
+    if raw:
+        return
+    invalidate_reports()
+    if update_fields is not None and not ROLLUP_UPDATE_FIELDS & set(update_fields):
+        return
+
+    old = getattr(instance, '_rollup_row', None)
+    new = rollup_row(instance)
+    apply_rollup_deltas([old] if old else [], [new])
+    instance._rollup_row = new
+
+
+@receiver(post_delete, sender=Shipment)
+def update_rollups_on_shipment_delete(sender, instance, **kwargs):
+    """Deletes run inside the collector's transaction, including queryset deletes."""
+    invalidate_reports()
+    old = getattr(instance, '_rollup_row', None) or rollup_row(instance)
+    apply_rollup_deltas(old_rows=[old])
+
+
+# --------------------------
+# Exchange Rates
+# --------------------------
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def invalidate_rates_on_change(sender, **kwargs):
+    """Cached rates and every converted report are stale once this commits."""
+    transaction.on_commit(invalidate_rates)
+    invalidate_reports()
+
+
+# --------------------------
+# RBAC Role Cache
+# --------------------------
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_roles_on_user_change(sender, instance, action, reverse, **kwargs):
+    """
+    Group membership or direct permissions changed.
+    From the user side only that user is affected; from the group side
+    (group.user_set.add(...)) every member may be, so invalidate all.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        invalidate_all_roles()
+    else:
+        invalidate_user_roles(instance.pk)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_roles_on_group_permissions(sender, action, **kwargs):
+    """A group's permissions changed: every member's roles are stale."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_all_roles()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_roles_on_group_change(sender, **kwargs):
+    """A group was renamed, created or deleted (roles are matched by name)."""
+    invalidate_all_roles()
+
+
+@receiver(post_delete, sender=User)
+def invalidate_roles_on_user_delete(sender, instance, **kwargs):
+    invalidate_user_roles(instance.pk)
+
+
+# --------------------------
+# API Token Cache
+# --------------------------
+@receiver(post_save, sender=User)
+def update_tokens_on_user_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    A new password (reset_password, admin, changepassword) or deactivation
+    revokes the user's API tokens; any other change refreshes their cached
+    copy of the user. Login's last_login update is ignored.
+    """
+    if created or raw or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    # set_password() keeps the raw password in _password until save() returns.
+    if instance._password is not None or not instance.is_active:
+        revoke_user_tokens(instance)
+    else:
+        invalidate_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token_on_delete(sender, instance, **kwargs):
+    invalidate_token_cache(instance.key)
@@ -0,0 +1,128 @@
+import hashlib
+import logging
+import os
+import posixpath
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import models, transaction
+from django.db.models.fields.files import FieldFile
+from django.utils.deconstruct import deconstructible
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def blob_name(directory, digest, extension):
+    """Storage name of a blob: <directory>/ab/cd/<sha256><extension>."""
+    return posixpath.join(directory, digest[:2], digest[2:4], f"{digest}{extension}")
+
+
+def hash_file(path):
+    """(sha256 hex digest, size) of a file, read HASH_CHUNK_SIZE at a time."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+@deconstructible(path='shipments.storage.ContentAddressedStorage')
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage that stores each distinct file once, under its SHA-256
+    digest (see blob_name), inside the field's upload_to directory.
+
+    Uploads are hashed while they are written to a temporary file next to
+    the blobs; a file with a temporary_file_path() (Django's large uploads,
+    finished chunked uploads) is hashed in place and then moved. If the blob
+    already exists the new copy is dropped, and the caller gets the existing
+    name back.
+
+    Every blob has a ChittiBlob row counting the yatayats that use it
+    (maintained by shipments.signals and ShipmentYatayatQuerySet). The row is
+    locked from the moment a save resolves to the blob until the saving
+    transaction commits, so the garbage collector (ChittiBlobQuerySet.collect)
+    can't delete a blob that is about to gain a reference.
+    A new blob also gets a pending ChittiPreview.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is chosen by _save() from the content.
+        return name
+
+    def _save(self, name, content):
+        from .models import ChittiBlob, ChittiPreview
+
+        directory = posixpath.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        source, digest, size = self._stage(directory, content)
+
+        with transaction.atomic():
+            blob, created = ChittiBlob.objects.select_for_update().get_or_create(
+                digest=digest,
+                defaults={'name': blob_name(directory, digest, extension), 'size': size},
+            )
+            path = self.path(blob.name)
+            if os.path.exists(path):
+                os.remove(source)
+                logger.debug(f"Chitti blob reused | Digest={digest} | Size={size}")
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if self.directory_permissions_mode is not None:
+                    os.chmod(os.path.dirname(path), self.directory_permissions_mode)
+                file_move_safe(source, path, allow_overwrite=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(path, self.file_permissions_mode)
+                logger.debug(f"Chitti blob stored | Digest={digest} | Size={size}")
+            if created:
+                # Rendered later by the preview worker, never in the request.
+                ChittiPreview.objects.queue([blob])
+        return blob.name
+
+    def _stage(self, directory, content):
+        """
+        Returns (path of a file holding the content, digest, size). The file
+        is the content's own temporary file when it has one, otherwise a new
+        one in <directory>/.incoming written while hashing.
+        """
+        if hasattr(content, 'temporary_file_path'):
+            path = content.temporary_file_path()
+            return (path, *hash_file(path))
+
+        incoming = self.path(posixpath.join(directory, '.incoming'))
+        os.makedirs(incoming, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=incoming, suffix='.part', delete=False) as staged:
+            try:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    staged.write(chunk)
+                    size += len(chunk)
+            except BaseException:
+                os.remove(staged.name)
+                raise
+        return staged.name, digest.hexdigest(), size
+
+
+class ChittiFieldFile(FieldFile):
+    """
+    Keeps the name a file was uploaded under in the instance's
+    `original_name` before the storage renames it to its digest.
+    """
+
+    def save(self, name, content, save=True):
+        self.instance.original_name = os.path.basename(name)[:255]
+        super().save(name, content, save)
+
+
+class ChittiFileField(models.FileField):
+    """FileField for content-addressed files; the model must have an `original_name` field."""
+    attr_class = ChittiFieldFile
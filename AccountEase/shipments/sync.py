@@ -0,0 +1,116 @@
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------
+# Sync Tokens
+# --------------------------
+# A token is the UTC time, in epoch microseconds, from which the next sync
+# must look for changes. It is always "query time - overlap", never the
+# newest 'updated_at' seen, because:
+# - 'updated_at' is stamped by the app server before the transaction commits,
+#   so a slow transaction can become visible after rows stamped later;
+# - app servers' clocks may disagree by a few seconds.
+# Re-sending the overlap window on every sync makes both cases safe; clients
+# upsert by id, so receiving a shipment twice is harmless.
+#
+# The exception is a page cut short by SHIPMENT_SYNC_PAGE_SIZE: its token is
+# "<epoch microseconds>:<id>", the (updated_at, id) of its last row, and the
+# next page starts right after that row. The last page of a catch-up gets an
+# ordinary token again, whose overlap covers what committed late meanwhile.
+
+def encode_token(moment, after_id=None):
+    """Returns the sync token for a datetime (and the id of the last row sent at it)."""
+    delta = moment - datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+    micros = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return f"{micros}:{after_id}" if after_id is not None else str(micros)
+
+
+def decode_token(token):
+    """
+    Returns (datetime, id or None) of a sync token.
+    Raises ValueError for a malformed token.
+    """
+    micros, _, after_id = token.partition(':')
+    micros = int(micros)
+    after_id = int(after_id) if after_id else None
+    if micros < 0 or (after_id is not None and after_id < 0):
+        raise ValueError("Negative sync token")
+    return datetime(1970, 1, 1, tzinfo=dt_timezone.utc) + timedelta(microseconds=micros), after_id
+
+
+def next_token(now=None):
+    """Token to hand out with a response built at `now`."""
+    now = now or timezone.now()
+    return encode_token(now - timedelta(seconds=settings.SHIPMENT_SYNC_OVERLAP_SECONDS))
+
+
+def tombstone_horizon(now=None):
+    """Tombstones older than this are pruned, so older tokens need a full resync."""
+    now = now or timezone.now()
+    return now - timedelta(days=settings.SHIPMENT_TOMBSTONE_RETENTION_DAYS)
+
+
+# --------------------------
+# Changes
+# --------------------------
+def changes_since(queryset, tombstones, since, fields, after_id=None):
+    """
+    Returns (changed_rows, deleted_ids, full_resync, has_more, token).
+
+    - since=None or older than the tombstone retention: full_resync is True
+      and no changes are returned; the client reloads the full list and keeps
+      the returned token for its next sync.
+    - otherwise: `.values(*fields)` of the shipments in `queryset` changed
+      after `since` (after the row `after_id` at that time), in (updated_at, id)
+      order, at most SHIPMENT_SYNC_PAGE_SIZE of them; and the ids of the
+      `tombstones` (the deletions the user may see) recorded after `since`.
+      has_more is True when the page was full: the client syncs again with
+      the returned token right away.
+
+    The token is taken before anything is read, and tombstones are read after
+    the shipments, so a delete racing with this call is reported as deleted.
+    """
+    now = timezone.now()
+    token = next_token(now)
+
+    if since is None or since < tombstone_horizon(now):
+        return [], [], True, False, token
+
+    changed = Q(updated_at__gt=since)
+    if after_id is not None:
+        changed |= Q(updated_at=since, id__gt=after_id)
+    page_size = settings.SHIPMENT_SYNC_PAGE_SIZE
+    rows = list(
+        queryset.filter(changed).order_by('updated_at', 'id').values('updated_at', *fields)[:page_size + 1]
+    )
+    has_more = len(rows) > page_size
+    if has_more:
+        rows = rows[:page_size]
+        token = encode_token(rows[-1]['updated_at'], rows[-1]['id'])
+    for row in rows:
+        if 'updated_at' not in fields:
+            del row['updated_at']
+    deleted = _deleted_ids_since(tombstones, since)
+
+    logger.debug(
+        f"Shipment sync | Since={since.isoformat()} | Changed={len(rows)} | Deleted={len(deleted)} | More={has_more}"
+    )
+    return rows, deleted, False, has_more, token
+
+
+def _deleted_ids_since(tombstones, since):
+    return list(
+        tombstones
+        .filter(deleted_at__gt=since)
+        .order_by()
+        .values_list('shipment_id', flat=True)
+        .distinct()
+    )
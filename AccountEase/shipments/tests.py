@@ -0,0 +1,179 @@
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .downloads import parse_range
+from .models import ChittiBlob, ChittiPreview, Shipment, ShipmentYatayat
+from .serializers import (
+    ShipmentSerializer,
+    resolve_shipment_fields,
+    serialize_shipment_rows,
+    shipment_value_fields,
+)
+from .sync import encode_token
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='accountease-tests-')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SerializeShipmentRowsTests(TestCase):
+    """
+    serialize_shipment_rows() must return exactly what ShipmentSerializer
+    returns for the same shipments: the API answers with either one.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user('parity', password='pw12345!')
+        common = {
+            'applicant': 'Parity Traders',
+            'bank_name': 'Nabil',
+            'price_terms': 'LC',
+            'payment_terms': 'CIF',
+            'created_by': user,
+        }
+        settled = Shipment.objects.create(
+            invoice_no='PAR-001', amount=Decimal('1250.50'), currency='$',
+            dispatch_date=date(2026, 1, 5), eta_date=date(2026, 1, 20),
+            settlement_date=date(2026, 2, 1), vanshar='Birgunj', pp_no='PP-1', **common,
+        )
+        pending = Shipment.objects.create(
+            invoice_no='PAR-002', amount=Decimal('99'), currency='₹',
+            dispatch_date=date(2026, 1, 5), bank_ref_no='', **common,
+        )
+        Shipment.objects.create(
+            invoice_no='PAR-003', amount=Decimal('0.10'), currency='रु ',
+            dispatch_date=date(2026, 3, 9), doc_received_date=date(2026, 3, 10), **common,
+        )
+
+        # A yatayat without a file, one with a file and one with a rendered preview.
+        ShipmentYatayat.objects.create(shipment=settled, yatayat='Mechi')
+        with_file = ShipmentYatayat(shipment=settled)
+        with_file.chitti_file.save('bill of lading.pdf', ContentFile(b'%PDF-1.4 one'), save=True)
+        previewed = ShipmentYatayat(shipment=pending, yatayat='Koshi')
+        previewed.chitti_file.save('invoice.pdf', ContentFile(b'%PDF-1.4 two'), save=True)
+        ChittiPreview.objects.filter(blob=ChittiBlob.objects.get(name=previewed.chitti_file.name)).update(
+            status=ChittiPreview.Status.DONE, page_count=2, thumbnail='chitti_previews/test.png'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def assertParity(self, params):
+        request = RequestFactory().get('/api/v1/shipments/', params)
+        fields = resolve_shipment_fields(params)
+        queryset = Shipment.objects.order_by('-dispatch_date', '-id')
+
+        expected = ShipmentSerializer(
+            queryset.prefetch_related('yatayats'), many=True, context={'request': request}, fields=fields
+        ).data
+        actual = serialize_shipment_rows(queryset.values(*shipment_value_fields(fields)), request, fields)
+
+        self.assertEqual(len(actual), 3)
+        self.assertEqual(actual, expected)
+        # Same JSON, key order included.
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+        return actual
+
+    def test_full_view(self):
+        data = self.assertParity({})
+        yatayats = {row['invoice_no']: row['yatayats'] for row in data}
+        self.assertEqual(len(yatayats['PAR-001']), 2)
+        self.assertEqual(yatayats['PAR-002'][0]['page_count'], 2)
+        self.assertEqual(yatayats['PAR-003'], [])
+
+    def test_summary_view(self):
+        data = self.assertParity({'view': 'summary'})
+        self.assertNotIn('yatayats', data[0])
+
+    def test_selected_fields(self):
+        data = self.assertParity({'fields': 'invoice_no,settlement_date,eta_date,yatayats'})
+        self.assertEqual(list(data[0]), ['invoice_no', 'eta_date', 'settlement_date', 'yatayats'])
+
+
+@override_settings(SHIPMENT_SYNC_PAGE_SIZE=2)
+class ShipmentSyncTests(TestCase):
+    """GET /api/v1/shipments/sync/: paging through a backlog, and whose deletions are reported."""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = get_user_model().objects
+        cls.owner = users.create_user('owner', password='pw12345!')
+        cls.other = users.create_user('other', password='pw12345!')
+        cls.staff = users.create_user('staff', password='pw12345!', is_staff=True)
+
+        def shipment(number, user):
+            return Shipment.objects.create(
+                invoice_no=f"SYNC-{number:03}", applicant='Sync Traders', bank_name='NIC', amount=Decimal('10'),
+                currency='$', price_terms='TT', payment_terms='FOB', dispatch_date=date(2026, 1, 1),
+                created_by=user,
+            )
+
+        cls.own = [shipment(number, cls.owner) for number in range(5)]
+        cls.others = [shipment(number, cls.other) for number in range(5, 7)]
+
+    def sync(self, user, since):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/api/v1/shipments/sync/', {'since': since, 'view': 'summary'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_pages_until_caught_up(self):
+        # A bulk write stamps many rows with the same time: pages must not skip any.
+        stamp = timezone.now()
+        Shipment.objects.update(updated_at=stamp)
+        since = encode_token(stamp - timedelta(minutes=1))
+
+        received, pages = [], 0
+        while True:
+            data = self.sync(self.owner, since)
+            received += [row['id'] for row in data['shipments']]
+            since = data['since']
+            pages += 1
+            if not data['has_more']:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(received, [s.pk for s in self.own])
+
+    def test_deletions_are_scoped_like_shipments(self):
+        since = encode_token(timezone.now() - timedelta(minutes=1))
+        own_id, other_id = self.own[0].pk, self.others[0].pk
+        self.own[0].delete()
+        self.others[0].delete()
+
+        self.assertEqual(self.sync(self.owner, since)['deleted'], [own_id])
+        self.assertCountEqual(self.sync(self.staff, since)['deleted'], [own_id, other_id])
+
+
+class ParseRangeTests(SimpleTestCase):
+    """parse_range(): which Range headers get 206, 416, or the whole file."""
+
+    def test_satisfiable(self):
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=900-', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=900-5000', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-5000', 1000), (0, 999))
+
+    def test_ignored(self):
+        for header in (None, '', 'bytes=500-200', 'bytes=-', 'bytes=0-1,5-9', 'items=0-9', 'bytes=a-b'):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, 1000))
+
+    def test_not_satisfiable(self):
+        for header, size in (('bytes=1000-', 1000), ('bytes=2000-3000', 1000), ('bytes=-0', 1000), ('bytes=-10', 0)):
+            with self.subTest(header=header, size=size):
+                with self.assertRaises(ValueError):
+                    parse_range(header, size)
@@ -0,0 +1,239 @@
+import logging
+import os
+import re
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChittiUpload, ShipmentYatayat
+from .validators import MAX_CHITTI_SIZE
+
+logger = logging.getLogger(__name__)
+
+PDF_MAGIC = b'%PDF-'
+READ_SIZE = 64 * 1024
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadConflict(Exception):
+    """A chunk that doesn't start at the upload's offset; args[0] is the offset."""
+
+
+def chunk_size():
+    """Largest chunk accepted per request (clients may send smaller ones)."""
+    return getattr(settings, 'CHITTI_UPLOAD_CHUNK_SIZE', 1024 * 1024)
+
+
+def part_path(upload):
+    return os.path.join(settings.CHITTI_UPLOAD_DIR, f"{upload.pk.hex}.part")
+
+
+class PartFile(File):
+    """
+    An upload's assembled part file. FileSystemStorage moves a file that has
+    a temporary_file_path() into place instead of copying it.
+    """
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+# --------------------------
+# Upload Lifecycle
+# --------------------------
+def start_upload(user, filename, size, shipment=None, yatayat=None):
+    """
+    Registers an upload of `size` bytes and creates its empty part file.
+    With a shipment the file becomes a new yatayat of it when complete;
+    without one it waits for the shipment form (see ShipmentYatayatForm).
+    Raises ValidationError with the same messages as validate_chitti_file.
+    """
+    if not filename.lower().endswith('.pdf'):
+        raise ValidationError("Only PDF files are allowed.")
+    if size > MAX_CHITTI_SIZE:
+        raise ValidationError("File size must not exceed 5 MB.")
+    if size < len(PDF_MAGIC):
+        raise ValidationError("The file is empty or not a PDF.")
+
+    upload = ChittiUpload.objects.create(
+        created_by=user,
+        shipment=shipment,
+        yatayat=yatayat or None,
+        filename=os.path.basename(filename)[:255],
+        size=size,
+    )
+    os.makedirs(settings.CHITTI_UPLOAD_DIR, exist_ok=True)
+    open(part_path(upload), 'wb').close()
+
+    logger.info(f"Chitti upload started | ID={upload.pk} | Size={size} | Shipment={upload.shipment_id} | User={user}")
+    return upload
+
+
+def parse_content_range(header):
+    """(first, last, total) of a 'Content-Range: bytes first-last/total' header."""
+    match = CONTENT_RANGE_RE.match((header or '').strip())
+    if not match:
+        raise ValidationError("Send the chunk's position as 'Content-Range: bytes <first>-<last>/<size>'.")
+    first, last, total = (int(value) for value in match.groups())
+    if last < first:
+        raise ValidationError("Invalid Content-Range.")
+    return first, last, total
+
+
+def write_chunk(upload, first, last, stream):
+    """
+    Writes bytes first..last (inclusive) read from `stream` to the part file,
+    READ_SIZE at a time, so no chunk is ever held in memory.
+    The chunk must start at upload.offset (UploadConflict otherwise): a
+    client that resumes after a dropped connection first asks for the offset.
+    The first chunk must start with the PDF signature.
+    The offset only advances once the whole chunk is on disk, and only if
+    no other request advanced it meanwhile, so a retried chunk is harmless.
+    Returns the upload, attached when this was the last chunk.
+    """
+    length = last - first + 1
+    if upload.status != ChittiUpload.Status.UPLOADING:
+        raise UploadConflict(upload.offset)
+    if first != upload.offset:
+        raise UploadConflict(upload.offset)
+    if last >= upload.size:
+        raise ValidationError("The chunk ends past the declared file size.")
+    if length > chunk_size():
+        raise ValidationError(f"Chunks must not exceed {chunk_size()} bytes.")
+
+    received = 0
+    try:
+        with open(part_path(upload), 'r+b') as part:
+            part.seek(first)
+            while received < length:
+                data = stream.read(min(READ_SIZE, length - received))
+                if not data:
+                    break
+                if first == 0 and received == 0 and not data.startswith(PDF_MAGIC):
+                    discard_upload(upload)
+                    raise ValidationError("Only PDF files are allowed.")
+                part.write(data)
+                received += len(data)
+    except FileNotFoundError:
+        raise ValidationError("This upload has expired; start it again.")
+
+    if received != length:
+        raise ValidationError(f"Incomplete chunk: received {received} of {length} bytes.")
+
+    advanced = ChittiUpload.objects.filter(
+        pk=upload.pk, offset=first, status=ChittiUpload.Status.UPLOADING
+    ).update(offset=first + length, updated_at=timezone.now())
+    if not advanced:
+        upload.refresh_from_db()
+        raise UploadConflict(upload.offset)
+    upload.offset = first + length
+
+    if upload.offset == upload.size:
+        finish_upload(upload)
+    return upload
+
+
+def finish_upload(upload):
+    """Attaches a fully received upload to its shipment, or marks it COMPLETE for the form."""
+    if upload.shipment_id:
+        attach_upload(upload, ShipmentYatayat(shipment_id=upload.shipment_id, yatayat=upload.yatayat))
+    else:
+        ChittiUpload.objects.filter(pk=upload.pk).update(status=ChittiUpload.Status.COMPLETE)
+        upload.status = ChittiUpload.Status.COMPLETE
+    logger.info(f"Chitti upload finished | ID={upload.pk} | Status={upload.status}")
+
+
+def attach_upload(upload, yatayat):
+    """
+    Saves `yatayat` with the upload's file as its chitti, moving the part
+    file into the chitti storage, and marks the upload ATTACHED.
+    """
+    with transaction.atomic():
+        with PartFile(open(part_path(upload), 'rb'), name=upload.filename) as content:
+            yatayat.chitti_file = content
+            yatayat.save()
+        upload.status = ChittiUpload.Status.ATTACHED
+        upload.attached_to = yatayat
+        upload.save(update_fields=['status', 'attached_to', 'updated_at'])
+    return yatayat
+
+
+def completed_upload(pk, user):
+    """
+    A COMPLETE upload started from the shipment form by `user`, as a
+    PartFile to assign to ShipmentYatayat.chitti_file, or None when it
+    doesn't exist (any more). Its `upload` attribute is the ChittiUpload.
+    """
+    upload = ChittiUpload.objects.filter(
+        pk=pk, created_by=user, shipment__isnull=True, status=ChittiUpload.Status.COMPLETE
+    ).first()
+    if upload is None or not os.path.exists(part_path(upload)):
+        return None
+    content = PartFile(open(part_path(upload), 'rb'), name=upload.filename)
+    content.upload = upload
+    return content
+
+
+def mark_attached(yatayat_forms):
+    """
+    After the shipment form saved its yatayats: marks the uploads they were
+    given (ShipmentYatayatForm.upload) ATTACHED and closes the part files.
+    """
+    for form in yatayat_forms:
+        content = getattr(form, 'upload', None)
+        if content is None:
+            continue
+        content.close()
+        if form.instance.pk:
+            ChittiUpload.objects.filter(pk=content.upload.pk).update(
+                status=ChittiUpload.Status.ATTACHED, attached_to=form.instance, updated_at=timezone.now()
+            )
+
+
+def discard_upload(upload):
+    """Deletes an upload and its part file."""
+    path = part_path(upload)
+    upload.delete()
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# --------------------------
+# Expiry
+# --------------------------
+def purge_uploads(max_age=None):
+    """
+    Deletes uploads untouched for `max_age` (default CHITTI_UPLOAD_EXPIRY_HOURS)
+    and the part files left without an upload (e.g. its shipment was deleted).
+    Attached uploads are only a record by then and go too.
+    Returns (uploads deleted, part files removed).
+    """
+    max_age = max_age or timedelta(hours=settings.CHITTI_UPLOAD_EXPIRY_HOURS)
+    cutoff = timezone.now() - max_age
+
+    stale = ChittiUpload.objects.filter(updated_at__lt=cutoff)
+    deleted, _ = stale.delete()
+
+    removed = 0
+    directory = settings.CHITTI_UPLOAD_DIR
+    if os.path.isdir(directory):
+        live = {pk.hex for pk in ChittiUpload.objects.values_list('pk', flat=True)}
+        oldest = time.time() - max_age.total_seconds()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                stem, extension = os.path.splitext(entry.name)
+                if extension != '.part' or stem in live or entry.stat().st_mtime >= oldest:
+                    continue
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+    return deleted, removed
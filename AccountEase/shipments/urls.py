@@ -3,6 +3,8 @@ from django.contrib.auth.views import LogoutView
 
 from .views import (
     ShipmentListView,
+    ShipmentRowsView,
+    ShipmentExportView,
     ShipmentCreateView,
     ShipmentUpdateView,
     ShipmentDeleteView,
@@ -10,6 +12,8 @@ from .views import (
     ReportsView,
     ClientsView,
     get_chitti_files,
+    chitti_file,
+    chitti_preview,
 )
 
 
@@ -21,6 +25,8 @@ urlpatterns = [
     # Shipment CRUD
     # ------------------------------
     path('', ShipmentListView.as_view(), name='shipment_list'),
+    path('rows/', ShipmentRowsView.as_view(), name='shipment_rows'),
+    path('export/', ShipmentExportView.as_view(), name='shipment_export'),
     path('add/', ShipmentCreateView.as_view(), name='add_shipment'),
     path('edit/<int:pk>/', ShipmentUpdateView.as_view(), name='edit_shipment'),
     path('delete/<int:pk>/', ShipmentDeleteView.as_view(), name='delete_shipment'),
@@ -33,6 +39,8 @@ urlpatterns = [
         get_chitti_files,
         name='get_chitti_files'
     ),
+    path('chitti/<int:pk>/<str:filename>', chitti_file, name='chitti_file'),
+    path('chitti/<int:pk>/<str:filename>/preview', chitti_preview, name='chitti_preview'),
 
     # ------------------------------
     # Pages
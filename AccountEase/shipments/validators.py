@@ -0,0 +1,72 @@
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+# =========================================================
+# SHIPMENT FIELD RULES
+# =========================================================
+# Shared by ShipmentForm, the bulk API serializer and the import command,
+# so every write path enforces the same rules with the same messages.
+
+# Dates that cannot be in the future: {field: label used in the message}
+NO_FUTURE_DATE_FIELDS = {
+    'dispatch_date': "Dispatch date",
+    'doc_received_date': "Document received date",
+    'customs_entry_date': "Customs entry date",
+    'doc_to_bank': "Document to bank date",
+    'margin_date': "Margin date",
+}
+
+# Amounts that cannot be negative: {field: label used in the message}
+NON_NEGATIVE_FIELDS = {
+    'amount': "Amount",
+    'margin_amount': "Margin amount",
+}
+
+MAX_CHITTI_SIZE = 5 * 1024 * 1024  # 5 MB
+
+
+def validate_not_future(value, label):
+    """Ensure a date is not in the future."""
+    if value and value > timezone.now().date():
+        raise ValidationError(f"{label} cannot be in the future.")
+    return value
+
+
+def validate_non_negative(value, label):
+    """Ensure an amount is non-negative."""
+    if value is not None and value < 0:
+        raise ValidationError(f"{label} cannot be negative.")
+    return value
+
+
+def validate_shipment_field(field, value):
+    """
+    Applies the rule registered for `field` (if any) and returns the value.
+    Raises ValidationError with the same message as ShipmentForm.
+    """
+    if field in NO_FUTURE_DATE_FIELDS:
+        return validate_not_future(value, NO_FUTURE_DATE_FIELDS[field])
+    if field in NON_NEGATIVE_FIELDS:
+        return validate_non_negative(value, NON_NEGATIVE_FIELDS[field])
+    return value
+
+
+def shipment_field_validator(field):
+    """Returns a single-argument validator applying the rule of `field`."""
+    def validator(value):
+        validate_shipment_field(field, value)
+    return validator
+
+
+def validate_chitti_file(file):
+    """
+    Validate a chitti upload:
+    - Max size: 5MB
+    - File type: PDF only
+    """
+    if file:
+        if file.size > MAX_CHITTI_SIZE:
+            raise ValidationError("File size must not exceed 5 MB.")
+        if not file.name.lower().endswith('.pdf'):
+            raise ValidationError("Only PDF files are allowed.")
+    return file
@@ -1,4 +1,5 @@
 import logging
+import os
 from datetime import timedelta
 
 from django.views.generic import (
@@ -12,17 +13,34 @@ from django.contrib.auth.mixins import (
     UserPassesTestMixin
 )
 from django.contrib import messages
-from django.db.models import Count, Q
+from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
 from django.db import transaction
-from django.http import JsonResponse
+from django.db.models import Count, Sum
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
 from django.core.mail import send_mail
 from django.conf import settings
 from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
 
-from .models import Shipment, Ticket, ShipmentYatayat
+from .models import (
+    HAS_CHITTI, Client, ClientAlias, Shipment, Ticket, ShipmentYatayat, attach_previews, normalize_client_name
+)
 from .forms import ShipmentForm, TicketForm, ShipmentYatayatFormSet
 from shipments.mixins import RBACContextMixin
+from .roles import get_roles
+from .pagination import KeysetPaginator, parse_cursor
+from .filters import FILTER_PARAMS, filter_shipments, get_active_filters
+from .row_cache import render_shipment_rows
+from .conditional import csrf_variant, shipment_validators, not_modified, set_validators
+from .exports import build_xlsx, stream_csv
+from .rollups import DEFAULT_REPORT_PERIOD, REPORT_PERIODS, build_report
+from .reports import AGEING_BASES, DEFAULT_AGEING_BASIS, ageing_report
+from .analytics import DEFAULT_GROUPING, GROUPINGS, turnaround_report
+from .currency import npr_amount, rates_version, to_npr, unconverted_count
+from .downloads import download_user, login_required_response, serve_file, set_download_cache_headers
+from .uploads import mark_attached
 
 logger = logging.getLogger(__name__)
 
@@ -45,25 +63,23 @@ class ShipmentListView(LoginRequiredMixin, RBACContextMixin, ListView):
     Displays a list of shipments.
     - Staff/Admin users see all shipments (Administrator View).
     - Regular users see only their own shipments (User View).
+    Results are keyset-paginated on '-id' so each page costs the same
+    regardless of how many shipments exist.
     """
     model = Shipment
     context_object_name = 'shipments'
+    page_size = 50
 
     def get_queryset(self):
         """
-        Returns the queryset based on user permissions.
-        Annotates 'chitti_count' to track related files.
+        Returns the queryset based on user permissions and the
+        search/filter query parameters (see shipments.filters).
+        'chitti_count' is a stored column, so no per-request aggregation is needed.
+        Yatayats are prefetched later, only for rows missing from the row cache.
         """
         try:
-            user = self.request.user
-            qs = Shipment.objects.annotate(
-                chitti_count=Count('yatayats', filter=Q(yatayats__chitti_file__isnull=False) & ~Q(yatayats__chitti_file=''))
-            ).prefetch_related('yatayats').order_by('-id')
-
-            if user.is_staff or user.has_perm('shipments.view_shipment'):
-                return qs
-
-            return qs.filter(created_by=user)
+            qs = Shipment.objects.order_by('-id').visible_to(self.request.user)
+            return filter_shipments(qs, self.request.GET)
 
         except Exception:
             logger.error(
@@ -72,16 +88,89 @@ class ShipmentListView(LoginRequiredMixin, RBACContextMixin, ListView):
             )
             raise
 
+    def get(self, request, *args, **kwargs):
+        """
+        Answers 304 Not Modified when the browser's copy is still current.
+        The ETag covers the rows this user can see, the layout, the
+        query string, the exchange rates (filtered pages show an NPR
+        total) and the CSRF secret (the page embeds a token), so only a
+        cheap aggregate query runs on a match.
+        """
+        etag, last_modified = shipment_validators(
+            request,
+            self.get_queryset(),
+            f"user:{request.user.pk}",
+            self.has_admin_layout(),
+            get_roles(request.user).can_edit,
+            rates_version(),
+            csrf_variant(request),
+        )
+
+        response = not_modified(request, etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        return set_validators(response, etag, last_modified)
+
+    def has_admin_layout(self):
+        """
+        Returns True if the user should get the administrator table (with actions).
+        """
+        user = self.request.user
+        return user.is_staff or get_roles(user).has_perm('shipments.change_shipment')
+
     def get_template_names(self):
         """
         Selects template based on user role to show appropriate UI.
         """
-        if self.request.user.is_staff or self.request.user.has_perm('shipments.change_shipment'):
+        if self.has_admin_layout():
             return ['shipments/admin_list.html']
         return ['shipments/user_list.html']
 
+    def get_row_offset(self):
+        """
+        Number of rows shown on earlier pages; only used for the '#' column.
+        """
+        try:
+            return max(int(self.request.GET.get('offset', 0)), 0)
+        except (TypeError, ValueError):
+            return 0
+
+    def is_continuation(self):
+        """True for a page after (or before) the first: it has a cursor or an offset."""
+        return any(self.request.GET.get(key) for key in ('after', 'before', 'offset'))
+
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+        page = KeysetPaginator(self.object_list, self.page_size).page(
+            after=parse_cursor(self.request.GET.get('after')),
+            before=parse_cursor(self.request.GET.get('before')),
+        )
+        context = super().get_context_data(object_list=page.object_list, **kwargs)
+
+        row_offset = self.get_row_offset() if page.has_previous else 0
+        context['page'] = page
+        context['row_offset'] = row_offset
+        context['next_offset'] = row_offset + len(page)
+        context['previous_offset'] = max(row_offset - self.page_size, 0)
+        context['show_actions'] = self.has_admin_layout()
+        context['rows'] = render_shipment_rows(
+            page.object_list,
+            variant='admin' if context['show_actions'] else 'user',
+            can_edit=context['can_edit'],
+        )
+        context['filters'] = {key: self.request.GET.get(key, '') for key in FILTER_PARAMS}
+        context['filtering'] = bool(get_active_filters(self.request.GET))
+        if context['filtering'] and not self.is_continuation():
+            # Only counted when filtering, so the cost follows the result set size,
+            # and only for the first page: 'Load more' keeps the count it has.
+            # The NPR total is converted by the database in the same query; rows
+            # without a rate are counted, so a partial total is never shown as whole.
+            totals = self.object_list.aggregate(
+                count=Count('pk'), total_npr=Sum(npr_amount()), unconverted=unconverted_count()
+            )
+            context['result_count'] = totals['count']
+            context['result_total_npr'] = totals['total_npr']
+            context['result_unconverted'] = totals['unconverted']
         context['header'] = (
             "All Shipments (Administrator View)"
             if self.request.user.is_staff
@@ -90,6 +179,72 @@ class ShipmentListView(LoginRequiredMixin, RBACContextMixin, ListView):
         return context
 
 
+class ShipmentRowsView(ShipmentListView):
+    """
+    Returns only the table rows for a page of shipments.
+    Used by the "Load more" button and by the search/filter bar, which swaps
+    the table body with this fragment. The cursor for the following page is
+    sent in the 'X-Next-Cursor' header (empty when there are no more rows).
+    On the first page of a filtered list the matching total is sent in
+    'X-Result-Count', the amounts converted to NPR in 'X-Result-Total-NPR'
+    and the number of rows left out of it (no exchange rate) in
+    'X-Result-Unconverted'.
+    """
+
+    def get_template_names(self):
+        return ['shipments/shipment_rows.html']
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        response['X-Next-Cursor'] = context['page'].next_cursor or ''
+        response['X-Next-Offset'] = context['next_offset']
+        if 'result_count' in context:
+            response['X-Result-Count'] = context['result_count']
+            response['X-Result-Total-NPR'] = (
+                f"{context['result_total_npr']:.2f}" if context['result_total_npr'] is not None else ''
+            )
+            response['X-Result-Unconverted'] = context['result_unconverted']
+        return response
+
+
+class ShipmentExportView(ShipmentListView):
+    """
+    Downloads the shipments matching the list's filters (and visible to the
+    user) as CSV, or as XLSX with '?format=xlsx'.
+    The CSV is streamed row by row while it is read from the database;
+    see shipments.exports.
+    """
+    XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        export_format = request.GET.get('format', 'csv')
+        filename = f"shipments-{timezone.localdate():%Y-%m-%d}"
+
+        logger.info(f"Shipment export | Format={export_format} | User={request.user}")
+
+        if export_format == 'xlsx':
+            try:
+                output = build_xlsx(queryset)
+            except ImportError:
+                logger.error("XLSX export failed: openpyxl is not installed")
+                messages.error(request, "Excel export is not available. Please export as CSV.")
+                query = request.GET.copy()
+                query.pop('format', None)
+                return redirect(f"{reverse_lazy('shipments:shipment_list')}?{query.urlencode()}")
+
+            return FileResponse(
+                output,
+                as_attachment=True,
+                filename=f"{filename}.xlsx",
+                content_type=self.XLSX_CONTENT_TYPE,
+            )
+
+        response = StreamingHttpResponse(stream_csv(queryset), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+        return response
+
+
 # --------------------
 # CREATE SHIPMENT
 # --------------------
@@ -118,7 +273,8 @@ class ShipmentCreateView(
             context['yatayat_formset'] = ShipmentYatayatFormSet(
                 self.request.POST,
                 self.request.FILES,
-                prefix='yatayat'
+                prefix='yatayat',
+                form_kwargs={'user': self.request.user}
             )
         else:
             context['yatayat_formset'] = ShipmentYatayatFormSet(prefix='yatayat')
@@ -149,6 +305,7 @@ class ShipmentCreateView(
                 for yatayat in yatayats:
                     yatayat.shipment = self.object
                     yatayat.save()
+                mark_attached(yatayat_formset.forms)
 
             logger.info(
                 f"Shipment created | ID={self.object.id} | User={self.request.user}"
@@ -193,7 +350,8 @@ class ShipmentUpdateView(
                 self.request.POST,
                 self.request.FILES,
                 instance=self.object,
-                prefix='yatayat'
+                prefix='yatayat',
+                form_kwargs={'user': self.request.user}
             )
         else:
             context['yatayat_formset'] = ShipmentYatayatFormSet(
@@ -220,6 +378,7 @@ class ShipmentUpdateView(
                 for yatayat in yatayats:
                     yatayat.shipment = self.object
                     yatayat.save()
+                mark_attached(yatayat_formset.forms)
 
             logger.info(
                 f"Shipment updated | ID={self.object.id} | User={self.request.user}"
@@ -373,26 +532,35 @@ class HelpLineView(LoginRequiredMixin, RBACContextMixin, FormView):
 # --------------------
 # AJAX: CHITTI FILES
 # --------------------
+@login_required
 def get_chitti_files(request, shipment_id):
     """
     AJAX handler to fetch attached files (chitti) for a specific shipment.
-    Returns JSON response containing file URLs and details.
+    Returns JSON response containing file URLs and details, with the
+    first-page thumbnail and page count once they have been rendered.
+    Only shipments the user may see are answered (404 otherwise); the URLs
+    point at chitti_file, which checks the same.
     """
     try:
-        shipment = get_object_or_404(Shipment, id=shipment_id)
+        shipment = get_object_or_404(Shipment.objects.visible_to(request.user), id=shipment_id)
         
         files_data = []
-        for yatayat in shipment.yatayats.all():
-            if yatayat.chitti_file:
-                files_data.append({
-                    'display_name': yatayat.chitti_file.name.split('/')[-1],
-                    'url': yatayat.chitti_file.url,
-                    'date': yatayat.date_issued.strftime('%Y-%m-%d'),
-                    'vanshar': shipment.vanshar or 'N/A' # Displaying Shipment Vanshar
-                })
+        for yatayat in attach_previews(shipment.yatayats.filter(HAS_CHITTI)):
+            preview = yatayat.preview
+            files_data.append({
+                'display_name': yatayat.display_name,
+                'url': yatayat.get_file_url(),
+                'date': yatayat.date_issued.strftime('%Y-%m-%d'),
+                'vanshar': shipment.vanshar or 'N/A', # Displaying Shipment Vanshar
+                # Null until the preview worker has rendered the file.
+                'thumbnail_url': ShipmentYatayat.preview_url(yatayat.pk, yatayat.chitti_file.name) if preview else None,
+                'page_count': preview.page_count if preview else None,
+            })
 
         return JsonResponse({'files': files_data})
 
+    except Http404:
+        raise
     except Exception:
         logger.error(
             f"Failed to fetch chitti files | ShipmentID={shipment_id}",
@@ -400,29 +568,165 @@ def get_chitti_files(request, shipment_id):
         )
         return JsonResponse({'files': []}, status=500)
 
+
+# --------------------
+# CHITTI DOWNLOAD
+# --------------------
+def _download_yatayat(request, pk):
+    """
+    (user, yatayat with a chitti) for a download of `pk`; user is None when
+    the request carries no valid session or token. 404 when the user may
+    not see the shipment.
+    """
+    try:
+        user = download_user(request)
+    except AuthenticationFailed:
+        user = None
+    if user is None:
+        return None, None
+    yatayat = get_object_or_404(
+        ShipmentYatayat.objects.filter(shipment__in=Shipment.objects.visible_to(user)).filter(HAS_CHITTI),
+        pk=pk,
+    )
+    return user, yatayat
+
+
+@require_safe
+def chitti_file(request, pk, filename):
+    """
+    Sends a yatayat's chitti file after checking that the user (session or
+    API token) may see its shipment. The transfer itself is handed to the
+    front proxy when SENDFILE_BACKEND is 'nginx' or 'xsendfile' (see
+    shipments.downloads), so workers never copy file bytes.
+    A URL naming an older file redirects to the current one.
+    """
+    user, yatayat = _download_yatayat(request, pk)
+    if user is None:
+        return login_required_response(request)
+
+    current = os.path.basename(yatayat.chitti_file.name)
+    if filename != current:
+        return set_download_cache_headers(redirect(yatayat.get_file_url()), immutable=False)
+
+    try:
+        response = serve_file(request, yatayat.chitti_file, yatayat.display_name)
+    except FileNotFoundError:
+        logger.error(f"Chitti file missing from storage | YatayatID={pk} | Name={yatayat.chitti_file.name}")
+        raise Http404("File not found.")
+    return set_download_cache_headers(response, immutable=True)
+
+
+@require_safe
+def chitti_preview(request, pk, filename):
+    """
+    Sends the first-page thumbnail of a yatayat's chitti, with the same
+    access check as chitti_file. 404 until the preview worker has
+    rendered it (render_chitti_previews); nothing is rendered here.
+    """
+    user, yatayat = _download_yatayat(request, pk)
+    if user is None:
+        return login_required_response(request)
+
+    name = yatayat.chitti_file.name
+    if filename != os.path.basename(name):
+        return set_download_cache_headers(
+            redirect(ShipmentYatayat.preview_url(pk, name)), immutable=False
+        )
+
+    preview = yatayat.preview
+    if preview is None or not preview.thumbnail:
+        raise Http404("No preview yet.")
+    try:
+        response = serve_file(
+            request, preview.thumbnail, f"{os.path.splitext(yatayat.display_name)[0]}.png"
+        )
+    except FileNotFoundError:
+        logger.error(f"Chitti thumbnail missing from storage | YatayatID={pk} | Name={preview.thumbnail.name}")
+        raise Http404("File not found.")
+    return set_download_cache_headers(response, immutable=True)
+
+
 # --------------------
 # STATIC ADMIN VIEWS
 # --------------------
 class ReportsView(LoginRequiredMixin, UserPassesTestMixin, RBACContextMixin, TemplateView):
     """
     Renders the Reports page. Accessible only to Superusers and Admin group.
+    Figures come from the pre-aggregated SettlementRollup table (shipments.rollups)
+    and the cached ageing and turnaround reports (shipments.reports, shipments.analytics).
     """
     template_name = 'shipments/reports.html'
 
     def test_func(self):
         # allow superuser or Administrator group
-        user = self.request.user
-        return user.is_superuser or user.groups.filter(name='Admin').exists()
+        return get_roles(self.request.user).is_admin
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            months = int(self.request.GET.get('months', DEFAULT_REPORT_PERIOD))
+        except ValueError:
+            months = DEFAULT_REPORT_PERIOD
+        if months not in dict(REPORT_PERIODS):
+            months = DEFAULT_REPORT_PERIOD
+
+        basis = self.request.GET.get('ageing', DEFAULT_AGEING_BASIS)
+        if basis not in dict(AGEING_BASES):
+            basis = DEFAULT_AGEING_BASIS
+
+        grouping = self.request.GET.get('group_by', DEFAULT_GROUPING)
+        if grouping not in GROUPINGS:
+            grouping = DEFAULT_GROUPING
+        try:
+            turnaround = turnaround_report(grouping)
+        except ImportError as exc:
+            logger.error(f"Turnaround analytics unavailable: {exc}")
+            turnaround = None
+
+        context.update({
+            'report': build_report(months),
+            'months': months,
+            'periods': REPORT_PERIODS,
+            'ageing': ageing_report(basis),
+            'ageing_bases': AGEING_BASES,
+            'turnaround': turnaround,
+            'grouping': grouping,
+        })
+        return context
 
 
-class ClientsView(LoginRequiredMixin, UserPassesTestMixin, RBACContextMixin, TemplateView):
+class ClientsView(LoginRequiredMixin, UserPassesTestMixin, RBACContextMixin, ListView):
     """
     Renders the Clients page. Accessible only to Superusers and Admin group.
+    Lists clients with their running balances (ClientBalance), so no shipment
+    is read; '?q=' matches the start of any of a client's aliases.
     """
     template_name = 'shipments/clients.html'
+    context_object_name = 'clients'
+    paginate_by = 50
 
     def test_func(self):
-        user = self.request.user
-        return user.is_superuser or user.groups.filter(name='Admin').exists()
+        return get_roles(self.request.user).is_admin
 
+    def get_queryset(self):
+        queryset = Client.objects.prefetch_related('balances')
+        query = normalize_client_name(self.request.GET.get('q'))
+        if query:
+            queryset = queryset.filter(
+                pk__in=ClientAlias.objects.filter(normalized_name__startswith=query).values('client_id')
+            )
+        return queryset
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        today = timezone.localdate()
+        for client in context['clients']:
+            balances = [balance for balance in client.balances.all() if balance.shipment_count]
+            client.balance_rows = balances
+            client.shipment_total = sum(balance.shipment_count for balance in balances)
+            client.open_total = sum(balance.open_count for balance in balances)
+            # Today's rates, from the in-memory rate table.
+            converted = [to_npr(balance.outstanding_amount, balance.currency, today) for balance in balances]
+            client.outstanding_npr = None if None in converted else sum(converted)
+        context['query'] = self.request.GET.get('q', '')
+        return context
@@ -87,8 +87,128 @@ document.addEventListener('DOMContentLoaded', function () {
         });
     }
 
-    /* ===== Submit Loader ===== */
+    /* ===== Chunked Chitti Upload ===== */
+    // Each chosen file is uploaded in chunks as soon as it is picked; the
+    // form then posts only the upload id (hidden *-chitti_upload field), so
+    // saving never waits on one long multipart request. A dropped chunk is
+    // retried from the offset the server reports. If an upload fails, the
+    // file stays in its input and is posted with the form as before.
     const form = document.getElementById("shipmentForm");
+    const uploadUrl = form?.dataset.uploadUrl;
+    const pendingUploads = new Set();
+    const latestUpload = new WeakMap();  // file input -> its most recent upload
+    const MAX_RETRIES = 5;
+
+    function csrfToken() {
+        return form.querySelector('[name=csrfmiddlewaretoken]')?.value || '';
+    }
+
+    async function uploadRequest(url, options) {
+        const response = await fetch(url, {
+            credentials: 'same-origin',
+            ...options,
+            headers: { 'X-CSRFToken': csrfToken(), ...(options.headers || {}) },
+        });
+        const data = await response.json().catch(() => ({}));
+        return { response, data };
+    }
+
+    async function uploadChitti(file, status) {
+        let { response, data } = await uploadRequest(uploadUrl, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, size: file.size }),
+        });
+        if (response.status !== 201) {
+            throw new Error(Object.values(data).flat().join(' ') || 'Upload could not start.');
+        }
+        const url = response.headers.get('Location');
+        const chunkSize = parseInt(response.headers.get('Upload-Chunk-Size'), 10) || 1024 * 1024;
+        let offset = data.offset;
+        let retries = 0;
+
+        while (offset < file.size) {
+            const end = Math.min(offset + chunkSize, file.size);
+            try {
+                ({ response, data } = await uploadRequest(url, {
+                    method: 'PUT',
+                    headers: {
+                        'Content-Type': 'application/octet-stream',
+                        'Content-Range': `bytes ${offset}-${end - 1}/${file.size}`,
+                    },
+                    body: file.slice(offset, end),
+                }));
+            } catch (networkError) {
+                response = null;
+            }
+
+            if (response && (response.ok || response.status === 409)) {
+                // 409: the server has a different offset (e.g. a retried chunk did arrive).
+                offset = data.offset;
+                retries = 0;
+                status.textContent = `Uploading… ${Math.round(100 * offset / file.size)}%`;
+                continue;
+            }
+            if (response && response.status < 500) {
+                const detail = data.detail;
+                throw new Error((Array.isArray(detail) ? detail.join(' ') : detail) || 'Upload failed.');
+            }
+            if (++retries > MAX_RETRIES) throw new Error('Upload failed; the connection keeps dropping.');
+            await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** retries));
+            // Resume from what the server actually stored.
+            const state = await uploadRequest(url, { method: 'GET' }).catch(() => null);
+            if (state && state.response.ok) offset = state.data.offset;
+        }
+        return data.id;
+    }
+
+    if (form && uploadUrl && window.fetch) {
+        form.addEventListener('change', function (e) {
+            const input = e.target;
+            if (!input.matches('input[type=file][name$="-chitti_file"]') || !input.files.length) return;
+
+            const hidden = form.querySelector(`[name="${input.name.replace(/chitti_file$/, 'chitti_upload')}"]`);
+            if (!hidden) return;
+            let status = input.parentElement.querySelector('.chitti-upload-status');
+            if (!status) {
+                status = document.createElement('div');
+                status.className = 'form-text chitti-upload-status';
+                input.insertAdjacentElement('afterend', status);
+            }
+
+            const file = input.files[0];
+            hidden.value = '';
+            status.classList.remove('text-danger', 'text-success');
+            status.textContent = 'Uploading… 0%';
+
+            const task = uploadChitti(file, status)
+                .then(id => {
+                    if (latestUpload.get(input) !== task) return;  // Another file was picked meanwhile.
+                    hidden.value = id;
+                    input.value = '';  // Already on the server: don't post it again.
+                    status.classList.add('text-success');
+                    status.textContent = `Uploaded ${file.name}`;
+                })
+                .catch(error => {
+                    if (latestUpload.get(input) !== task) return;
+                    status.classList.add('text-danger');
+                    status.textContent = `${error.message} It will be sent with the form instead.`;
+                })
+                .finally(() => pendingUploads.delete(task));
+            latestUpload.set(input, task);
+            pendingUploads.add(task);
+        });
+
+        // Wait for running uploads before the form is sent.
+        form.addEventListener('submit', function (e) {
+            if (!pendingUploads.size) return;
+            e.preventDefault();
+            e.stopImmediatePropagation();
+            Promise.allSettled([...pendingUploads]).then(() => form.requestSubmit());
+        });
+    }
+
+    /* ===== Submit Loader ===== */
     const submitBtn = document.getElementById("submitBtn");
     const btnText = document.getElementById("btnText");
     const btnLoading = document.getElementById("btnLoading");
@@ -24,10 +24,12 @@ document.addEventListener('DOMContentLoaded', () => {
                         list.innerHTML += `
                             <div class="list-group-item d-flex justify-content-between align-items-center p-3">
                                 <div class="d-flex align-items-center">
-                                    <i class="bi bi-file-earmark-pdf text-danger fs-5 me-3"></i>
+                                    ${f.thumbnail_url
+                                        ? `<img src="${f.thumbnail_url}" alt="" loading="lazy" class="border rounded me-3" style="width: 48px; height: 64px; object-fit: cover; object-position: top;">`
+                                        : `<i class="bi bi-file-earmark-pdf text-danger fs-5 me-3"></i>`}
                                     <div>
                                         <div class="fw-bold small text-dark">${f.display_name}</div>
-                                        <div style="font-size: 0.65rem;" class="text-muted">${f.date}</div>
+                                        <div style="font-size: 0.65rem;" class="text-muted">${f.date}${f.page_count ? ` · ${f.page_count} ${f.page_count === 1 ? 'page' : 'pages'}` : ''}</div>
                                     </div>
                                 </div>
                                 <a href="${f.url}" target="_blank" class="btn btn-sm btn-primary px-3 rounded-pill" style="font-size: 0.7rem;">
@@ -42,8 +44,10 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
-    // 2. Search and Filtering Logic
     const $ = id => document.getElementById(id);
+    const tbody = document.querySelector('table tbody');
+    const loadMoreBtn = $('loadMoreBtn');
+    const rowsUrl = loadMoreBtn?.dataset.url;
 
     const searchInput = $('invoiceSearch');
     const statusFilter = $('statusFilter');
@@ -55,9 +59,73 @@ document.addEventListener('DOMContentLoaded', () => {
     const clearBtn = $('clearAllFilters');
     const counter = $('rowCountDisplay');
 
-    if (!searchInput) return; // Exit if filters are not present
+    // Current filters as query parameters (the server does the actual filtering)
+    function filterParams() {
+        const params = new URLSearchParams();
+        if (!searchInput) return params;
+
+        const q = searchInput.value.trim();
+        if (q) params.set('q', q);
+        if (statusFilter.value) params.set('status', statusFilter.value);
+        // Only send complete DD/MM/YYYY dates
+        if (etaStart.value.length === 10) params.set('eta_from', etaStart.value);
+        if (etaEnd.value.length === 10) params.set('eta_to', etaEnd.value);
+        // Set by the links on the Clients page; kept while searching
+        const client = new URLSearchParams(window.location.search).get('client');
+        if (client) params.set('client', client);
+        return params;
+    }
+
+    // Fetches a rows fragment; 'append' adds to the table, otherwise it is replaced
+    function loadRows(params, append) {
+        return fetch(`${rowsUrl}?${params}`, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+            .then(r => {
+                if (!r.ok) throw new Error(r.statusText);
+                return r.text().then(html => ({
+                    html,
+                    nextCursor: r.headers.get('X-Next-Cursor'),
+                    nextOffset: r.headers.get('X-Next-Offset'),
+                    resultCount: r.headers.get('X-Result-Count'),
+                    resultTotalNpr: r.headers.get('X-Result-Total-NPR'),
+                    resultUnconverted: r.headers.get('X-Result-Unconverted'),
+                }));
+            })
+            .then(res => {
+                if (append) {
+                    tbody.insertAdjacentHTML('beforeend', res.html);
+                } else {
+                    tbody.innerHTML = res.html;
+                }
+
+                loadMoreBtn.dataset.after = res.nextCursor || '';
+                loadMoreBtn.dataset.offset = res.nextOffset || 0;
+                loadMoreBtn.classList.toggle('d-none', !res.nextCursor);
+                return res;
+            });
+    }
+
+    // 2. Load More (keyset pagination)
+    if (loadMoreBtn && tbody) {
+        loadMoreBtn.addEventListener('click', () => {
+            const params = filterParams();
+            params.set('after', loadMoreBtn.dataset.after);
+            params.set('offset', loadMoreBtn.dataset.offset);
+
+            loadMoreBtn.disabled = true;
+            loadRows(params, true)
+                .then(() => {
+                    loadMoreBtn.disabled = false;
+                    loadMoreBtn.innerText = 'Load more';
+                })
+                .catch(() => {
+                    loadMoreBtn.disabled = false;
+                    loadMoreBtn.innerText = 'Retry loading';
+                });
+        });
+    }
 
-    const rows = [...document.querySelectorAll('table tbody tr:not(.empty-row)')];
+    // 3. Search and Filtering Logic (server-side)
+    if (!searchInput || !rowsUrl) return; // Exit if filters are not present
 
     if (typeof Cleave !== 'undefined') {
         [etaStart, etaEnd].forEach(el => {
@@ -69,67 +137,50 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
-    function parseDMY(v) {
-        if (!v || v.length !== 10) return null;
-        const [d,m,y] = v.split('/');
-        return new Date(y, m - 1, d);
-    }
+    let activeRequest = 0;
 
-    function normalize(t) {
-        return (t || '').toLowerCase().trim();
-    }
+    function applyFilters() {
+        const params = filterParams();
+        const requestId = ++activeRequest;
 
-    /* 🔥 SEARCH = INVOICE/APPLICANT COLUMN ONLY (NEW INDEX 1) */
-    function rowMatchesSearch(row, query) {
-        if (!query) return true;
+        // Keep the address bar in sync so a reload shows the same results
+        const query = params.toString();
+        window.history.replaceState(null, '', query ? `?${query}` : window.location.pathname);
 
-        const invoiceCellIndex = 1; // 👈 INVOICE/APPLICANT MERGED COLUMN
-        const invoiceCell = row.cells[invoiceCellIndex];
-        if (!invoiceCell) return false;
-        
-        return normalize(invoiceCell.innerText).includes(query);
-    }
+        // Page links point at the unfiltered cursor; 'Load more' takes over
+        document.querySelectorAll('.pager-links').forEach(el => el.classList.add('d-none'));
 
-    function applyFilters() {
-        const query = normalize(searchInput.value);
-        const status = normalize(statusFilter.value);
-        const startDate = parseDMY(etaStart.value);
-        const endDate = parseDMY(etaEnd.value);
-
-        let visibleCount = 0;
-
-        rows.forEach(row => {
-            let visible = true;
-
-            if (!rowMatchesSearch(row, query)) visible = false;
-
-            if (status) {
-                // Professional check: Does the row contain any element with the 'badge-pending' class?
-                const hasPendingBadge = row.querySelector('.badge-pending') !== null;
-                
-                if (status === 'unsettled') {
-                    if (!hasPendingBadge) visible = false;
-                } else if (status === 'settled') {
-                    if (hasPendingBadge) visible = false;
-                }
-            }
-
-            if (startDate || endDate) {
-                const etaText = row.cells[7]?.innerText || ''; // 👈 ETA column now at index 7
-                const rowDate = parseDMY(etaText);
-                if (!rowDate) visible = false;
-                if (startDate && rowDate < startDate) visible = false;
-                if (endDate && rowDate > endDate) visible = false;
-            }
-
-            row.style.display = visible ? '' : 'none';
-            if (visible) visibleCount++;
+        // Exports follow the active filters
+        document.querySelectorAll('.export-link').forEach(el => {
+            const exportParams = new URLSearchParams(params);
+            exportParams.set('format', el.dataset.format);
+            el.href = `${el.dataset.url}?${exportParams}`;
         });
 
-        counter.textContent =
-            visibleCount === rows.length
-                ? "Showing all records"
-                : `Showing ${visibleCount} of ${rows.length} records`;
+        counter.textContent = 'Searching...';
+        loadRows(params, false)
+            .then(res => {
+                if (requestId !== activeRequest) return;
+                if (res.resultCount === null) {
+                    counter.textContent = 'All Records Shown';
+                    return;
+                }
+                let text = `${res.resultCount} matching record${res.resultCount === '1' ? '' : 's'}`;
+                // Sum of the matching amounts converted to NPR (empty without rates)
+                if (res.resultTotalNpr) {
+                    const total = Number(res.resultTotalNpr).toLocaleString('en-IN', { minimumFractionDigits: 2, maximumFractionDigits: 2 });
+                    text += ` · रु ${total}`;
+                }
+                // Rows without an exchange rate are not in the total
+                if (Number(res.resultUnconverted) > 0) {
+                    text += ` · ${res.resultUnconverted} not converted`;
+                }
+                counter.textContent = text;
+            })
+            .catch(() => {
+                if (requestId !== activeRequest) return;
+                counter.textContent = 'Error loading records';
+            });
     }
 
     function debounce(fn, d = 250) {
@@ -160,8 +211,8 @@ document.addEventListener('DOMContentLoaded', () => {
 
     searchInput.addEventListener('input', debouncedFilter);
     statusFilter.addEventListener('change', applyFilters);
-    etaStart.addEventListener('input', applyFilters);
-    etaEnd.addEventListener('input', applyFilters);
+    etaStart.addEventListener('input', debouncedFilter);
+    etaEnd.addEventListener('input', debouncedFilter);
 
     clearBtn.onclick = () => {
         searchInput.value = '';
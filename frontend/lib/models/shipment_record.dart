@@ -3,12 +3,16 @@ class ChittiRecord {
   final String url; // FULL URL
   final String displayName;
   final String date;
+  final String? thumbnailUrl; // null until the server has rendered the preview
+  final int? pageCount;
 
   ChittiRecord({
     required this.id,
     required this.url,
     required this.displayName,
     required this.date,
+    this.thumbnailUrl,
+    this.pageCount,
   });
 
   factory ChittiRecord.fromJson(Map<String, dynamic> json, {String? baseUrl}) {
@@ -16,11 +20,17 @@ class ChittiRecord {
     if (baseUrl != null && !fileUrl.startsWith('http')) {
       fileUrl = baseUrl + fileUrl; // prepend domain if relative
     }
+    String? thumbnailUrl = json['thumbnail_url'];
+    if (thumbnailUrl != null && baseUrl != null && !thumbnailUrl.startsWith('http')) {
+      thumbnailUrl = baseUrl + thumbnailUrl;
+    }
     return ChittiRecord(
       id: json['id'],
       url: fileUrl,
       displayName: json['display_name'] ?? 'Chitti.pdf',
       date: json['date'] ?? '',
+      thumbnailUrl: thumbnailUrl,
+      pageCount: json['page_count'],
     );
   }
 }
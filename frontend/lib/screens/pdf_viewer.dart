@@ -9,7 +9,8 @@ import 'package:http/http.dart' as http;
 
 class FullScreenPdfViewer extends StatefulWidget {
   final String url;
-  const FullScreenPdfViewer({super.key, required this.url});
+  final String token;
+  const FullScreenPdfViewer({super.key, required this.url, required this.token});
 
   @override
   _FullScreenPdfViewerState createState() => _FullScreenPdfViewerState();
@@ -28,14 +29,18 @@ class _FullScreenPdfViewerState extends State<FullScreenPdfViewer> {
     _pdfFileFuture = _loadPdfFromNetwork(widget.url);
   }
 
+  // Chitti files are served only to signed-in users, so the request carries
+  // the API token. The body is streamed to disk instead of held in memory.
   Future<File> _loadPdfFromNetwork(String url) async {
+    final client = http.Client();
     try {
       if (url.isEmpty) throw Exception("PDF URL is empty");
 
-      Uri uri = Uri.parse(url.trim());
-      final response = await http.get(uri);
+      final request = http.Request('GET', Uri.parse(url.trim()))
+        ..headers['Authorization'] = 'Token ${widget.token}';
+      final response = await client.send(request);
 
-      if (response.statusCode != 200 || response.bodyBytes.isEmpty) {
+      if (response.statusCode != 200) {
         throw Exception("Failed to download PDF: Status ${response.statusCode}");
       }
 
@@ -43,11 +48,16 @@ class _FullScreenPdfViewerState extends State<FullScreenPdfViewer> {
       final fileName = '${DateTime.now().millisecondsSinceEpoch}.pdf';
       final file = File('${dir.path}/$fileName');
 
-      await file.writeAsBytes(response.bodyBytes);
+      await response.stream.pipe(file.openWrite());
+      if (await file.length() == 0) {
+        throw Exception("Failed to download PDF: empty file");
+      }
       return file;
     } catch (e) {
       setState(() => _errorMessage = e.toString());
       rethrow;
+    } finally {
+      client.close();
     }
   }
 
@@ -10,8 +10,9 @@ const Color cardBackgroundColor = Color(0xFFfcfcff);
 
 class ShipmentDetailScreen extends StatelessWidget {
   final ShipmentRecord shipment;
+  final String token;
 
-  const ShipmentDetailScreen({super.key, required this.shipment});
+  const ShipmentDetailScreen({super.key, required this.shipment, required this.token});
 
   // ---------------- PDF VIEWER ----------------
   void _openPdfViewer(BuildContext context, String url) {
@@ -25,7 +26,7 @@ class ShipmentDetailScreen extends StatelessWidget {
     Navigator.push(
       context,
       MaterialPageRoute(
-        builder: (_) => FullScreenPdfViewer(url: url),
+        builder: (_) => FullScreenPdfViewer(url: url, token: token),
       ),
     );
   }
@@ -117,13 +118,15 @@ class ShipmentDetailScreen extends StatelessWidget {
             final chitti = pdfList[index];
             return ListTile(
               contentPadding: const EdgeInsets.symmetric(horizontal: 16, vertical: 4),
-              leading: const Icon(Icons.picture_as_pdf, color: Colors.red, size: 28),
+              leading: _buildChittiThumbnail(chitti),
               title: Text(
                 chitti.displayName,
                 style: const TextStyle(fontWeight: FontWeight.w500),
               ),
               subtitle: Text(
-                chitti.date,
+                chitti.pageCount == null
+                    ? chitti.date
+                    : "${chitti.date} · ${chitti.pageCount} ${chitti.pageCount == 1 ? 'page' : 'pages'}",
                 style: const TextStyle(fontSize: 13),
               ),
               trailing: const Icon(Icons.arrow_forward_ios, size: 14),
@@ -138,6 +141,25 @@ class ShipmentDetailScreen extends StatelessWidget {
     );
   }
 
+  // ---------------- CHITTI THUMBNAIL ----------------
+  // First-page preview rendered by the server; the PDF icon until it exists.
+  Widget _buildChittiThumbnail(ChittiRecord chitti) {
+    const pdfIcon = Icon(Icons.picture_as_pdf, color: Colors.red, size: 28);
+    if (chitti.thumbnailUrl == null) return pdfIcon;
+    return ClipRRect(
+      borderRadius: BorderRadius.circular(4),
+      child: Image.network(
+        chitti.thumbnailUrl!,
+        headers: {'Authorization': 'Token $token'},
+        width: 40,
+        height: 54,
+        fit: BoxFit.cover,
+        alignment: Alignment.topCenter,
+        errorBuilder: (_, __, ___) => pdfIcon,
+      ),
+    );
+  }
+
   // ---------------- DETAIL ROW ----------------
   Widget _buildDetailRow(String label, String value,
       {Color valueColor = Colors.black87, FontWeight valueWeight = FontWeight.normal}) {
@@ -49,6 +49,7 @@ class _ShipmentListScreenState extends State<ShipmentListScreen> {
   }
 
   Future<void> _logout(BuildContext context) async {
+    await apiService.logout(widget.token);
     if (!mounted) return;
     Navigator.pushAndRemoveUntil(
       context,
@@ -247,7 +248,7 @@ class _ShipmentListScreenState extends State<ShipmentListScreen> {
           Navigator.push(
             context,
             MaterialPageRoute(
-              builder: (_) => ShipmentDetailScreen(shipment: record),
+              builder: (_) => ShipmentDetailScreen(shipment: record, token: widget.token),
             ),
           );
         },
@@ -5,6 +5,10 @@ class ApiService {
   final String baseUrl ="http://192.168.18.17:8000/shipments";
   // final String baseUrl = "http://10.0.2.2:8000";
 
+  // Last shipment list and its ETag; a 304 reply means it is still current.
+  String? _shipmentsEtag;
+  List<dynamic>? _cachedShipments;
+
 
   Future<String> login(String username, String password) async {
     final url = Uri.parse("$baseUrl/api/mobile/login/");
@@ -30,22 +34,44 @@ class ApiService {
   }
 
   Future<List<dynamic>> fetchShipments(String token) async {
-    final url = Uri.parse("$baseUrl/api/mobile/shipments/");
+    // The list is cursor-paginated by default; request the legacy array.
+    final url = Uri.parse("$baseUrl/api/mobile/shipments/?paginate=false");
 
     final response = await http.get(
       url,
       headers: {
         "Authorization": "Token $token",
+        if (_shipmentsEtag != null && _cachedShipments != null)
+          "If-None-Match": _shipmentsEtag!,
       },
     );
 
     print("STATUS: ${response.statusCode}");
     print("BODY: ${response.body}");
 
-    if (response.statusCode == 200) {
-      return jsonDecode(response.body);
+    if (response.statusCode == 304 && _cachedShipments != null) {
+      return _cachedShipments!;
+    } else if (response.statusCode == 200) {
+      final data = jsonDecode(response.body);
+      _shipmentsEtag = response.headers['etag'];
+      _cachedShipments = data;
+      return data;
     } else {
       throw Exception("Failed to load shipments: ${response.body}");
     }
   }
+
+  // Revokes the token on the server. Logging out locally must not depend on
+  // it, so failures are ignored.
+  Future<void> logout(String token) async {
+    final url = Uri.parse("$baseUrl/api/mobile/logout/");
+
+    try {
+      await http.post(url, headers: {"Authorization": "Token $token"});
+    } catch (e) {
+      print("LOGOUT FAILED: $e");
+    }
+    _shipmentsEtag = null;
+    _cachedShipments = null;
+  }
 }